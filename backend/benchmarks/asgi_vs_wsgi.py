@@ -0,0 +1,76 @@
+"""
+مقایسه‌ی اندپوینت‌های sync زیر WSGI با نسخه‌ی async آن‌ها زیر ASGI با تعداد worker برابر.
+
+هر دو سرور با gunicorn روی همان پایگاه داده اجرا می‌شوند (WSGI با worker معمولی،
+ASGI با uvicorn.workers.UvicornWorker) و برای هر اندپوینت rps و p50/p95/p99 گزارش می‌شود.
+
+    python -m benchmarks.asgi_vs_wsgi --username stu1 --password 123 --workers 4 \\
+        --concurrency 64 --requests 2000 [--select-course CS101] [--output result.json]
+
+کاربر داده‌شده باید دانشجو باشد و درس‌های نیم‌سال فعال در پایگاه داده وجود داشته باشند.
+"""
+import argparse
+
+from .common import hammer, http, obtain_token, start_server, write_results
+
+# (نام، مسیر WSGI، مسیر ASGI)
+READ_ENDPOINTS = [
+    ('catalog', '/api/courses/', '/api/async/courses/'),
+    ('draft', '/api/selection/selections/draft/', '/api/selection/async/draft/'),
+    ('schedule', '/api/selection/selections/schedule/', '/api/selection/async/schedule/'),
+]
+SELECT_PATHS = {'wsgi': '/api/selection/selections/select-course/', 'asgi': '/api/selection/async/select-course/'}
+DELETE_PATH = '/api/selection/selections/delete-selection/'
+
+
+def run_suite(kind, base_url, args):
+    token = obtain_token(base_url, args.username, args.password)
+    results = {}
+    for name, wsgi_path, asgi_path in READ_ENDPOINTS:
+        url = base_url + (wsgi_path if kind == 'wsgi' else asgi_path)
+        results[name] = hammer(lambda: http('GET', url, token)[0], args.requests, args.concurrency)
+
+    if args.select_course:
+        # هر تکرار درس را انتخاب و بلافاصله حذف می‌کند؛ فقط زمان انتخاب اندازه‌گیری می‌شود
+        select_url = base_url + SELECT_PATHS[kind]
+        delete_url = f"{base_url}{DELETE_PATH}?course_code={args.select_course}"
+
+        def select_and_drop():
+            status = http('POST', select_url, token, {'course_code': args.select_course})[0]
+            http('DELETE', delete_url, token)
+            return status
+
+        results['select_course'] = hammer(select_and_drop, max(1, args.requests // 10), 1)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--username', required=True)
+    parser.add_argument('--password', required=True)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--concurrency', type=int, default=64)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--select-course', help='کد درسی که برای سنجش select-course انتخاب و حذف می‌شود')
+    parser.add_argument('--wsgi-port', type=int, default=8101)
+    parser.add_argument('--asgi-port', type=int, default=8102)
+    parser.add_argument('--output')
+    args = parser.parse_args()
+
+    servers = {
+        'wsgi': (args.wsgi_port, ['gunicorn', 'core.wsgi:application']),
+        'asgi': (args.asgi_port, ['gunicorn', 'core.asgi:application', '-k', 'uvicorn.workers.UvicornWorker']),
+    }
+    results = {'workers': args.workers, 'concurrency': args.concurrency}
+    for kind, (port, command) in servers.items():
+        process = start_server(command + ['-w', str(args.workers), '-b', f'127.0.0.1:{port}'], port)
+        try:
+            results[kind] = run_suite(kind, f'http://127.0.0.1:{port}', args)
+        finally:
+            process.terminate()
+            process.wait()
+    write_results(results, args.output)
+
+
+if __name__ == '__main__':
+    main()
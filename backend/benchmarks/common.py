@@ -0,0 +1,112 @@
+"""ابزارهای مشترک اسکریپت‌های بنچمارک (فقط کتابخانه‌ی استاندارد)"""
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+def http(method, url, token=None, body=None, timeout=30):
+    """یک درخواست HTTP؛ خروجی (status, bytes)"""
+    data = json.dumps(body).encode() if body is not None else None
+    request = urllib.request.Request(url, data=data, method=method)
+    request.add_header('Content-Type', 'application/json')
+    if token:
+        request.add_header('Authorization', f'Bearer {token}')
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            return response.status, response.read()
+    except urllib.error.HTTPError as e:
+        return e.code, e.read()
+    except (urllib.error.URLError, OSError) as e:
+        return 0, str(e).encode()
+
+
+def obtain_token(base_url, username, password):
+    status, body = http('POST', f'{base_url}/api/token/', body={'username': username, 'password': password})
+    if status != 200:
+        raise RuntimeError(f"ورود {username} ناموفق بود: {status} {body[:200]!r}")
+    return json.loads(body)['access']
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def summarize(latencies, statuses, elapsed):
+    """خلاصه‌ی آماری یک اجرا؛ زمان‌ها بر حسب میلی‌ثانیه"""
+    ok = sum(1 for s in statuses if 200 <= s < 300)
+    breakdown = {}
+    for s in statuses:
+        breakdown[str(s)] = breakdown.get(str(s), 0) + 1
+    ms = [value * 1000 for value in latencies]
+    return {
+        'requests': len(statuses),
+        'ok': ok,
+        'elapsed_s': round(elapsed, 3),
+        'rps': round(len(statuses) / elapsed, 1) if elapsed else 0.0,
+        'p50_ms': round(percentile(ms, 50), 2),
+        'p95_ms': round(percentile(ms, 95), 2),
+        'p99_ms': round(percentile(ms, 99), 2),
+        'statuses': breakdown,
+    }
+
+
+def hammer(call, total, concurrency):
+    """اجرای call به تعداد total با concurrency نخ هم‌زمان؛ call باید status برگرداند"""
+    latencies, statuses = [], []
+
+    def one(_):
+        started = time.perf_counter()
+        status = call()
+        return time.perf_counter() - started, status
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for latency, status in pool.map(one, range(total)):
+            latencies.append(latency)
+            statuses.append(status)
+    return summarize(latencies, statuses, time.perf_counter() - started)
+
+
+def wait_for_port(host, port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        with socket.socket() as sock:
+            if sock.connect_ex((host, port)) == 0:
+                return
+        time.sleep(0.2)
+    raise RuntimeError(f"سرور روی {host}:{port} بالا نیامد")
+
+
+def start_server(args, port, env=None):
+    """اجرای یک سرور (مثلاً gunicorn) در پوشه‌ی backend و انتظار تا آماده شدن پورت"""
+    process = subprocess.Popen(
+        args, cwd=BACKEND_DIR, env={**os.environ, **(env or {})},
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        wait_for_port('127.0.0.1', port)
+    except RuntimeError:
+        process.kill()
+        raise
+    return process
+
+
+def write_results(results, output=None):
+    text = json.dumps(results, ensure_ascii=False, indent=2)
+    if output:
+        Path(output).write_text(text, encoding='utf-8')
+    else:
+        sys.stdout.write(text + '\n')
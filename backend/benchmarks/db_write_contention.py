@@ -0,0 +1,166 @@
+"""
+رقابت نوشتن هم‌زمان روی SQLite: تنظیمات پیش‌فرض قدیمی در برابر پروفایل WAL.
+
+برای هر پروفایل یک پایگاه داده‌ی موقت ساخته و migrate می‌شود، سپس چند نخ (هر کدام با اتصال
+جداگانه و یک دانشجوی مستقل) همان مسیر انتخاب واحد را اجرا می‌کنند: select_course و بلافاصله
+delete_selection از طریق SelectionService. برای هر پروفایل تعداد عملیات موفق، خطاهای
+«database is locked»، عملیات در ثانیه و p50/p95/p99 گزارش می‌شود.
+
+    python -m benchmarks.db_write_contention [--threads 16] [--operations 50] [--courses 20] [--output result.json]
+
+هر پروفایل در یک پروسه‌ی جدا اجرا می‌شود، چون تنظیمات DATABASES هنگام django.setup خوانده می‌شوند.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from .common import BACKEND_DIR, summarize, write_results
+
+# متغیرهای محیطی هر پروفایل (همان کلیدهای core/settings.py)
+PROFILES = {
+    # رفتار قبلی: journal پیش‌فرض، synchronous=FULL، تراکنش DEFERRED و timeout پیش‌فرض ماژول sqlite3
+    'rollback_journal': {
+        'DB_SQLITE_JOURNAL_MODE': 'DELETE',
+        'DB_SQLITE_SYNCHRONOUS': 'FULL',
+        'DB_SQLITE_TRANSACTION_MODE': '',
+        'DB_SQLITE_TIMEOUT': '5',
+    },
+    # پیش‌فرض فعلی
+    'wal': {
+        'DB_SQLITE_JOURNAL_MODE': 'WAL',
+        'DB_SQLITE_SYNCHRONOUS': 'NORMAL',
+        'DB_SQLITE_TRANSACTION_MODE': 'IMMEDIATE',
+        'DB_SQLITE_TIMEOUT': '20',
+    },
+}
+
+
+def seed(threads, courses):
+    from datetime import timedelta
+
+    from django.utils import timezone
+
+    from courses.models import Course, Term, UnitLimit
+    from users.models import User
+
+    start = timezone.now() - timedelta(days=1)
+    term = Term.objects.create(name='بنچمارک', start_selection=start, end_selection=start + timedelta(days=30), is_active=True)
+    UnitLimit.objects.create(min_units=1, max_units=20)
+    professor = User.objects.create(username='bench-professor', role='professor')
+    Course.objects.bulk_create(
+        Course(code=f'B{i:03}', name=f'درس {i}', professor=professor, term=term, capacity=threads * 2)
+        for i in range(courses)
+    )
+    User.objects.bulk_create(User(username=f'bench-student-{i}', role='student') for i in range(threads))
+
+
+def run_profile(threads, operations, courses):
+    """اجرای داخل پروسه‌ی فرزند؛ نتیجه به صورت JSON در stdout"""
+    import django
+    from django.core.exceptions import ValidationError
+    from django.core.management import call_command
+    from django.db import OperationalError, connection, connections
+
+    django.setup()
+    call_command('migrate', verbosity=0)
+    seed(threads, courses)
+
+    from courses.models import Course
+    from selection.services import SelectionService
+    from users.models import User
+
+    journal_mode = connection.cursor().execute('PRAGMA journal_mode').fetchone()[0]
+    connections.close_all()
+    students = list(User.objects.filter(role='student').order_by('id'))
+    course_ids = list(Course.objects.order_by('id').values_list('id', flat=True))
+    connections.close_all()
+
+    barrier = threading.Barrier(threads)
+    latencies, outcomes, lock = [], {'ok': 0, 'locked': 0, 'rejected': 0}, threading.Lock()
+
+    def worker(index):
+        service = SelectionService()
+        student = students[index]
+        barrier.wait()
+        try:
+            for op in range(operations):
+                course = Course.objects.select_related('term').get(pk=course_ids[(index + op) % len(course_ids)])
+                started = time.perf_counter()
+                try:
+                    service.select_course(student, course)
+                    service.delete_selection(student, course)
+                    outcome = 'ok'
+                except OperationalError:
+                    outcome = 'locked'
+                except ValidationError:
+                    outcome = 'rejected'
+                elapsed = time.perf_counter() - started
+                with lock:
+                    latencies.append(elapsed)
+                    outcomes[outcome] += 1
+        finally:
+            connection.close()
+
+    started = time.perf_counter()
+    pool = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    statuses = [200] * outcomes['ok'] + [409] * outcomes['rejected'] + [503] * outcomes['locked']
+    result = summarize(latencies, statuses, elapsed)
+    result.update(
+        journal_mode=journal_mode, locked_errors=outcomes['locked'], rejected=outcomes['rejected'],
+        ok_per_s=round(outcomes['ok'] / elapsed, 1) if elapsed else 0.0,
+    )
+    sys.stdout.write(json.dumps(result) + '\n')
+
+
+def spawn_profile(name, args, workdir):
+    env = {
+        **os.environ, **PROFILES[name],
+        'DB_ENGINE': 'sqlite',
+        'DB_NAME': str(Path(workdir) / f'{name}.sqlite3'),
+        'DJANGO_SETTINGS_MODULE': 'core.settings',
+        # کش فایلی مشترک پروژه نباید با داده‌ی پایگاه داده‌ی موقت پر شود
+        'CACHE_BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+    command = [
+        sys.executable, '-m', 'benchmarks.db_write_contention', '--run-profile',
+        '--threads', str(args.threads), '--operations', str(args.operations), '--courses', str(args.courses),
+    ]
+    completed = subprocess.run(command, cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True)
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--operations', type=int, default=50, help='تعداد انتخاب و حذف هر نخ')
+    parser.add_argument('--courses', type=int, default=20)
+    parser.add_argument('--profile', choices=sorted(PROFILES), action='append', help='پیش‌فرض: همه‌ی پروفایل‌ها')
+    parser.add_argument('--run-profile', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--output')
+    args = parser.parse_args()
+
+    if args.run_profile:
+        run_profile(args.threads, args.operations, args.courses)
+        return
+
+    results = {'threads': args.threads, 'operations_per_thread': args.operations}
+    with tempfile.TemporaryDirectory() as workdir:
+        for name in args.profile or list(PROFILES):
+            results[name] = spawn_profile(name, args, workdir)
+    write_results(results, args.output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+"""
+سربار MetricsMiddleware (core/metrics.py).
+
+روی یک پایگاه داده‌ی موقت، همان درخواست (فهرست دروس با احراز هویت JWT) یک بار با middleware
+فعال و یک بار غیرفعال در داخل همین پروسه (django.test.Client، بدون شبکه) اجرا می‌شود.
+دورها یک در میان اجرا می‌شوند تا گرم شدن کش‌ها و نوسان CPU روی یک طرف نیفتد. خروجی میانگین و
+p50/p99 هر حالت، اختلاف بر حسب میکروثانیه و درصد، و هزینه‌ی خالص ثبت یک درخواست در registry است.
+
+    python -m benchmarks.metrics_overhead [--requests 2000] [--rounds 5] [--courses 20] [--output result.json]
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+from .common import percentile, write_results
+
+
+def setup_environment(workdir, courses):
+    os.environ.update({
+        'DB_ENGINE': 'sqlite',
+        'DB_NAME': os.path.join(workdir, 'metrics.sqlite3'),
+        'CACHE_BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'METRICS_DIR': os.path.join(workdir, 'metrics'),
+    })
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+    import django
+    django.setup()
+
+    from django.core.management import call_command
+    from django.utils import timezone
+
+    from courses.models import Course, Term
+    from users.models import User
+
+    call_command('migrate', verbosity=0)
+    term = Term.objects.create(name='بنچمارک', start_selection=timezone.now(), end_selection=timezone.now())
+    professor = User.objects.create(username='bench-professor', role='professor')
+    for i in range(courses):
+        Course.objects.create(code=f'M{i:03}', name=f'درس {i}', professor=professor, term=term)
+    return User.objects.create(username='bench-student', role='student')
+
+
+def run_batch(client, path, headers, count):
+    timings = []
+    for _ in range(count):
+        started = time.perf_counter()
+        response = client.get(path, **headers)
+        timings.append(time.perf_counter() - started)
+        assert response.status_code == 200, response.status_code
+    return timings
+
+
+def describe(timings):
+    us = [value * 1e6 for value in timings]
+    return {
+        'requests': len(us),
+        'mean_us': round(statistics.fmean(us), 1),
+        'p50_us': round(percentile(us, 50), 1),
+        'p99_us': round(percentile(us, 99), 1),
+    }
+
+
+def observe_cost(count=100000):
+    """هزینه‌ی ثبت یک درخواست در registry (بدون درخواست HTTP)"""
+    from core.metrics import MetricsRegistry
+
+    registry = MetricsRegistry()
+    started = time.perf_counter()
+    for _ in range(count):
+        registry.observe('course-list', 'GET', '200', 0.004, 1, 0.0005, 2048)
+    return round((time.perf_counter() - started) / count * 1e6, 3)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=2000, help='تعداد درخواست هر حالت در هر دور')
+    parser.add_argument('--rounds', type=int, default=5)
+    parser.add_argument('--courses', type=int, default=20)
+    parser.add_argument('--output')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        student = setup_environment(workdir, args.courses)
+
+        from django.conf import settings
+        from django.test import Client, override_settings
+        from rest_framework_simplejwt.tokens import AccessToken
+
+        headers = {'HTTP_AUTHORIZATION': f'Bearer {AccessToken.for_user(student)}'}
+        path = f'/api/courses/?page_size={args.courses}'
+        # هر Client زنجیره‌ی middleware را در اولین درخواست با تنظیمات همان لحظه می‌سازد
+        clients = {'enabled': Client()}
+        run_batch(clients['enabled'], path, headers, 50)
+        with override_settings(METRICS={**settings.METRICS, 'ENABLED': False}):
+            clients['disabled'] = Client()
+            run_batch(clients['disabled'], path, headers, 50)
+
+        timings = {name: [] for name in clients}
+        for _ in range(args.rounds):
+            for name, client in clients.items():
+                timings[name] += run_batch(client, path, headers, args.requests)
+
+        enabled, disabled = describe(timings['enabled']), describe(timings['disabled'])
+        overhead = enabled['mean_us'] - disabled['mean_us']
+        results = {
+            'path': path,
+            'enabled': enabled,
+            'disabled': disabled,
+            'overhead_us': round(overhead, 1),
+            'overhead_pct': round(overhead / disabled['mean_us'] * 100, 2) if disabled['mean_us'] else 0.0,
+            'observe_us': observe_cost(),
+        }
+    write_results(results, args.output)
+
+
+if __name__ == '__main__':
+    main()
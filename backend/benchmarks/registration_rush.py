@@ -0,0 +1,248 @@
+"""
+آزمون بار روز اول انتخاب واحد.
+
+هزاران دانشجوی شبیه‌سازی‌شده هم‌زمان مسیر کامل را روی یک سرور در حال اجرا طی می‌کنند:
+ورود، نوبت صف انتظار (اگر فعال باشد)، دریافت فهرست دروس، انتخاب درس، حذف یک درس و انتخاب
+جایگزین، و نهایی کردن. علاقه‌ی دانشجویان به دروس یکنواخت نیست (توزیع Zipf با --skew) تا
+چند درس پرطرفدار زود پر شوند و رقابت روی آخرین صندلی‌ها شبیه روز واقعی باشد.
+
+    python manage.py seed_loadtest --students 2000 --reset
+    gunicorn core.wsgi:application -w 4 -b 127.0.0.1:8000
+    python -m benchmarks.registration_rush --manifest loadtest_manifest.json --concurrency 200 --output rush.json
+
+خروجی JSON شامل rps و p50/p95/p99 هر مرحله، تفکیک خطاها (کد وضعیت و پیام) و بررسی
+overbooking است: هیچ درسی نباید enrolled_count بیشتر از capacity داشته باشد و شمارنده‌ی هر درس
+باید با تعداد ثبت‌نام‌های موفقی که خود آزمون دیده برابر باشد.
+"""
+import argparse
+import json
+import random
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode, urlsplit
+
+from .common import BACKEND_DIR, http, obtain_token, summarize, write_results
+
+STEPS = ['login', 'waiting_room', 'catalog', 'select_course', 'delete_selection', 'finalize']
+SELECTIONS = '/api/selection/selections'
+WAITING_ROOM = '/api/selection/waiting-room'
+ADMISSION_POLL_INTERVAL = 0.5
+
+
+def error_message(body):
+    try:
+        data = json.loads(body)
+    except ValueError:
+        return body[:80].decode('utf-8', 'replace')
+    if isinstance(data, dict):
+        for key in ('errors', 'error', 'detail'):
+            if key in data:
+                value = data[key]
+                return str(value[0] if isinstance(value, list) and value else value)[:80]
+    return str(data)[:80]
+
+
+def fetch_catalog(get, prefix):
+    """دروس آزمون از همه‌ی صفحه‌های فهرست؛ get(path) باید (status, body) برگرداند"""
+    courses, path = [], '/api/courses/?page_size=1000'
+    while path:
+        status, body = get(path)
+        if status != 200:
+            return None
+        page = json.loads(body)
+        courses += [course for course in page['results'] if course['code'].startswith(prefix)]
+        path = urlsplit(page['next'])._replace(scheme='', netloc='').geturl() if page.get('next') else None
+    return sorted(courses, key=lambda course: course['code'])
+
+
+class Recorder:
+    """زمان و نتیجه‌ی هر مرحله و تعداد ثبت‌نام خالص هر درس (امن برای چند نخ)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = {step: [] for step in STEPS}
+        self.statuses = {step: [] for step in STEPS}
+        self.errors = {}
+        self.enrolled = {}
+
+    def record(self, step, started, status, body):
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self.latencies[step].append(elapsed)
+            self.statuses[step].append(status)
+            if not 200 <= status < 300:
+                key = f"{step} {status} {error_message(body)}"
+                self.errors[key] = self.errors.get(key, 0) + 1
+
+    def enroll(self, code, delta):
+        with self._lock:
+            self.enrolled[code] = self.enrolled.get(code, 0) + delta
+
+    def report(self, elapsed):
+        steps = {
+            step: summarize(self.latencies[step], self.statuses[step], elapsed)
+            for step in STEPS if self.statuses[step]
+        }
+        all_latencies = [value for step in STEPS for value in self.latencies[step]]
+        all_statuses = [value for step in STEPS for value in self.statuses[step]]
+        errors = dict(sorted(self.errors.items(), key=lambda item: -item[1]))
+        return {'overall': summarize(all_latencies, all_statuses, elapsed), 'steps': steps, 'errors': errors}
+
+
+class Student:
+    def __init__(self, base_url, username, password, recorder, rng, args):
+        self.base_url = base_url
+        self.username = username
+        self.password = password
+        self.recorder = recorder
+        self.rng = rng
+        self.args = args
+        self.token = None
+
+    def call(self, step, method, path, body=None):
+        started = time.perf_counter()
+        status, content = http(method, self.base_url + path, self.token, body, timeout=self.args.timeout)
+        self.recorder.record(step, started, status, content)
+        return status, content
+
+    def run(self, prefix):
+        status, body = self.call('login', 'POST', '/api/token/', {'username': self.username, 'password': self.password})
+        if status != 200:
+            return
+        self.token = json.loads(body)['access']
+        if not self.wait_for_admission():
+            return
+        catalog = fetch_catalog(lambda path: self.call('catalog', 'GET', path), prefix)
+        if not catalog:
+            return
+
+        wishlist = self.wishlist(catalog)
+        taken, slots = [], set()
+        while wishlist and len(taken) < self.args.picks:
+            self.select(wishlist.pop(0), taken, slots)
+        if taken and wishlist:
+            # تغییر نظر: حذف یکی از دروس و انتخاب درس بعدی لیست
+            dropped = taken.pop(self.rng.randrange(len(taken)))
+            query = urlencode({'course_code': dropped['code']})
+            status, _ = self.call('delete_selection', 'DELETE', f'{SELECTIONS}/delete-selection/?{query}')
+            if 200 <= status < 300:
+                self.recorder.enroll(dropped['code'], -1)
+                slots.discard((dropped['day'], dropped['start_time']))
+            else:
+                taken.append(dropped)
+            while wishlist and len(taken) < self.args.picks:
+                self.select(wishlist.pop(0), taken, slots)
+        if taken:
+            self.call('finalize', 'POST', f'{SELECTIONS}/finalize/')
+
+    def select(self, course, taken, slots):
+        slot = (course['day'], course['start_time'])
+        if slot in slots:
+            return
+        status, _ = self.call('select_course', 'POST', f'{SELECTIONS}/select-course/', {'course_code': course['code']})
+        if status == 201:
+            self.recorder.enroll(course['code'], 1)
+            taken.append(course)
+            slots.add(slot)
+
+    def wait_for_admission(self):
+        status, body = self.call('waiting_room', 'POST', f'{WAITING_ROOM}/join/')
+        deadline = time.monotonic() + self.args.admission_timeout
+        while status == 200 and json.loads(body).get('state') == 'waiting':
+            if time.monotonic() > deadline:
+                return False
+            time.sleep(ADMISSION_POLL_INTERVAL)
+            status, body = self.call('waiting_room', 'GET', f'{WAITING_ROOM}/status/')
+        return status == 200
+
+    def wishlist(self, catalog):
+        """ترتیب دروس مورد علاقه: نمونه‌گیری بدون جای‌گذاری با وزن Zipf بر اساس ترتیب کد درس"""
+        # همه‌ی دانشجویان دروس اول فهرست را پرطرفدارتر می‌دانند
+        keys = [self.rng.random() ** ((i + 1) ** self.args.skew) for i in range(len(catalog))]
+        order = sorted(range(len(catalog)), key=lambda i: -keys[i])
+        return [catalog[i] for i in order[:self.args.picks * 3]]
+
+
+def overbooking_check(base_url, manifest, recorder, timeout):
+    """مقایسه‌ی شمارنده‌ی سرور با ظرفیت و با ثبت‌نام‌های موفقی که آزمون دیده است"""
+    token = obtain_token(base_url, manifest['usernames'][0], manifest['password'])
+    courses = fetch_catalog(lambda path: http('GET', base_url + path, token, timeout=timeout), manifest['course_prefix'])
+    if courses is None:
+        return {'error': 'دریافت فهرست دروس ناموفق بود'}
+
+    overbooked = [
+        {'code': c['code'], 'enrolled_count': c['enrolled_count'], 'capacity': c['capacity']}
+        for c in courses if c['enrolled_count'] > c['capacity']
+    ]
+    mismatched = [
+        {'code': c['code'], 'enrolled_count': c['enrolled_count'], 'observed': recorder.enrolled.get(c['code'], 0)}
+        for c in courses if c['enrolled_count'] != recorder.enrolled.get(c['code'], 0)
+    ]
+    return {
+        'courses': len(courses),
+        'full_courses': sum(1 for c in courses if c['enrolled_count'] >= c['capacity']),
+        'seats_taken': sum(c['enrolled_count'] for c in courses),
+        'overbooked': overbooked,
+        'counter_mismatches': mismatched,
+        'ok': not overbooked and not mismatched,
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BACKEND_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--manifest', default='loadtest_manifest.json', help='خروجی دستور seed_loadtest')
+    parser.add_argument('--base-url', default='http://127.0.0.1:8000')
+    parser.add_argument('--students', type=int, help='تعداد دانشجوی شبیه‌سازی‌شده (پیش‌فرض: همه‌ی دانشجویان manifest)')
+    parser.add_argument('--concurrency', type=int, default=200)
+    parser.add_argument('--picks', type=int, help='تعداد درس هر دانشجو (پیش‌فرض از manifest)')
+    parser.add_argument('--skew', type=float, default=1.0, help='شدت تمرکز علاقه روی دروس پرطرفدار (0 یعنی یکنواخت)')
+    parser.add_argument('--admission-timeout', type=float, default=120, help='حداکثر انتظار در صف (ثانیه)')
+    parser.add_argument('--timeout', type=float, default=30, help='مهلت هر درخواست (ثانیه)')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output')
+    args = parser.parse_args()
+
+    with open(args.manifest, encoding='utf-8') as source:
+        manifest = json.load(source)
+    args.picks = args.picks or manifest['picks']
+    usernames = manifest['usernames'][:args.students] if args.students else manifest['usernames']
+    base_url = args.base_url.rstrip('/')
+
+    recorder = Recorder()
+    students = [
+        Student(base_url, username, manifest['password'], recorder, random.Random(f'{args.seed}-{username}'), args)
+        for username in usernames
+    ]
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        for future in [pool.submit(student.run, manifest['course_prefix']) for student in students]:
+            future.result()
+    elapsed = time.perf_counter() - started
+
+    results = {
+        'commit': git_commit(),
+        'started_at': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'students': len(students),
+        'concurrency': args.concurrency,
+        'picks': args.picks,
+        'skew': args.skew,
+        'elapsed_s': round(elapsed, 3),
+        'students_per_s': round(len(students) / elapsed, 1) if elapsed else 0.0,
+        **recorder.report(elapsed),
+        'overbooking': overbooking_check(base_url, manifest, recorder, args.timeout),
+    }
+    write_results(results, args.output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,16 @@
+import pytest
+
+from core.testing import reset_cache, test_settings
+
+
+@pytest.fixture(autouse=True, scope='session')
+def isolated_test_settings(django_test_environment):
+    """همان تنظیمات core.testing.TestRunner برای اجرای تست‌ها با pytest"""
+    with test_settings():
+        yield
+
+
+@pytest.fixture(autouse=True)
+def clear_cache_after_test():
+    yield
+    reset_cache()
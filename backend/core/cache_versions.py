@@ -0,0 +1,25 @@
+"""
+کلیدهای نسخه در کش مشترک برای هماهنگ نگه داشتن کش‌های داخل هر پروسه.
+
+هر پروسه داده‌ی کش‌شده‌اش را همراه با نسخه‌ای که هنگام بارگذاری خوانده نگه می‌دارد؛
+با تغییر داده، نسخه در کش مشترک عوض می‌شود و بقیه‌ی workerها در درخواست بعدی دوباره بارگذاری می‌کنند.
+"""
+import uuid
+
+from django.core.cache import cache
+from django.db import transaction
+
+
+def _key(name):
+    return f'version:{name}'
+
+
+def get_version(name):
+    # نبود کلید (کش تازه یا پاک‌شده) خودش نسخه‌ی جدیدی است تا داده‌ی قبلی پروسه‌ها کنار گذاشته شود
+    cache.add(_key(name), uuid.uuid4().hex, None)
+    return cache.get(_key(name))
+
+
+def bump_version(name):
+    """عوض کردن نسخه بعد از commit تا بقیه‌ی پروسه‌ها داده‌ی commit نشده را نخوانند"""
+    transaction.on_commit(lambda: cache.set(_key(name), uuid.uuid4().hex, None))
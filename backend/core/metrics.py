@@ -0,0 +1,354 @@
+"""
+زمان‌سنجی درخواست‌ها و متریک‌های Prometheus.
+
+MetricsMiddleware برای هر مسیر (نام URL) تعداد درخواست به تفکیک کد وضعیت، هیستوگرام زمان پاسخ،
+تعداد و زمان کوئری‌ها و حجم پاسخ را در حافظه‌ی همان پروسه جمع می‌کند و هدر Server-Timing
+(app و db) را به پاسخ اضافه می‌کند. کوئری‌ها با execute_wrapper روی هر اتصال شمرده می‌شوند و
+آمار درخواست در یک contextvar است، پس کوئری‌های ORM async (که در thread دیگری اجرا می‌شوند) هم حساب می‌شوند.
+
+یک thread پس‌زمینه در هر worker آمار را هر FLUSH_INTERVAL ثانیه (و هنگام خروج) در فایل خودش
+(metrics-<pid>-<نسل>.json) با جایگزینی اتمی می‌نویسد؛ درخواست‌ها هیچ‌وقت منتظر دیسک نمی‌مانند و
+نسل تصادفی هر پروسه نمی‌گذارد پروسه‌ای با pid تکراری فایل قبلی را بازنویسی کند. /metrics مجموع
+همه‌ی فایل‌ها را برمی‌گرداند و فایل workerهای متوقف‌شده را در retired.json جمع و حذف می‌کند، پس
+تعداد فایل‌ها رشد نمی‌کند و شمارنده‌ها عقب نمی‌روند. بررسی زنده بودن با pid است، پس پوشه نباید
+بین چند ماشین مشترک باشد.
+"""
+import atexit
+import bisect
+import contextvars
+import json
+import os
+import threading
+import time
+import uuid
+from pathlib import Path
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import HttpResponse
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+try:
+    import fcntl
+except ImportError:  # ویندوز: فایل workerهای متوقف‌شده جمع نمی‌شود و فقط جمع زده می‌شود
+    fcntl = None
+
+# مرزهای هیستوگرام زمان پاسخ (ثانیه)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+FILE_PREFIX = 'metrics-'
+RETIRED_FILE = 'retired.json'
+LOCK_FILE = '.lock'
+UNMATCHED_ROUTE = 'unmatched'
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+_request_stats = contextvars.ContextVar('metrics_request_stats', default=None)
+
+
+class QueryStats:
+    __slots__ = ('count', 'duration')
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+
+def _record_query(execute, sql, params, many, context):
+    stats = _request_stats.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.count += 1
+        stats.duration += time.perf_counter() - started
+
+
+def _install_wrapper(sender=None, connection=None, **kwargs):
+    if _record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_record_query)
+
+
+def install_query_wrapper():
+    """شمارش کوئری روی اتصال‌های باز همین thread و هر اتصالی که از این به بعد ساخته شود"""
+    connection_created.connect(_install_wrapper, dispatch_uid='core.metrics.query_wrapper')
+    for connection in connections.all(initialized_only=True):
+        _install_wrapper(connection=connection)
+
+
+def _new_series():
+    # شمارش هر بازه‌ی هیستوگرام (غیرتجمعی، آخرین خانه بیشتر از بزرگ‌ترین مرز) و مجموع‌ها
+    return {'buckets': [0] * (len(LATENCY_BUCKETS) + 1), 'count': 0, 'seconds': 0.0,
+            'queries': 0, 'db_seconds': 0.0, 'bytes': 0}
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        # بعد از fork هم فراخوانی می‌شود: پروسه‌ی فرزند آمار والد را دوباره گزارش نمی‌کند
+        self._lock = threading.Lock()
+        self.pid = os.getpid()
+        self.generation = uuid.uuid4().hex[:8]
+        self.requests = {}  # (route, method, status) -> تعداد
+        self.routes = {}  # (route, method) -> series
+        self._flusher = None
+
+    @property
+    def file_name(self):
+        return f'{FILE_PREFIX}{self.pid}-{self.generation}.json'
+
+    def observe(self, route, method, status, duration, queries, db_seconds, size):
+        with self._lock:
+            key = (route, method, status)
+            self.requests[key] = self.requests.get(key, 0) + 1
+            series = self.routes.get((route, method))
+            if series is None:
+                series = self.routes[(route, method)] = _new_series()
+            series['buckets'][bisect.bisect_left(LATENCY_BUCKETS, duration)] += 1
+            series['count'] += 1
+            series['seconds'] += duration
+            series['queries'] += queries
+            series['db_seconds'] += db_seconds
+            series['bytes'] += size
+
+    def snapshot(self):
+        with self._lock:
+            return _serialize(self.requests, self.routes)
+
+    def start_flusher(self, interval):
+        """thread نوشتن دوره‌ای این پروسه، یک بار بعد از اولین درخواست (threadها از fork رد نمی‌شوند)"""
+        if self._flusher is not None:
+            return
+        with self._lock:
+            if self._flusher is not None:
+                return
+            self._flusher = threading.Thread(
+                target=self._flush_periodically, args=(interval,), name='metrics-flush', daemon=True
+            )
+            self._flusher.start()
+        atexit.register(_flush_at_exit)
+
+    def _flush_periodically(self, interval):
+        while True:
+            time.sleep(interval)
+            try:
+                self.flush()
+            except OSError:
+                pass  # پوشه در دسترس نیست؛ دور بعد دوباره
+
+    def flush(self):
+        directory = metrics_dir()
+        directory.mkdir(parents=True, exist_ok=True)
+        _write_json(directory / self.file_name, self.snapshot())
+
+
+registry = MetricsRegistry()
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=registry.clear)
+
+
+def _flush_at_exit():
+    if settings.METRICS['ENABLED']:
+        try:
+            registry.flush()
+        except OSError:
+            pass
+
+
+def metrics_dir():
+    return Path(settings.METRICS['DIR'])
+
+
+def _write_json(path, data):
+    # نام موقت یکتا برای هر thread تا دو نوشتن هم‌زمان فایل هم را نیمه‌کاره نکنند
+    temp = path.with_name(f'{path.name}.{threading.get_ident()}.tmp')
+    temp.write_text(json.dumps(data, ensure_ascii=False), encoding='utf-8')
+    os.replace(temp, path)
+
+
+def _read_json(path):
+    try:
+        return json.loads(path.read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return None
+
+
+def _serialize(requests, routes):
+    return {
+        'requests': [[*key, count] for key, count in requests.items()],
+        'routes': [[*key, dict(series, buckets=list(series['buckets']))] for key, series in routes.items()],
+    }
+
+
+def _merge(snapshots):
+    requests, routes = {}, {}
+    for snapshot in snapshots:
+        for route, method, status, count in snapshot['requests']:
+            requests[(route, method, status)] = requests.get((route, method, status), 0) + count
+        for route, method, series in snapshot['routes']:
+            merged = routes.setdefault((route, method), _new_series())
+            merged['buckets'] = [a + b for a, b in zip(merged['buckets'], series['buckets'])]
+            for field in ('count', 'seconds', 'queries', 'db_seconds', 'bytes'):
+                merged[field] += series[field]
+    return requests, routes
+
+
+def _file_pid(path):
+    try:
+        return int(path.name[len(FILE_PREFIX):-len('.json')].split('-')[0])
+    except ValueError:
+        return None
+
+
+def _is_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def retire_dead_workers(directory):
+    """جمع کردن فایل workerهای متوقف‌شده در retired.json و حذف آن‌ها"""
+    if fcntl is None or not directory.is_dir():
+        return
+    with open(directory / LOCK_FILE, 'a') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        retired = _read_json(directory / RETIRED_FILE) or {'requests': [], 'routes': [], 'folded': []}
+        # فایل‌هایی که در دور قبل جمع شدند ولی حذفشان نیمه‌کاره ماند دوباره شمرده نمی‌شوند
+        for name in retired['folded']:
+            (directory / name).unlink(missing_ok=True)
+        dead = [
+            path for path in directory.glob(f'{FILE_PREFIX}*.json')
+            if (pid := _file_pid(path)) is not None and not _is_alive(pid)
+        ]
+        if not dead:
+            return
+        snapshots = [retired] + [snapshot for snapshot in map(_read_json, dead) if snapshot is not None]
+        _write_json(directory / RETIRED_FILE, {**_serialize(*_merge(snapshots)), 'folded': [path.name for path in dead]})
+        for path in dead:
+            path.unlink(missing_ok=True)
+
+
+def collect():
+    """مجموع آمار همه‌ی workerها؛ برای پروسه‌ی جاری آمار زنده به جای فایل خوانده می‌شود"""
+    directory = metrics_dir()
+    retire_dead_workers(directory)
+    snapshots = [registry.snapshot()]
+    paths = [*directory.glob(f'{FILE_PREFIX}*.json'), directory / RETIRED_FILE]
+    for path in paths:
+        if path.name != registry.file_name and (snapshot := _read_json(path)) is not None:
+            snapshots.append(snapshot)
+    return _merge(snapshots)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(**labels):
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + '}'
+
+
+def render_prometheus(requests, routes):
+    lines = [
+        '# HELP http_requests_total Total HTTP requests by route, method and status.',
+        '# TYPE http_requests_total counter',
+    ]
+    for (route, method, status), count in sorted(requests.items()):
+        lines.append(f'http_requests_total{_labels(route=route, method=method, status=status)} {count}')
+
+    lines += [
+        '# HELP http_request_duration_seconds Request latency by route and method.',
+        '# TYPE http_request_duration_seconds histogram',
+    ]
+    ordered = sorted(routes.items())
+    for (route, method), series in ordered:
+        cumulative = 0
+        for bound, count in zip(LATENCY_BUCKETS, series['buckets']):
+            cumulative += count
+            lines.append(f'http_request_duration_seconds_bucket{_labels(route=route, method=method, le=bound)} {cumulative}')
+        lines.append(f'http_request_duration_seconds_bucket{_labels(route=route, method=method, le="+Inf")} {series["count"]}')
+        lines.append(f'http_request_duration_seconds_sum{_labels(route=route, method=method)} {series["seconds"]:.6f}')
+        lines.append(f'http_request_duration_seconds_count{_labels(route=route, method=method)} {series["count"]}')
+
+    totals = [
+        ('http_request_db_queries_total', 'Database queries executed while serving requests.', 'queries', '{}'),
+        ('http_request_db_duration_seconds_total', 'Time spent in database queries.', 'db_seconds', '{:.6f}'),
+        ('http_response_size_bytes_total', 'Response body bytes (non-streaming responses).', 'bytes', '{}'),
+    ]
+    for name, help_text, field, number in totals:
+        lines += [f'# HELP {name} {help_text}', f'# TYPE {name} counter']
+        for (route, method), series in ordered:
+            lines.append(f'{name}{_labels(route=route, method=method)} {number.format(series[field])}')
+    return '\n'.join(lines) + '\n'
+
+
+class MetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        config = settings.METRICS
+        if not config['ENABLED']:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.server_timing = config['SERVER_TIMING']
+        self.flush_interval = config['FLUSH_INTERVAL']
+        install_query_wrapper()
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        stats = QueryStats()
+        token = _request_stats.set(stats)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _request_stats.reset(token)
+        return self.finish(request, response, time.perf_counter() - started, stats)
+
+    async def __acall__(self, request):
+        stats = QueryStats()
+        token = _request_stats.set(stats)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _request_stats.reset(token)
+        return self.finish(request, response, time.perf_counter() - started, stats)
+
+    def finish(self, request, response, duration, stats):
+        match = request.resolver_match
+        route = (match.view_name or match.route) if match else UNMATCHED_ROUTE
+        size = 0 if response.streaming else len(response.content)
+        registry.observe(route, request.method, str(response.status_code), duration, stats.count, stats.duration, size)
+        if self.server_timing:
+            response['Server-Timing'] = (
+                f'app;dur={duration * 1000:.2f}, db;dur={stats.duration * 1000:.2f};desc="{stats.count} queries"'
+            )
+        registry.start_flusher(self.flush_interval)
+        return response
+
+
+class MetricsView(APIView):
+    """متریک‌های همه‌ی workerها در قالب متنی Prometheus (فقط ادمین)"""
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        if request.user.role != 'admin':
+            return Response({"error": "فقط ادمین به متریک‌ها دسترسی دارد."}, status=403)
+        return HttpResponse(render_prometheus(*collect()), content_type=CONTENT_TYPE)
@@ -0,0 +1,199 @@
+"""
+صفحه‌بندی keyset (cursor) برای لیست‌ها.
+
+به‌جای OFFSET، هر صفحه از آخرین مقدار کلیدهای مرتب‌سازی صفحه‌ی قبل ادامه می‌دهد
+(`WHERE a >= x AND (a > x OR (a = x AND id > z))` که با ایندکس ترکیبی هم‌ترتیب به صورت بازه اجرا می‌شود)،
+پس زمان پاسخ با بزرگ شدن جدول ثابت می‌ماند و با درج ردیف‌های جدید، cursorها جابه‌جا نمی‌شوند.
+آخرین فیلد مرتب‌سازی باید یکتا باشد.
+
+page_queryset و set_page جدا هستند تا ویوهای async کوئری صفحه را با ORM async اجرا کنند.
+"""
+import base64
+import json
+from datetime import date, datetime, time
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import ParseError
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+def _encode_value(value):
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    return value
+
+
+def seek_condition(ordering, values):
+    """شرط «بعد از values» برای مرتب‌سازی چندفیلدی: (a > x) OR (a = x AND b < y) OR ..."""
+    names = [field.lstrip('-') for field in ordering]
+    condition = Q()
+    for index, field in enumerate(ordering):
+        lookup = 'lt' if field.startswith('-') else 'gt'
+        step = Q(**{f'{names[index]}__{lookup}': values[index]})
+        for prev_name, prev_value in zip(names[:index], values[:index]):
+            step &= Q(**{prev_name: prev_value})
+        condition |= step
+    # کران فیلد اول جدا تکرار می‌شود تا پایگاه داده از ایندکس به صورت بازه استفاده کند
+    bound = 'lte' if ordering[0].startswith('-') else 'gte'
+    return Q(**{f'{names[0]}__{bound}': values[0]}) & condition
+
+
+class KeysetPagination(BasePagination):
+    ordering = ('id',)
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    invalid_cursor_message = 'cursor نامعتبر است.'
+
+    def __init__(self):
+        self.page_size = settings.KEYSET_PAGINATION['PAGE_SIZE']
+        self.max_page_size = settings.KEYSET_PAGINATION['MAX_PAGE_SIZE']
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(max(size, 1), self.max_page_size)
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            data = json.loads(base64.urlsafe_b64decode(encoded.encode()).decode())
+            values, reverse = data['v'], bool(data['r'])
+        except (ValueError, KeyError, TypeError):
+            raise ParseError(self.invalid_cursor_message)
+        if not isinstance(values, list) or len(values) != len(self.ordering) or None in values:
+            raise ParseError(self.invalid_cursor_message)
+        return values, reverse
+
+    def coerce_cursor(self, model, values):
+        """تبدیل مقادیر cursor به نوع فیلدها؛ مقدار با نوع نادرست به ORM نمی‌رسد"""
+        try:
+            return [
+                model._meta.get_field(field.lstrip('-')).to_python(value)
+                for field, value in zip(self.ordering, values)
+            ]
+        except (ValidationError, FieldDoesNotExist, TypeError, ValueError):
+            raise ParseError(self.invalid_cursor_message)
+
+    def encode_cursor(self, instance, reverse):
+        values = [_encode_value(getattr(instance, field.lstrip('-'))) for field in self.ordering]
+        data = json.dumps({'v': values, 'r': int(reverse)}, separators=(',', ':'))
+        return base64.urlsafe_b64encode(data.encode()).decode()
+
+    def page_queryset(self, queryset, request):
+        """کوئری صفحه (یک ردیف بیشتر برای تشخیص صفحه‌ی بعد)، بدون اجرا"""
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        values, self.reverse = self.decode_cursor(request)
+        self.has_cursor = values is not None
+
+        ordering = self.ordering
+        if self.reverse:
+            ordering = tuple(field[1:] if field.startswith('-') else f'-{field}' for field in ordering)
+        queryset = queryset.order_by(*ordering)
+        if values is not None:
+            queryset = queryset.filter(seek_condition(ordering, self.coerce_cursor(queryset.model, values)))
+        return queryset[:self.page_size + 1]
+
+    def set_page(self, results):
+        """نتایج اجرای page_queryset؛ خروجی ردیف‌های صفحه به ترتیب اصلی"""
+        has_more = len(results) > self.page_size
+        results = list(results[:self.page_size])
+        if self.reverse:
+            results.reverse()
+            self.has_previous, self.has_next = has_more, self.has_cursor
+        else:
+            self.has_next, self.has_previous = has_more, self.has_cursor
+        self.page = results
+        return results
+
+    def paginate_queryset(self, queryset, request, view=None):
+        return self.set_page(list(self.page_queryset(queryset, request)))
+
+    def _link(self, instance, reverse):
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(instance, reverse))
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self._link(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.request.build_absolute_uri(), self.cursor_query_param)
+        return self._link(self.page[0], reverse=True)
+
+    def get_paginated_data(self, data):
+        return {
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        }
+
+    def get_paginated_response(self, data):
+        return Response(self.get_paginated_data(data))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {'name': self.cursor_query_param, 'required': False, 'in': 'query',
+             'schema': {'type': 'string'}, 'description': 'cursor صفحه'},
+            {'name': self.page_size_query_param, 'required': False, 'in': 'query',
+             'schema': {'type': 'integer'}, 'description': 'تعداد نتایج هر صفحه'},
+        ]
+
+
+class CodePagination(KeysetPagination):
+    ordering = ('code',)
+
+
+class NamePagination(KeysetPagination):
+    ordering = ('last_name', 'first_name', 'id')
+
+
+class LoginHistoryPagination(KeysetPagination):
+    ordering = ('-login_at', '-id')
+
+
+class IdPagination(KeysetPagination):
+    ordering = ('id',)
+
+
+class SearchResultsPagination(BasePagination):
+    """فقط بهترین page_size نتیجه‌ی جستجوی رتبه‌بندی‌شده، با همان قالب پاسخ keyset"""
+    page_size_query_param = 'page_size'
+    page_size = 20
+    max_page_size = 100
+
+    def paginate_queryset(self, queryset, request, view=None):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            size = self.page_size
+        return list(queryset[:min(max(size, 1), self.max_page_size)])
+
+    def get_paginated_response(self, data):
+        return Response({'next': None, 'previous': None, 'results': data})
+
+    def get_paginated_response_schema(self, schema):
+        return KeysetPagination.get_paginated_response_schema(self, schema)
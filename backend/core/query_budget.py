@@ -0,0 +1,69 @@
+"""
+بودجه‌ی کوئری اندپوینت‌ها.
+
+هر ویو یا action با @query_budget(n) کنار کد خودش اعلام می‌کند حداکثر چند کوئری اجرا می‌کند.
+QueryBudgetTestMixin اندپوینت را با دو اندازه‌ی داده (پیش‌فرض ۵ و ۵۰ ردیف مرتبط) فراخوانی می‌کند؛
+اگر تعداد کوئری با بزرگ شدن داده بیشتر شود (N+1) یا از بودجه‌ی اعلام‌شده بگذرد تست شکست می‌خورد.
+"""
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve
+from rest_framework.test import APIClient
+
+BUDGET_ATTRIBUTE = 'query_budget'
+
+
+def query_budget(max_queries):
+    """اعلام حداکثر تعداد کوئری یک action یا متد ویو"""
+    def decorator(func):
+        setattr(func, BUDGET_ATTRIBUTE, max_queries)
+        return func
+    return decorator
+
+
+def get_query_budget(path, method='get'):
+    """بودجه‌ی ویوی مسیر path برای متد HTTP داده‌شده، یا None اگر اعلام نشده باشد"""
+    match = resolve(path.split('?', 1)[0])
+    view_class = getattr(match.func, 'cls', None)
+    if view_class is None:
+        return getattr(match.func, BUDGET_ATTRIBUTE, None)
+    # ViewSet: نگاشت متد به نام action در خود تابع ویو نگه داشته می‌شود
+    handler = (getattr(match.func, 'actions', None) or {}).get(method.lower(), method.lower())
+    return getattr(getattr(view_class, handler, None), BUDGET_ATTRIBUTE, None)
+
+
+class QueryBudgetTestMixin:
+    """کمکی برای TestCase؛ assertQueryBudget برای هر اندپوینت یک بار فراخوانی می‌شود"""
+    budget_sizes = (5, 50)
+
+    def assertQueryBudget(self, path, populate, user, method='get', data=None, status_code=200):
+        """
+        populate(start, stop) ردیف‌های مرتبط با اندیس start تا stop را می‌سازد؛ برای هر اندازه
+        داده تا آن اندازه کامل و سپس درخواست یک بار برای گرم شدن کش‌ها و یک بار با شمارش کوئری اجرا می‌شود.
+        """
+        budget = get_query_budget(path, method)
+        self.assertIsNotNone(budget, f"برای {method.upper()} {path} بودجه‌ی کوئری (@query_budget) اعلام نشده است.")
+        client = APIClient()
+        client.force_authenticate(user)
+        counts, created = {}, 0
+        for size in self.budget_sizes:
+            populate(created, size)
+            created = size
+            getattr(client, method)(path, data, format='json')
+            with CaptureQueriesContext(connection) as queries:
+                response = getattr(client, method)(path, data, format='json')
+            self.assertEqual(response.status_code, status_code, getattr(response, 'data', None))
+            counts[size] = queries
+
+        smallest, largest = counts[self.budget_sizes[0]], counts[self.budget_sizes[-1]]
+        self.assertEqual(
+            len(smallest), len(largest),
+            f"{path}: تعداد کوئری با داده رشد می‌کند ({len(smallest)} ← {len(largest)}):\n"
+            + '\n'.join(query['sql'] for query in largest.captured_queries),
+        )
+        self.assertLessEqual(
+            len(largest), budget,
+            f"{path}: {len(largest)} کوئری، بیشتر از بودجه‌ی {budget}:\n"
+            + '\n'.join(query['sql'] for query in largest.captured_queries),
+        )
+        return len(largest)
@@ -58,6 +58,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.metrics.MetricsMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -92,13 +93,68 @@ WSGI_APPLICATION = 'core.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
 
-DATABASES = {
+# DB_ENGINE=postgresql برای استقرار اصلی؛ پیش‌فرض SQLite برای نصب تک‌سروره (حالت WAL)
+
+DB_ENGINE = config('DB_ENGINE', default='sqlite')
+
+if DB_ENGINE == 'postgresql':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': config('DB_NAME', default='course_registration'),
+            'USER': config('DB_USER', default='postgres'),
+            'PASSWORD': config('DB_PASSWORD', default=''),
+            'HOST': config('DB_HOST', default='127.0.0.1'),
+            'PORT': config('DB_PORT', default='5432'),
+            # اتصال پایدار: هر worker اتصالش را تا این مدت (ثانیه) نگه می‌دارد و قبل از استفاده سالم بودنش را می‌سنجد
+            'CONN_MAX_AGE': config('DB_CONN_MAX_AGE', default=60, cast=int),
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {
+                'connect_timeout': config('DB_CONNECT_TIMEOUT', default=5, cast=int),
+            },
+        }
+    }
+    # استخر اتصال داخلی جنگو (psycopg[pool] نسخه‌ی ۳ در requirements.txt)؛ با استخر CONN_MAX_AGE باید صفر باشد
+    if config('DB_POOL', default=False, cast=bool):
+        DATABASES['default']['CONN_MAX_AGE'] = 0
+        DATABASES['default']['OPTIONS']['pool'] = {
+            'min_size': config('DB_POOL_MIN_SIZE', default=2, cast=int),
+            'max_size': config('DB_POOL_MAX_SIZE', default=10, cast=int),
+            'timeout': config('DB_POOL_TIMEOUT', default=10, cast=int),
+        }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': config('DB_NAME', default=str(BASE_DIR / 'db.sqlite3')),
+            'OPTIONS': {
+                # WAL: خواندن‌ها پشت نوشتن نمی‌مانند؛ synchronous=NORMAL در WAL فقط در checkpoint همگام‌سازی می‌کند
+                'init_command': (
+                    f"PRAGMA journal_mode={config('DB_SQLITE_JOURNAL_MODE', default='WAL')};"
+                    f"PRAGMA synchronous={config('DB_SQLITE_SYNCHRONOUS', default='NORMAL')}"
+                ),
+                # قفل نوشتن از ابتدای تراکنش گرفته می‌شود تا ارتقای قفل خواندن به نوشتن «database is locked» ندهد
+                'transaction_mode': config('DB_SQLITE_TRANSACTION_MODE', default='IMMEDIATE') or None,
+                # مدت انتظار برای قفل نوشتن (ثانیه)
+                'timeout': config('DB_SQLITE_TIMEOUT', default=20, cast=float),
+            },
+        }
+    }
+
+
+# Cache
+# کش مشترک بین workerهای gunicorn (پیش‌فرض: فایل؛ در صورت نیاز با متغیر محیطی عوض شود)
+
+CACHES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.filebased.FileBasedCache'),
+        'LOCATION': config('CACHE_LOCATION', default=str(BASE_DIR / '.cache')),
     }
 }
 
+# تست‌ها با کش در حافظه و بدون متریک اجرا می‌شوند (core/testing.py)
+TEST_RUNNER = 'core.testing.TestRunner'
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -134,7 +190,7 @@ USE_TZ = True
 # DRF تنظیمات
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'users.authentication.ClaimsJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
@@ -142,14 +198,65 @@ REST_FRAMEWORK = {
    ## 'DEFAULT_SCHEMA_CLASS': 'drf_yasg.openapi.AutoSchema',
 }
 
+# نوشتن با تأخیر تاریخچه‌ی ورود (users/login_buffer.py)؛ ENABLED=False یعنی INSERT هم‌زمان
+LOGIN_HISTORY_BUFFER = {
+    'ENABLED': config('LOGIN_HISTORY_BUFFERED', default=False, cast=bool),
+    'MAX_SIZE': config('LOGIN_HISTORY_BUFFER_SIZE', default=500, cast=int),
+    'FLUSH_INTERVAL': config('LOGIN_HISTORY_FLUSH_INTERVAL', default=1.0, cast=float),
+}
+
+# نگه‌داری و بایگانی تاریخچه‌ی ورود (users/login_archive.py، دستور archive_login_history)
+LOGIN_HISTORY_ARCHIVE = {
+    'DIR': config('LOGIN_HISTORY_ARCHIVE_DIR', default=str(BASE_DIR / 'archive' / 'login_history')),
+    'RETENTION_DAYS': config('LOGIN_HISTORY_RETENTION_DAYS', default=90, cast=int),
+    'CHUNK_SIZE': config('LOGIN_HISTORY_ARCHIVE_CHUNK', default=5000, cast=int),
+}
+
+# ورود گروهی کاربران (users/bulk_import.py)؛ WORKERS=0 یعنی به تعداد هسته‌های CPU
+# BACKGROUND=False یعنی اجرای job ورود گروهی API در همان درخواست (فقط برای تست و توسعه)
+USER_IMPORT = {
+    'WORKERS': config('USER_IMPORT_WORKERS', default=0, cast=int),
+    'BATCH_SIZE': config('USER_IMPORT_BATCH_SIZE', default=1000, cast=int),
+    'DIR': config('USER_IMPORT_DIR', default=str(BASE_DIR / 'imports')),
+    'MAX_UPLOAD_SIZE': config('USER_IMPORT_MAX_UPLOAD_MB', default=20, cast=int) * 1024 * 1024,
+    'BACKGROUND': config('USER_IMPORT_BACKGROUND', default=True, cast=bool),
+}
+
+# صفحه‌بندی keyset لیست‌ها (core/pagination.py)؛ اندازه‌ی صفحه با ?page_size= قابل تغییر است
+KEYSET_PAGINATION = {
+    'PAGE_SIZE': config('PAGE_SIZE', default=100, cast=int),
+    'MAX_PAGE_SIZE': config('MAX_PAGE_SIZE', default=1000, cast=int),
+}
+
 
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(minutes=60),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=1),
 }
 
+# احراز هویت JWT بر اساس ادعاهای توکن (users/authentication.py)؛ مدت نگه‌داری نسخه‌ی توکن کاربر در کش مشترک (ثانیه)
+# کلید با هر تغییر کاربر پاک می‌شود؛ این مدت فقط سقف ماندگاری تغییرهایی است که از ORM نگذشته‌اند
+JWT_CLAIMS_AUTH = {
+    'VERSION_CACHE_TTL': config('JWT_VERSION_CACHE_TTL', default=3600, cast=int),
+}
+
+# زمان‌سنجی درخواست‌ها، هدر Server-Timing و متریک‌های /metrics (core/metrics.py)؛ در تست‌ها خاموش
+METRICS = {
+    'ENABLED': config('METRICS_ENABLED', default=True, cast=bool),
+    'DIR': config('METRICS_DIR', default=str(BASE_DIR / '.metrics')),
+    'FLUSH_INTERVAL': config('METRICS_FLUSH_INTERVAL', default=5.0, cast=float),  # ثانیه
+    'SERVER_TIMING': config('METRICS_SERVER_TIMING', default=True, cast=bool),
+}
+
 CORS_ALLOW_ALL_ORIGINS = True
 
+# صف انتظار انتخاب واحد (کنترل تعداد دانشجویان هم‌زمان هنگام شروع انتخاب واحد)
+WAITING_ROOM = {
+    'ENABLED': config('WAITING_ROOM_ENABLED', default=False, cast=bool),
+    'MAX_ACTIVE': config('WAITING_ROOM_MAX_ACTIVE', default=200, cast=int),
+    'TICKET_TTL': config('WAITING_ROOM_TICKET_TTL', default=600, cast=int),  # ثانیه
+}
+
 AUTH_USER_MODEL = 'users.User'
 
 
@@ -0,0 +1,40 @@
+"""
+تنظیمات اجرای تست‌ها، مشترک بین manage.py test (TEST_RUNNER) و pytest (conftest.py).
+
+تست‌ها داده‌ی پایگاه داده‌ی تست را نباید در کش مشترک سرور توسعه بگذارند و فایل متریک بنویسند.
+کش بعد از هر تست پاک می‌شود: در TestCase تراکنش commit نمی‌شود و کلیدهای نسخه (core/cache_versions.py)
+عوض نمی‌شوند، پس بدون آن داده‌ی کش‌شده‌ی ردیف‌های rollback‌شده به تست بعدی می‌رسد.
+"""
+from django.conf import settings
+from django.core.cache import caches
+from django.test.runner import DiscoverRunner
+from django.test.utils import iter_test_cases, override_settings
+
+
+def test_settings():
+    """کش در حافظه‌ی همین پروسه و متریک‌های خاموش"""
+    return override_settings(
+        CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+        METRICS={**settings.METRICS, 'ENABLED': False},
+    )
+
+
+def reset_cache():
+    caches['default'].clear()
+
+
+class TestRunner(DiscoverRunner):
+    def setup_test_environment(self, **kwargs):
+        self.test_settings = test_settings()
+        self.test_settings.enable()
+        super().setup_test_environment(**kwargs)
+
+    def teardown_test_environment(self, **kwargs):
+        super().teardown_test_environment(**kwargs)
+        self.test_settings.disable()
+
+    def build_suite(self, *args, **kwargs):
+        suite = super().build_suite(*args, **kwargs)
+        for test in iter_test_cases(suite):
+            test.addCleanup(reset_cache)
+        return suite
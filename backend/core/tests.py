@@ -0,0 +1,125 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.test import AsyncClient, SimpleTestCase, TestCase, override_settings
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from users.models import User
+from .metrics import FILE_PREFIX, RETIRED_FILE, collect, install_query_wrapper, registry
+from .pagination import seek_condition
+
+
+class TestSettingsTest(SimpleTestCase):
+    def test_tests_use_local_cache_without_metrics(self):
+        # manage.py test و pytest هر دو از core/testing.py می‌گذرند
+        self.assertIsInstance(caches['default'], LocMemCache)
+        self.assertFalse(settings.METRICS['ENABLED'])
+
+
+class SeekConditionTest(TestCase):
+    def test_rows_after_cursor_match_ordering(self):
+        for index, name in enumerate(['b', 'a', 'b', 'c', 'a', 'b']):
+            User.objects.create(username=f'u{index}', last_name=name)
+        for ordering in (('last_name', 'id'), ('-last_name', '-id'), ('-last_name', 'id')):
+            rows = list(User.objects.order_by(*ordering).values_list('last_name', 'id'))
+            for position, values in enumerate(rows):
+                after = User.objects.filter(seek_condition(ordering, list(values))).order_by(*ordering)
+                self.assertEqual(list(after.values_list('last_name', 'id')), rows[position + 1:], ordering)
+
+
+class MetricsTest(TestCase):
+    def setUp(self):
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tempdir.cleanup)
+        overrides = override_settings(METRICS={
+            'ENABLED': True, 'DIR': self.tempdir.name, 'FLUSH_INTERVAL': 3600, 'SERVER_TIMING': True,
+        })
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        registry.clear()
+        # اتصال تست قبل از بارگذاری middleware (در هندلر async، در thread دیگر) باز شده است
+        install_query_wrapper()
+        self.client = APIClient()
+        self.admin = User.objects.create(username='admin1', role='admin')
+        self.student = User.objects.create(username='stu1', role='student')
+
+    def test_records_route_queries_and_server_timing(self):
+        self.client.force_authenticate(self.student)
+        response = self.client.get('/api/courses/')
+        self.assertEqual(response.status_code, 200)
+        self.assertRegex(response['Server-Timing'], r'^app;dur=[\d.]+, db;dur=[\d.]+;desc="1 queries"$')
+
+        requests, routes = collect()
+        self.assertEqual(requests[('course-list', 'GET', '200')], 1)
+        series = routes[('course-list', 'GET')]
+        self.assertEqual((series['count'], series['queries']), (1, 1))
+        self.assertEqual(series['bytes'], len(response.content))
+        self.assertEqual(sum(series['buckets']), 1)
+
+    async def test_async_views_count_queries_run_in_threads(self):
+        response = await AsyncClient().get(
+            '/api/async/courses/', headers={'Authorization': f'Bearer {AccessToken.for_user(self.student)}'}
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertIn('app;dur=', response['Server-Timing'])
+        _, routes = collect()
+        self.assertGreaterEqual(routes[('async-course-catalog', 'GET')]['queries'], 1)
+
+    def test_metrics_endpoint_is_admin_only_and_merges_workers(self):
+        self.client.force_authenticate(self.student)
+        self.client.get('/api/courses/')
+        self.assertEqual(self.client.get('/metrics').status_code, 403)
+
+        # آمار worker دیگری که در فایل خودش نوشته شده
+        other = {
+            'requests': [['course-list', 'GET', '200', 4]],
+            'routes': [['course-list', 'GET', {'buckets': [4] + [0] * 11, 'count': 4, 'seconds': 0.01,
+                                                'queries': 4, 'db_seconds': 0.002, 'bytes': 100}]],
+        }
+        with open(f'{self.tempdir.name}/{FILE_PREFIX}999999.json', 'w', encoding='utf-8') as out:
+            json.dump(other, out)
+
+        self.client.force_authenticate(self.admin)
+        response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+        text = response.content.decode()
+        self.assertIn('http_requests_total{route="course-list",method="GET",status="200"} 5', text)
+        self.assertIn('http_requests_total{route="metrics",method="GET",status="403"} 1', text)
+        self.assertIn('http_request_duration_seconds_count{route="course-list",method="GET"} 5', text)
+        self.assertIn('http_request_duration_seconds_bucket{route="course-list",method="GET",le="+Inf"} 5', text)
+        self.assertIn('http_request_db_queries_total{route="course-list",method="GET"} 5', text)
+
+    def test_flush_writes_own_file_atomically(self):
+        self.client.force_authenticate(self.student)
+        self.client.get('/api/courses/')
+        registry.flush()
+        files = list(Path(self.tempdir.name).iterdir())
+        self.assertEqual([path.name.startswith(FILE_PREFIX) and path.suffix == '.json' for path in files], [True])
+        self.assertEqual(json.loads(files[0].read_text())['requests'], [['course-list', 'GET', '200', 1]])
+
+    def test_request_path_does_not_write_files(self):
+        self.client.force_authenticate(self.student)
+        self.client.get('/api/courses/')
+        self.assertEqual(list(Path(self.tempdir.name).iterdir()), [])
+
+    def test_dead_worker_files_are_folded_and_totals_stay(self):
+        dead_pid = subprocess.run([sys.executable, '-c', 'import os; print(os.getpid())'],
+                                  capture_output=True, text=True).stdout.strip()
+        snapshot = {'requests': [['course-list', 'GET', '200', 3]], 'routes': []}
+        for name in (f'{FILE_PREFIX}{dead_pid}-aaaa.json', f'{FILE_PREFIX}{os.getppid()}-bbbb.json'):
+            Path(self.tempdir.name, name).write_text(json.dumps(snapshot))
+
+        for _ in range(2):
+            requests, _ = collect()
+            self.assertEqual(requests[('course-list', 'GET', '200')], 6)
+        names = {path.name for path in Path(self.tempdir.name).glob('*.json')}
+        self.assertEqual(names, {RETIRED_FILE, f'{FILE_PREFIX}{os.getppid()}-bbbb.json'})
@@ -5,6 +5,7 @@ from django.urls import path, include
 from rest_framework import permissions
 from rest_framework_simplejwt.views import TokenRefreshView
 from users.auth import LoginHistoryTokenObtainPairView
+from core.metrics import MetricsView
 
 schema_view = get_schema_view(
     openapi.Info(
@@ -30,4 +31,7 @@ urlpatterns = [
     path('api/users/', include('users.urls')),
     path('api/selection/', include('selection.urls')),
     path('swagger/', schema_view.with_ui('swagger', cache_timeout=0), name='schema-swagger-ui'),
+
+    # متریک‌های Prometheus (فقط ادمین)
+    path('metrics', MetricsView.as_view(), name='metrics'),
 ]
\ No newline at end of file
@@ -0,0 +1,33 @@
+"""نسخه‌ی async کاتالوگ دروس برای اجرا زیر سرور ASGI"""
+from django.http import JsonResponse
+from django.views.decorators.http import require_GET
+from rest_framework.exceptions import ParseError
+from rest_framework.request import Request
+
+from core.pagination import CodePagination
+from users.async_auth import async_jwt_required
+from .models import Course
+from .serializers import CourseSerializer
+
+JSON_PARAMS = {'ensure_ascii': False}
+
+
+@require_GET
+@async_jwt_required
+async def course_catalog(request):
+    """کاتالوگ با همان صفحه‌بندی keyset نسخه‌ی sync (?cursor=&page_size=، فیلتر اختیاری term)"""
+    courses = Course.objects.select_related('professor', 'term')
+    term_id = request.GET.get('term')
+    if term_id:
+        if not term_id.isdigit():
+            return JsonResponse({"errors": ["term باید شناسه‌ی عددی نیم‌سال باشد."]}, status=400,
+                                json_dumps_params=JSON_PARAMS)
+        courses = courses.filter(term_id=int(term_id))
+    paginator = CodePagination()
+    try:
+        page = paginator.page_queryset(courses, Request(request))
+    except ParseError as e:
+        return JsonResponse({"detail": str(e.detail)}, status=400, json_dumps_params=JSON_PARAMS)
+    results = paginator.set_page([course async for course in page])
+    data = CourseSerializer(results, many=True).data
+    return JsonResponse(paginator.get_paginated_data(data), json_dumps_params=JSON_PARAMS)
@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from courses.models import Course
+
+
+class Command(BaseCommand):
+    help = "هم‌خوان کردن شمارنده‌ی seats_taken دروس با تعداد واقعی انتخاب‌ها"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='فقط گزارش بده، چیزی را تغییر نده')
+
+    def handle(self, *args, **options):
+        drifted = list(
+            Course.objects.annotate(actual=Count('selections'))
+            .exclude(seats_taken=F('actual'))
+            .values_list('pk', 'code', 'seats_taken', 'actual')
+        )
+        if not drifted:
+            self.stdout.write(self.style.SUCCESS("همه‌ی شمارنده‌ها درست هستند."))
+            return
+
+        for _, code, stored, actual in drifted:
+            self.stdout.write(f"{code}: ذخیره‌شده={stored} واقعی={actual}")
+
+        if options['dry_run']:
+            self.stdout.write(f"{len(drifted)} درس نیاز به اصلاح دارد (dry-run).")
+            return
+
+        # شمارش و به‌روزرسانی در یک دستور انجام می‌شود تا با انتخاب‌های هم‌زمان تداخل نکند
+        actual_count = (
+            Course.objects.filter(pk=OuterRef('pk'))
+            .annotate(total=Count('selections'))
+            .values('total')
+        )
+        with transaction.atomic():
+            fixed = Course.objects.filter(pk__in=[row[0] for row in drifted]).update(
+                seats_taken=Coalesce(Subquery(actual_count), 0)
+            )
+        self.stdout.write(self.style.SUCCESS(f"{fixed} درس اصلاح شد."))
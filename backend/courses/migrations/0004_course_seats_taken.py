@@ -0,0 +1,30 @@
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def fill_seats_taken(apps, schema_editor):
+    Course = apps.get_model('courses', 'Course')
+    counts = (
+        Course.objects.filter(pk=OuterRef('pk'))
+        .annotate(total=Count('selections'))
+        .values('total')
+    )
+    Course.objects.update(seats_taken=Coalesce(Subquery(counts), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0003_alter_course_term'),
+        ('selection', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='course',
+            name='seats_taken',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='تعداد ثبت‌نام‌شده'),
+        ),
+        migrations.RunPython(fill_seats_taken, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,56 @@
+import math
+
+from django.db import migrations, models
+
+# نسخه‌ی ثابت courses/timeslots.py در زمان این migration؛ تغییرات بعدی آن نباید این داده را عوض کند
+DAYS = ['شنبه', 'یکشنبه', 'دوشنبه', 'سه\u200cشنبه', 'چهارشنبه', 'پنجشنبه', 'جمعه']
+SLOT_MINUTES = 5
+SLOTS_PER_DAY = 24 * 60 // SLOT_MINUTES
+
+
+def normalize_day(day):
+    return (day or '').replace('ي', 'ی').replace('ك', 'ک').replace('\u200c', '').replace(' ', '').strip()
+
+
+DAY_INDEX = {normalize_day(day): index for index, day in enumerate(DAYS)}
+
+
+def _minutes(value):
+    return value.hour * 60 + value.minute + value.second / 60
+
+
+def compute_time_mask(day, start_time, end_time):
+    index = DAY_INDEX.get(normalize_day(day))
+    if index is None or not start_time or not end_time or end_time <= start_time:
+        return 0
+    first = int(_minutes(start_time) // SLOT_MINUTES)
+    last = min(math.ceil(_minutes(end_time) / SLOT_MINUTES), SLOTS_PER_DAY)
+    return ((1 << (last - first)) - 1) << (index * SLOTS_PER_DAY + first)
+
+
+def encode_mask(mask):
+    return format(mask, 'x') if mask else ''
+
+
+def fill_time_mask(apps, schema_editor):
+    Course = apps.get_model('courses', 'Course')
+    courses = list(Course.objects.all())
+    for course in courses:
+        course.time_mask = encode_mask(compute_time_mask(course.day, course.start_time, course.end_time))
+    Course.objects.bulk_update(courses, ['time_mask'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0004_course_seats_taken'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='course',
+            name='time_mask',
+            field=models.CharField(blank=True, default='', editable=False, max_length=512, verbose_name='ماسک زمانی'),
+        ),
+        migrations.RunPython(fill_time_mask, migrations.RunPython.noop),
+    ]
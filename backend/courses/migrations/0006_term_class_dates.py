@@ -0,0 +1,23 @@
+# Generated by Django 5.2.8 on 2026-10-18 20:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0005_course_time_mask'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='term',
+            name='end_date',
+            field=models.DateField(blank=True, null=True, verbose_name='پایان کلاس\u200cها'),
+        ),
+        migrations.AddField(
+            model_name='term',
+            name='start_date',
+            field=models.DateField(blank=True, null=True, verbose_name='شروع کلاس\u200cها'),
+        ),
+    ]
@@ -0,0 +1,100 @@
+# Generated by Django 5.2.8 on 2026-10-18 20:09
+
+import re
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+FTS_TABLE = 'courses_course_fts'
+DOCUMENT_TABLE = 'courses_coursesearchdocument'
+
+# نسخه‌ی ثابت نرمال‌سازی courses/search.py در زمان این migration
+CHAR_MAP = str.maketrans({
+    'ي': 'ی', 'ى': 'ی', 'ك': 'ک', 'ة': 'ه', 'ۀ': 'ه', 'أ': 'ا', 'إ': 'ا', 'ٱ': 'ا',
+    '\u200c': None, '\u200d': None, '\u200e': None, '\u200f': None, '\u0640': None,
+    **{chr(0x06F0 + d): str(d) for d in range(10)},
+    **{chr(0x0660 + d): str(d) for d in range(10)},
+})
+DIACRITICS = re.compile('[\u064b-\u065f\u0670]')
+SPACES = re.compile(r'\s+')
+
+
+def normalize_text(text):
+    text = DIACRITICS.sub('', (text or '').translate(CHAR_MAP))
+    return SPACES.sub(' ', text).strip().lower()
+
+SQLITE_FORWARD = [
+    f"""CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(
+        document, content='{DOCUMENT_TABLE}', content_rowid='course_id',
+        tokenize='unicode61 remove_diacritics 2'
+    )""",
+    f"""CREATE TRIGGER {FTS_TABLE}_ai AFTER INSERT ON {DOCUMENT_TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, document) VALUES (new.course_id, new.document);
+    END""",
+    f"""CREATE TRIGGER {FTS_TABLE}_ad AFTER DELETE ON {DOCUMENT_TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, document) VALUES ('delete', old.course_id, old.document);
+    END""",
+    f"""CREATE TRIGGER {FTS_TABLE}_au AFTER UPDATE ON {DOCUMENT_TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, document) VALUES ('delete', old.course_id, old.document);
+        INSERT INTO {FTS_TABLE}(rowid, document) VALUES (new.course_id, new.document);
+    END""",
+]
+SQLITE_BACKWARD = [
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_au",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ad",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ai",
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+]
+POSTGRES_FORWARD = [
+    f"CREATE INDEX courses_search_document_gin ON {DOCUMENT_TABLE} USING GIN (to_tsvector('simple', document))",
+]
+POSTGRES_BACKWARD = ["DROP INDEX IF EXISTS courses_search_document_gin"]
+
+
+def _run(schema_editor, statements):
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        _run(schema_editor, SQLITE_FORWARD)
+    elif vendor == 'postgresql':
+        _run(schema_editor, POSTGRES_FORWARD)
+
+    Course = apps.get_model('courses', 'Course')
+    CourseSearchDocument = apps.get_model('courses', 'CourseSearchDocument')
+    documents = []
+    for course in Course.objects.select_related('professor'):
+        parts = [course.name, course.code]
+        if course.professor is not None:
+            parts += [course.professor.first_name, course.professor.last_name]
+        documents.append(CourseSearchDocument(course=course, document=normalize_text(' '.join(p for p in parts if p))))
+    CourseSearchDocument.objects.bulk_create(documents, batch_size=500)
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        _run(schema_editor, SQLITE_BACKWARD)
+    elif vendor == 'postgresql':
+        _run(schema_editor, POSTGRES_BACKWARD)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0006_term_class_dates'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CourseSearchDocument',
+            fields=[
+                ('course', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='search_document', serialize=False, to='courses.course')),
+                ('document', models.TextField(verbose_name='متن جستجو')),
+            ],
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
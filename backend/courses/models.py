@@ -1,12 +1,16 @@
 from django.db import models
 from users.models import User
 from django.core.validators import MinValueValidator
+from .timeslots import compute_time_mask, decode_mask, encode_mask
 
 class Term(models.Model):
     name = models.CharField("نام نیم‌سال", max_length=100, unique=True, help_text="مثل نیم‌سال اول ۱۴۰۴")
     start_selection = models.DateTimeField("شروع انتخاب واحد")
     end_selection = models.DateTimeField("پایان انتخاب واحد")
     is_active = models.BooleanField("فعال", default=False)
+    # بازه‌ی برگزاری کلاس‌ها؛ برای تکرار هفتگی رویدادهای تقویم (iCalendar)
+    start_date = models.DateField("شروع کلاس‌ها", null=True, blank=True)
+    end_date = models.DateField("پایان کلاس‌ها", null=True, blank=True)
 
     def __str__(self):
         return self.name
@@ -27,14 +31,82 @@ class Course(models.Model):
     end_time = models.TimeField("ساعت پایان", null=True, blank=True)
     location = models.CharField("محل برگزاری", max_length=100, blank=True)
     term = models.ForeignKey(Term, on_delete=models.CASCADE, related_name='courses', null=True, blank=True)
+    # شمارنده‌ی صندلی‌های پرشده؛ فقط از طریق SelectionRepository به‌صورت اتمیک تغییر می‌کند
+    seats_taken = models.PositiveIntegerField("تعداد ثبت‌نام‌شده", default=0, editable=False)
+    # ماسک بیتی بازه‌های اشغال‌شده در هفته (hex)؛ از روی day/start_time/end_time در save محاسبه می‌شود
+    time_mask = models.CharField("ماسک زمانی", max_length=512, blank=True, default='', editable=False)
+
+    # فیلدهایی که مقدار خوانده‌شده‌شان برای تشخیص تغییر در سیگنال‌ها نگه داشته می‌شود
+    TRACKED_FIELDS = ('code', 'name', 'units', 'term_id', 'professor_id')
+
+    def save(self, *args, **kwargs):
+        self.time_mask = encode_mask(compute_time_mask(self.day, self.start_time, self.end_time))
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'day', 'start_time', 'end_time'} & set(update_fields):
+            kwargs['update_fields'] = {*update_fields, 'time_mask'}
+        super().save(*args, **kwargs)
+        # بعد از اجرای همه‌ی گیرنده‌های post_save
+        self._remember_loaded()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._remember_loaded()
+        return instance
+
+    def _remember_loaded(self):
+        # فیلدهای deferred بارگذاری نشده‌اند و تغییرشان تشخیص داده نمی‌شود
+        self._loaded = {field: self.__dict__[field] for field in self.TRACKED_FIELDS if field in self.__dict__}
+
+    def loaded_value(self, field):
+        return getattr(self, '_loaded', {}).get(field)
+
+    def has_changed(self, field):
+        loaded = getattr(self, '_loaded', {})
+        return field in loaded and loaded[field] != getattr(self, field)
+
+    def may_have_changed(self, field):
+        """مثل has_changed، ولی وقتی مقدار قبلی در دست نیست (نمونه‌ی ساخته‌شده با pk یا فیلد deferred) True"""
+        loaded = getattr(self, '_loaded', {})
+        return field not in loaded or loaded[field] != getattr(self, field)
+
+    @property
+    def code_changed(self):
+        return self.has_changed('code')
+
+    @property
+    def name_changed(self):
+        return self.has_changed('name')
+
+    @property
+    def time_mask_bits(self):
+        return decode_mask(self.time_mask)
 
     @property
     def enrolled_count(self):
-        return self.selections.count()
+        # از شمارنده‌ی نگه‌داری‌شده خوانده می‌شود؛ reconcile_seats آن را با تعداد واقعی هم‌خوان می‌کند
+        return self.seats_taken
+
+    @property
+    def remaining_seats(self):
+        return max(self.capacity - self.seats_taken, 0)
+
+    @property
+    def has_free_seat(self):
+        return self.seats_taken < self.capacity
 
     def __str__(self):
         return f"{self.code} - {self.name}"
 
+class CourseSearchDocument(models.Model):
+    """متن نرمال‌شده‌ی قابل جستجوی هر درس (نام، کد، نام استاد)؛ ایندکس متنی روی این جدول است (courses/search.py)"""
+    course = models.OneToOneField(Course, on_delete=models.CASCADE, primary_key=True, related_name='search_document')
+    document = models.TextField("متن جستجو")
+
+    def __str__(self):
+        return self.document
+
+
 class Prerequisite(models.Model):
 
     course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='prerequisites')
@@ -0,0 +1,64 @@
+"""
+کش داخل پروسه برای حد واحد و بازه‌ی انتخاب واحد نیم‌سال‌ها.
+
+این مقادیر چند بار در هر نیم‌سال عوض می‌شوند ولی در هر درخواست انتخاب واحد لازم‌اند؛
+با سیگنال‌های post_save/post_delete و کلید نسخه‌ی مشترک، همه‌ی workerها هماهنگ می‌مانند.
+"""
+import threading
+import time
+
+from django.utils import timezone
+
+from core.cache_versions import get_version, bump_version
+from .models import Term, UnitLimit
+
+VERSION_NAME = 'selection-policy'
+# سقف عمر داده‌ی کش‌شده حتی اگر تغییر نسخه از دست برود (ثانیه)
+MAX_AGE = 300
+
+_lock = threading.Lock()
+_snapshot = None
+
+
+class SelectionPolicy:
+    def __init__(self, version):
+        self.version = version
+        self.loaded_at = time.monotonic()
+        limit = UnitLimit.objects.first()
+        self.min_units = limit.min_units if limit else 12
+        self.max_units = limit.max_units if limit else 20
+        self.terms = {
+            term_id: (is_active, start, end)
+            for term_id, is_active, start, end in
+            Term.objects.values_list('id', 'is_active', 'start_selection', 'end_selection')
+        }
+
+    @property
+    def unit_limit(self):
+        return UnitLimit(min_units=self.min_units, max_units=self.max_units)
+
+    def is_selection_open(self, term_id, now=None):
+        """نیم‌سال فعال است و زمان فعلی در بازه‌ی start_selection تا end_selection است"""
+        term = self.terms.get(term_id)
+        if term is None:
+            return False
+        is_active, start, end = term
+        now = now or timezone.now()
+        return is_active and start <= now <= end
+
+
+def get_policy():
+    global _snapshot
+    version = get_version(VERSION_NAME)
+    snapshot = _snapshot
+    if snapshot is None or snapshot.version != version or time.monotonic() - snapshot.loaded_at > MAX_AGE:
+        with _lock:
+            snapshot = _snapshot = SelectionPolicy(version)
+    return snapshot
+
+
+def invalidate_policy():
+    global _snapshot
+    # همین پروسه فوراً دوباره می‌خواند، بقیه بعد از commit با تغییر نسخه
+    _snapshot = None
+    bump_version(VERSION_NAME)
@@ -0,0 +1,120 @@
+"""
+گراف پیش‌نیازی دروس در حافظه.
+
+همه‌ی یال‌های Prerequisite با یک کوئری بارگذاری می‌شوند و پرسش‌هایی مثل «این درس در مجموع
+چه پیش‌نیازهایی دارد» یا «پاس کردن این درس چه دروسی را باز می‌کند» بدون کوئری پاسخ داده می‌شوند.
+مثل policy، نسخه‌ی کش‌شده در هر پروسه با کلید نسخه‌ی مشترک هماهنگ می‌ماند.
+"""
+import threading
+import time
+from collections import defaultdict
+
+from core.cache_versions import get_version, bump_version
+from .models import Prerequisite
+
+VERSION_NAME = 'prerequisite-graph'
+# سقف عمر داده‌ی کش‌شده حتی اگر تغییر نسخه از دست برود (ثانیه)
+MAX_AGE = 300
+
+_lock = threading.Lock()
+_snapshot = None
+
+
+class PrerequisiteGraph:
+    def __init__(self, version=None, exclude_edge=None):
+        self.version = version
+        self.loaded_at = time.monotonic()
+        # درس -> پیش‌نیازهای مستقیم / پیش‌نیاز -> دروسی که مستقیماً به آن نیاز دارند
+        self.requires = defaultdict(set)
+        self.unlocks = defaultdict(set)
+        # شناسه‌ی درس -> (کد، نام)
+        self.labels = {}
+        rows = Prerequisite.objects.values_list(
+            'id', 'course_id', 'course__code', 'course__name',
+            'prerequisite_id', 'prerequisite__code', 'prerequisite__name',
+        )
+        for edge_id, course_id, course_code, course_name, prereq_id, prereq_code, prereq_name in rows:
+            if edge_id == exclude_edge:
+                continue
+            self.requires[course_id].add(prereq_id)
+            self.unlocks[prereq_id].add(course_id)
+            self.labels[course_id] = (course_code, course_name)
+            self.labels[prereq_id] = (prereq_code, prereq_name)
+        self._closures = {'requires': {}, 'unlocks': {}}
+        self._levels = None
+
+    def _closure(self, direction, course_id):
+        cache = self._closures[direction]
+        if course_id not in cache:
+            edges = getattr(self, direction)
+            seen, stack = set(), list(edges.get(course_id, ()))
+            while stack:
+                node = stack.pop()
+                if node not in seen:
+                    seen.add(node)
+                    stack.extend(edges.get(node, ()))
+            cache[course_id] = frozenset(seen)
+        return cache[course_id]
+
+    def direct_requirements(self, course_id):
+        return self.requires.get(course_id, set())
+
+    def all_requirements(self, course_id):
+        """همه‌ی پیش‌نیازهای مستقیم و غیرمستقیم درس"""
+        return self._closure('requires', course_id)
+
+    def all_unlocks(self, course_id):
+        """همه‌ی دروسی که مستقیم یا غیرمستقیم به این درس نیاز دارند"""
+        return self._closure('unlocks', course_id)
+
+    def creates_cycle(self, course_id, prerequisite_id):
+        """آیا افزودن «course نیازمند prerequisite» دور ایجاد می‌کند"""
+        return course_id == prerequisite_id or course_id in self.all_requirements(prerequisite_id)
+
+    def levels(self):
+        """
+        سطح توپولوژیک هر درس: دروس بدون پیش‌نیاز سطح ۰ و هر درس یکی بیشتر از
+        بالاترین سطح پیش‌نیازهایش. دروسی که در دور قرار دارند (داده‌ی قدیمی) سطح ندارند.
+        """
+        if self._levels is None:
+            nodes = set(self.requires) | set(self.unlocks)
+            pending = {node: len(self.requires.get(node, ())) for node in nodes}
+            levels = {}
+            frontier = [node for node, count in pending.items() if count == 0]
+            level = 0
+            while frontier:
+                next_frontier = []
+                for node in frontier:
+                    levels[node] = level
+                    for dependent in self.unlocks.get(node, ()):
+                        pending[dependent] -= 1
+                        if pending[dependent] == 0:
+                            next_frontier.append(dependent)
+                frontier, level = next_frontier, level + 1
+            self._levels = levels
+        return self._levels
+
+    def cyclic_courses(self):
+        return {node for node in set(self.requires) | set(self.unlocks) if node not in self.levels()}
+
+    def describe(self, course_ids):
+        """لیست {code, name} مرتب‌شده بر اساس کد"""
+        items = (self.labels[course_id] for course_id in course_ids if course_id in self.labels)
+        return [{"code": code, "name": name} for code, name in sorted(items)]
+
+
+def get_prerequisite_graph():
+    global _snapshot
+    version = get_version(VERSION_NAME)
+    snapshot = _snapshot
+    if snapshot is None or snapshot.version != version or time.monotonic() - snapshot.loaded_at > MAX_AGE:
+        with _lock:
+            snapshot = _snapshot = PrerequisiteGraph(version)
+    return snapshot
+
+
+def invalidate_prerequisite_graph():
+    global _snapshot
+    # همین پروسه فوراً دوباره می‌خواند، بقیه بعد از commit با تغییر نسخه
+    _snapshot = None
+    bump_version(VERSION_NAME)
@@ -0,0 +1,51 @@
+"""
+خروجی آماده‌ی «دروس دارای پیش‌نیاز» که همه‌ی کلاینت‌های دانشجو می‌خوانند.
+
+خروجی با یک کوئری ساخته و همراه با ETag در کش مشترک نگه‌داری می‌شود. کلید شامل نسخه‌ی
+گراف پیش‌نیازهاست که با تغییر Prerequisite یا کد درس عوض می‌شود، پس خروجی قدیمی هرگز خوانده نمی‌شود.
+"""
+import hashlib
+import json
+from itertools import groupby
+from operator import itemgetter
+
+from django.core.cache import cache
+
+from core.cache_versions import bump_version, get_version
+from .models import Prerequisite
+from .prerequisite_graph import VERSION_NAME
+
+PAYLOAD_CACHE_KEY = 'courses-with-prerequisites'
+
+
+def _cache_key():
+    return f'{PAYLOAD_CACHE_KEY}:{get_version(VERSION_NAME)}'
+
+
+def build_prerequisites_payload():
+    rows = (
+        Prerequisite.objects.order_by('course__code', 'prerequisite__code')
+        .values_list('course__code', 'prerequisite__code')
+    )
+    data = [
+        {"course_code": course_code, "prerequisite_codes": [prereq for _, prereq in group]}
+        for course_code, group in groupby(rows, key=itemgetter(0))
+    ]
+    digest = hashlib.sha1(json.dumps(data, ensure_ascii=False).encode()).hexdigest()
+    return {"etag": f'"{digest}"', "data": data}
+
+
+def get_prerequisites_payload():
+    key = _cache_key()
+    payload = cache.get(key)
+    if payload is None:
+        payload = build_prerequisites_payload()
+        cache.set(key, payload, None)
+    return payload
+
+
+def invalidate_prerequisites_payload():
+    # همین تراکنش فوراً دوباره می‌سازد؛ بعد از commit نسخه عوض می‌شود تا خروجی ساخته‌شده
+    # از داده‌ی commit نشده با کلید قبلی بماند و دیگر خوانده نشود
+    cache.delete(_cache_key())
+    bump_version(VERSION_NAME)
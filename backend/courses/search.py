@@ -0,0 +1,121 @@
+"""
+جستجوی متنی دروس با پشتیبانی از نگارش فارسی.
+
+برای هر درس یک سند نرمال‌شده (نام، کد و نام استاد) در CourseSearchDocument نگه‌داری می‌شود؛
+ی/ک عربی به فارسی، نیم‌فاصله حذف، اعراب حذف و ارقام فارسی/عربی لاتین می‌شوند. روی SQLite
+جدول FTS5 و روی PostgreSQL ایندکس GIN متن کامل روی همین سند ساخته می‌شود و هر کلمه‌ی جستجو
+به صورت پیشوندی تطبیق داده می‌شود. تطبیق و امتیاز (bm25 / ts_rank) داخل همان کوئری queryset
+فیلترشده اعمال می‌شوند، پس فیلترهای دیگر (نیم‌سال، استاد و ...) قبل از محدود شدن نتایج حساب می‌شوند.
+"""
+import re
+
+from django.db import connection
+from django.db.models import OuterRef, Subquery
+from django.db.models.expressions import RawSQL
+from rest_framework.filters import BaseFilterBackend
+
+from .models import Course, CourseSearchDocument
+
+FTS_TABLE = 'courses_course_fts'
+
+_CHAR_MAP = str.maketrans({
+    'ي': 'ی', 'ى': 'ی', 'ك': 'ک', 'ة': 'ه', 'ۀ': 'ه', 'أ': 'ا', 'إ': 'ا', 'ٱ': 'ا',
+    # نیم‌فاصله، اتصال‌دهنده‌ها، نشانه‌های جهت و کشیده حذف می‌شوند
+    '\u200c': None, '\u200d': None, '\u200e': None, '\u200f': None, '\u0640': None,
+    **{chr(0x06F0 + d): str(d) for d in range(10)},
+    **{chr(0x0660 + d): str(d) for d in range(10)},
+})
+_DIACRITICS = re.compile('[\u064b-\u065f\u0670]')
+_SPACES = re.compile(r'\s+')
+_TOKEN_JUNK = re.compile(r'[^\w-]+')
+_TOKEN_SEPARATORS = re.compile(r'[-_]+')
+
+
+def normalize_text(text):
+    text = _DIACRITICS.sub('', (text or '').translate(_CHAR_MAP))
+    return _SPACES.sub(' ', text).strip().lower()
+
+
+def query_tokens(query):
+    tokens = (_TOKEN_JUNK.sub('', token) for token in normalize_text(query).split(' '))
+    return [token for token in tokens if token.strip('-_')]
+
+
+def tsquery(tokens):
+    """عبارت to_tsquery پیشوندی؛ اجزای هر کلمه‌ی خط‌تیره‌دار (cs-101) پشت سر هم (<->) تطبیق داده می‌شوند"""
+    terms = []
+    for token in tokens:
+        # خط‌تیره‌ی ابتدا، انتها یا تکراری نباید عملگر <-> بدون عملوند بسازد
+        parts = [part for part in _TOKEN_SEPARATORS.split(token) if part]
+        if parts:
+            terms.append(' <-> '.join(parts) + ':*')
+    return ' & '.join(terms)
+
+
+def build_document(course):
+    professor = course.professor
+    parts = [course.name, course.code]
+    if professor is not None:
+        parts += [professor.first_name, professor.last_name]
+    return normalize_text(' '.join(part for part in parts if part))
+
+
+def index_course(course):
+    CourseSearchDocument.objects.update_or_create(course=course, defaults={'document': build_document(course)})
+
+
+def index_courses(courses):
+    """بازسازی سند گروهی از دروس (مثلاً همه‌ی دروس یک استاد بعد از تغییر نامش)"""
+    for course in courses:
+        index_course(course)
+
+
+def search_courses(queryset, query):
+    """دروس queryset که همه‌ی کلمات (به صورت پیشوندی) در سندشان هست، به ترتیب امتیاز"""
+    tokens = query_tokens(query)
+    if not tokens:
+        return queryset
+    vendor = connection.vendor
+    if vendor == 'sqlite':
+        match = ' '.join(f'"{token}"*' for token in tokens)
+        matched = RawSQL(f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', [match])
+        # bm25 فقط داخل یک کوئری MATCH معنا دارد؛ برای هر درسِ باقی‌مانده بعد از فیلترها
+        rank = RawSQL(
+            f'SELECT bm25({FTS_TABLE}) FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s '
+            f'AND rowid = "{Course._meta.db_table}"."id"', [match],
+        )
+        return queryset.filter(pk__in=matched).annotate(search_rank=rank).order_by('search_rank', 'pk')
+    if vendor == 'postgresql':
+        expression = tsquery(tokens)
+        vector = "to_tsvector('simple', document)"
+        condition = RawSQL(f"{vector} @@ to_tsquery('simple', %s)", [expression])
+        documents = CourseSearchDocument.objects.alias(matched=condition).filter(matched=True)
+        rank = Subquery(
+            documents.filter(course=OuterRef('pk'))
+            .annotate(rank=RawSQL(f"ts_rank({vector}, to_tsquery('simple', %s))", [expression]))
+            .values('rank')[:1]
+        )
+        return (
+            queryset.filter(pk__in=documents.values('course_id'))
+            .annotate(search_rank=rank).order_by('-search_rank', 'pk')
+        )
+    # سایر پایگاه‌های داده: تطبیق ساده روی سند نرمال‌شده
+    documents = CourseSearchDocument.objects.all()
+    for token in tokens:
+        documents = documents.filter(document__contains=token)
+    return queryset.filter(pk__in=documents.values('course_id')).order_by('pk')
+
+
+class CourseSearchFilter(BaseFilterBackend):
+    """جایگزین SearchFilter برای دروس: جستجو در ایندکس متنی و مرتب‌سازی بر اساس امتیاز"""
+    search_param = 'search'
+
+    def filter_queryset(self, request, queryset, view):
+        return search_courses(queryset, request.query_params.get(self.search_param, ''))
+
+    def get_schema_operation_parameters(self, view):
+        return [{
+            'name': self.search_param, 'required': False, 'in': 'query',
+            'schema': {'type': 'string'}, 'description': 'جستجو در نام، کد و نام استاد درس',
+        }]
+
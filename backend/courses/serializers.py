@@ -1,12 +1,13 @@
 from rest_framework import serializers
 from .models import Course, Prerequisite, UnitLimit, Term
+from .prerequisite_graph import PrerequisiteGraph
 from users.models import User
 
 
 class TermSerializer(serializers.ModelSerializer):
     class Meta:
         model = Term
-        fields = ['id', 'name', 'start_selection', 'end_selection', 'is_active']
+        fields = ['id', 'name', 'start_selection', 'end_selection', 'is_active', 'start_date', 'end_date']
 
 
 class CourseSerializer(serializers.ModelSerializer):
@@ -21,13 +22,16 @@ class CourseSerializer(serializers.ModelSerializer):
         help_text='شماره پرسنلی استاد'
     )
     professor_number = serializers.SerializerMethodField()
+    enrolled_count = serializers.IntegerField(read_only=True)
+    remaining_seats = serializers.IntegerField(read_only=True)
 
     def get_professor_number(self, obj):
         return obj.professor.username if obj.professor else None
 
     class Meta:
         model = Course
-        fields = '__all__'
+        # ستون‌های داخلی؛ ظرفیت از طریق enrolled_count و remaining_seats در پاسخ هست
+        exclude = ['seats_taken', 'time_mask']
         extra_kwargs = {'professor': {'read_only': True}}
 
     def validate_code(self, value):
@@ -56,8 +60,16 @@ class PrerequisiteSerializer(serializers.ModelSerializer):
         fields = ['id', 'course', 'prerequisite', 'course_code', 'prerequisite_code']
 
     def validate(self, data):
-        if data['course'] == data['prerequisite']:
+        course = data.get('course', getattr(self.instance, 'course', None))
+        prerequisite = data.get('prerequisite', getattr(self.instance, 'prerequisite', None))
+        if course == prerequisite:
             raise serializers.ValidationError("درس نمی‌تواند پیش‌نیاز خودش باشد")
+        # گراف تازه از پایگاه داده (بدون یال فعلی در حالت ویرایش) تا دور غیرمستقیم هم رد شود
+        graph = PrerequisiteGraph(exclude_edge=getattr(self.instance, 'pk', None))
+        if graph.creates_cycle(course.pk, prerequisite.pk):
+            raise serializers.ValidationError(
+                f"درس {prerequisite.code} خودش مستقیم یا غیرمستقیم به {course.code} نیاز دارد؛ پیش‌نیاز دوری مجاز نیست."
+            )
         return data
 
 
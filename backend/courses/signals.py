@@ -0,0 +1,45 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Course, Prerequisite, Term, UnitLimit
+from .policy import invalidate_policy
+from .prerequisite_graph import invalidate_prerequisite_graph
+from .prerequisites import invalidate_prerequisites_payload
+from .search import index_course, index_courses
+from users.models import User
+
+# فیلدهای درس که در سند جستجو هستند (نام استاد با سیگنال User به‌روز می‌شود)
+SEARCH_FIELDS = ('code', 'name', 'professor_id')
+
+
+@receiver([post_save, post_delete], sender=Term)
+@receiver([post_save, post_delete], sender=UnitLimit)
+def invalidate_selection_policy(sender, **kwargs):
+    invalidate_policy()
+
+
+@receiver([post_save, post_delete], sender=Prerequisite)
+def invalidate_prerequisites_on_change(sender, **kwargs):
+    invalidate_prerequisites_payload()
+    invalidate_prerequisite_graph()
+
+
+@receiver(post_save, sender=Course)
+def invalidate_prerequisites_on_course_change(sender, instance, created, **kwargs):
+    if not created and instance.code_changed:
+        invalidate_prerequisites_payload()
+    if not created and (instance.code_changed or instance.name_changed):
+        invalidate_prerequisite_graph()
+
+
+@receiver(post_save, sender=Course)
+def update_search_document(sender, instance, created, **kwargs):
+    # ذخیره‌هایی مثل تغییر ظرفیت یا seats_taken سند را عوض نمی‌کنند
+    if created or any(instance.may_have_changed(field) for field in SEARCH_FIELDS):
+        index_course(instance)
+
+
+@receiver(post_save, sender=User)
+def update_professor_courses_search(sender, instance, created, **kwargs):
+    if not created and instance.role == 'professor':
+        index_courses(instance.courses.select_related('professor'))
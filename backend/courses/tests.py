@@ -1,3 +1,244 @@
-from django.test import TestCase
+from datetime import time, timedelta
 
-# Create your tests here.
+from django.core.cache import cache
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from core.query_budget import QueryBudgetTestMixin
+from users.models import User
+from .models import Course, Prerequisite, Term, UnitLimit
+from .policy import get_policy
+from .search import index_courses, query_tokens, tsquery
+from .timeslots import compute_time_mask
+
+
+class TimeMaskTest(SimpleTestCase):
+    def test_overlap_on_same_day(self):
+        a = compute_time_mask('شنبه', time(8), time(10))
+        b = compute_time_mask('شنبه', time(9, 30), time(11))
+        self.assertTrue(a & b)
+
+    def test_back_to_back_and_other_days_do_not_overlap(self):
+        a = compute_time_mask('شنبه', time(8), time(10))
+        self.assertFalse(a & compute_time_mask('شنبه', time(10), time(12)))
+        self.assertFalse(a & compute_time_mask('یکشنبه', time(8), time(10)))
+
+    def test_day_spelling_variants_are_normalized(self):
+        self.assertEqual(
+            compute_time_mask('سه‌شنبه', time(8), time(10)),
+            compute_time_mask('سه شنبه', time(8), time(10)),
+        )
+
+    def test_missing_time_or_unknown_day_is_empty(self):
+        self.assertEqual(compute_time_mask('شنبه', None, time(10)), 0)
+        self.assertEqual(compute_time_mask('نامعلوم', time(8), time(10)), 0)
+
+
+class SelectionPolicyTest(TestCase):
+    def setUp(self):
+        now = timezone.now()
+        self.term = Term.objects.create(
+            name='ترم', start_selection=now - timedelta(days=1), end_selection=now + timedelta(days=1), is_active=True
+        )
+        self.limit = UnitLimit.objects.create(min_units=10, max_units=18)
+
+    def test_cached_policy_needs_no_queries(self):
+        get_policy()
+        with self.assertNumQueries(0):
+            policy = get_policy()
+            self.assertTrue(policy.is_selection_open(self.term.id))
+            self.assertEqual(policy.unit_limit.max_units, 18)
+
+    def test_save_invalidates(self):
+        get_policy()
+        self.limit.max_units = 24
+        self.limit.save()
+        self.assertEqual(get_policy().unit_limit.max_units, 24)
+
+    def test_selection_window_is_enforced(self):
+        self.term.end_selection = timezone.now() - timedelta(minutes=1)
+        self.term.save()
+        self.assertFalse(get_policy().is_selection_open(self.term.id))
+
+
+class CourseCatalogQueryTest(QueryBudgetTestMixin, TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create(username='stu', role='student'))
+        self.term = Term.objects.create(name='ترم', start_selection=timezone.now(), end_selection=timezone.now())
+
+    def _make_courses(self, count, offset=0):
+        for i in range(offset, offset + count):
+            professor = User.objects.create(username=f'prof{i}', role='professor', first_name='استاد', last_name=str(i))
+            Course.objects.create(code=f'C{i:03}', name=f'درس {i}', professor=professor, term=self.term, capacity=10)
+
+    def _list_queries(self):
+        with self.assertNumQueries(1):
+            return self.client.get('/api/courses/?page_size=100')
+
+    def test_list_is_constant_queries_with_seat_fields(self):
+        self._make_courses(3)
+        self._list_queries()
+        self._make_courses(30, offset=3)
+        Course.objects.filter(code='C000').update(seats_taken=4)
+        rows = self._list_queries().data['results']
+        self.assertEqual(len(rows), 33)
+        self.assertEqual((rows[0]['enrolled_count'], rows[0]['remaining_seats']), (4, 6))
+        self.assertEqual(rows[0]['professor_number'], 'prof0')
+        self.assertFalse({'seats_taken', 'time_mask'} & rows[0].keys())
+
+    def test_list_query_budget(self):
+        student = User.objects.get(username='stu')
+        self.assertQueryBudget('/api/courses/?page_size=100', lambda start, stop: self._make_courses(stop - start, start), student)
+
+
+class CoursesWithPrerequisitesTest(TestCase):
+    url = '/api/courses-with-prerequisites/'
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create(username='stu', role='student'))
+        term = Term.objects.create(name='ترم', start_selection=timezone.now(), end_selection=timezone.now())
+        professor = User.objects.create(username='prof', role='professor')
+        self.a, self.b, self.c = (
+            Course.objects.create(code=code, name=code, professor=professor, term=term, capacity=10)
+            for code in ('A1', 'B1', 'C1')
+        )
+        Prerequisite.objects.create(course=self.c, prerequisite=self.b)
+        Prerequisite.objects.create(course=self.c, prerequisite=self.a)
+
+    def test_payload_cached_and_revalidated_with_etag(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.data, [{"course_code": "C1", "prerequisite_codes": ["A1", "B1"]}])
+        with self.assertNumQueries(0):
+            cached = self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(cached.status_code, 304)
+
+    def test_invalidated_on_prerequisite_and_code_change(self):
+        etag = self.client.get(self.url)['ETag']
+        Prerequisite.objects.create(course=self.b, prerequisite=self.a)
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), 2)
+
+        course = Course.objects.get(pk=self.a.pk)
+        course.code = 'A2'
+        course.save()
+        data = self.client.get(self.url).data
+        self.assertEqual(data[0], {"course_code": "B1", "prerequisite_codes": ["A2"]})
+
+    def test_key_follows_graph_version_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Prerequisite.objects.create(course=self.b, prerequisite=self.a)
+            # در همان تراکنش، قبل از commit ساخته و زیر کلید نسخه‌ی قبلی کش می‌شود
+            self.client.get(self.url)
+        # بعد از commit نسخه عوض شده و آن کلید دیگر خوانده نمی‌شود
+        with self.assertNumQueries(1):
+            self.assertEqual(len(self.client.get(self.url).data), 2)
+        with self.assertNumQueries(0):
+            self.client.get(self.url)
+
+
+class PrerequisiteGraphTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create(username='admin', role='admin'))
+        term = Term.objects.create(name='ترم', start_selection=timezone.now(), end_selection=timezone.now())
+        professor = User.objects.create(username='prof', role='professor')
+        # A <- B <- C و A <- D : C به B و B به A نیاز دارد
+        self.courses = {
+            code: Course.objects.create(code=code, name=f'درس {code}', professor=professor, term=term, capacity=10)
+            for code in 'ABCD'
+        }
+        for course, prereq in (('B', 'A'), ('C', 'B'), ('D', 'A')):
+            Prerequisite.objects.create(course=self.courses[course], prerequisite=self.courses[prereq])
+
+    def test_indirect_cycle_rejected(self):
+        response = self.client.post('/api/prerequisites/', {'course_code': 'A', 'prerequisite_code': 'C'})
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Prerequisite.objects.filter(course=self.courses['A']).exists())
+
+        edge = Prerequisite.objects.get(course=self.courses['D'])
+        response = self.client.put(f'/api/prerequisites/{edge.pk}/', {'course_code': 'D', 'prerequisite_code': 'C'})
+        self.assertEqual(response.status_code, 200)
+
+    def test_closures_and_levels(self):
+        data = self.client.get('/api/courses/C/requirements/').data
+        self.assertEqual([c['code'] for c in data['direct']], ['B'])
+        self.assertEqual([c['code'] for c in data['all']], ['A', 'B'])
+        data = self.client.get('/api/courses/A/unlocks/').data
+        self.assertEqual([c['code'] for c in data['all']], ['B', 'C', 'D'])
+
+        with self.assertNumQueries(0):
+            data = self.client.get('/api/courses/prerequisite-levels/').data
+        levels = {row['level']: [c['code'] for c in row['courses']] for row in data['levels']}
+        self.assertEqual(levels, {0: ['A'], 1: ['B', 'D'], 2: ['C']})
+        self.assertEqual(data['cyclic'], [])
+
+
+class CourseSearchTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create(username='stu', role='student'))
+        term = Term.objects.create(name='ترم', start_selection=timezone.now(), end_selection=timezone.now())
+        self.professor = User.objects.create(username='prof', role='professor', first_name='علي', last_name='كريمي')
+        for code, name in (('CS101', 'برنامه\u200cنویسی پیشرفته'), ('CS102', 'برنامه سازی'), ('MA101', 'ریاضی ۱')):
+            Course.objects.create(code=code, name=name, professor=self.professor, term=term)
+
+    def _search(self, query):
+        response = self.client.get('/api/courses/', {'search': query})
+        return [row['code'] for row in response.data['results']]
+
+    def test_persian_normalization_and_prefix(self):
+        self.assertEqual(self._search('برنامهنویسی'), ['CS101'])
+        self.assertEqual(sorted(self._search('برنا')), ['CS101', 'CS102'])
+        self.assertEqual(sorted(self._search('علی کریم')), ['CS101', 'CS102', 'MA101'])
+        self.assertEqual(self._search('ریاضی 1'), ['MA101'])
+        self.assertEqual(self._search('cs10 سازی'), ['CS102'])
+        self.assertEqual(self._search('"*'), ['CS101', 'CS102', 'MA101'])
+
+    def test_dash_edged_queries(self):
+        self.assertEqual(tsquery(query_tokens('-cs cs--101 ma- cs-101')), 'cs:* & cs <-> 101:* & ma:* & cs <-> 101:*')
+        for query in ('-cs', 'cs--101', 'cs101-'):
+            response = self.client.get('/api/courses/', {'search': query})
+            self.assertEqual(response.status_code, 200, query)
+
+    def test_index_follows_course_and_professor_changes(self):
+        course = Course.objects.get(code='MA101')
+        course.name = 'آمار'
+        course.save()
+        self.assertEqual(self._search('آمار'), ['MA101'])
+        self.assertEqual(self._search('ریاضی'), [])
+
+        self.professor.last_name = 'محمدی'
+        self.professor.save()
+        self.assertEqual(len(self._search('محمدی')), 3)
+        course.delete()
+        self.assertEqual(self._search('آمار'), [])
+
+    def test_filters_apply_before_ranking(self):
+        other = User.objects.create(username='prof2', role='professor')
+        term = Term.objects.get()
+        # تعداد زیادی درس منطبق از استاد اول، فقط یکی از استاد دوم
+        broad = Course.objects.bulk_create(
+            Course(code=f'B{i:03}', name='برنامه سازی', professor=self.professor, term=term) for i in range(250)
+        )
+        index_courses(Course.objects.filter(pk__in=[course.pk for course in broad]).select_related('professor'))
+        Course.objects.create(code='Z999', name='برنامه سازی', professor=other, term=term)
+        response = self.client.get('/api/courses/', {'search': 'برنامه', 'professor': other.pk})
+        self.assertEqual([row['code'] for row in response.data['results']], ['Z999'])
+
+    def test_saves_without_indexed_changes_skip_reindex(self):
+        course = Course.objects.get(code='MA101')
+        course.capacity = 50
+        with CaptureQueriesContext(connection) as queries:
+            course.save()
+        self.assertFalse(any('coursesearchdocument' in query['sql'] for query in queries.captured_queries))
+        course.name = 'آمار'
+        with CaptureQueriesContext(connection) as queries:
+            course.save()
+        self.assertTrue(any('coursesearchdocument' in query['sql'] for query in queries.captured_queries))
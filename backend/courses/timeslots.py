@@ -0,0 +1,53 @@
+"""
+نمایش بیتی برنامه‌ی هفتگی دروس.
+
+هفته به ۷ روز × بازه‌های ۵ دقیقه‌ای تقسیم می‌شود و هر درس یک عدد صحیح دارد که بیت‌های
+بازه‌های اشغال‌شده‌اش روشن است. برنامه‌ی دانشجو OR ماسک دروس اوست و تداخل زمانی
+با یک AND بیتی مشخص می‌شود.
+"""
+import math
+
+DAYS = ['شنبه', 'یکشنبه', 'دوشنبه', 'سه‌شنبه', 'چهارشنبه', 'پنجشنبه', 'جمعه']
+SLOT_MINUTES = 5
+SLOTS_PER_DAY = 24 * 60 // SLOT_MINUTES
+
+
+def normalize_day(day):
+    """یکسان‌سازی نام روز (ی/ک عربی، نیم‌فاصله و فاصله)"""
+    return (day or '').replace('ي', 'ی').replace('ك', 'ک').replace('\u200c', '').replace(' ', '').strip()
+
+
+_DAY_INDEX = {normalize_day(day): index for index, day in enumerate(DAYS)}
+
+
+def day_index(day):
+    return _DAY_INDEX.get(normalize_day(day))
+
+
+def _minutes(value):
+    return value.hour * 60 + value.minute + value.second / 60
+
+
+def compute_time_mask(day, start_time, end_time):
+    """ماسک بیتی بازه‌های اشغال‌شده؛ برای روز نامعتبر یا ساعت ناقص صفر است"""
+    index = day_index(day)
+    if index is None or not start_time or not end_time or end_time <= start_time:
+        return 0
+    first = int(_minutes(start_time) // SLOT_MINUTES)
+    last = min(math.ceil(_minutes(end_time) / SLOT_MINUTES), SLOTS_PER_DAY)
+    return ((1 << (last - first)) - 1) << (index * SLOTS_PER_DAY + first)
+
+
+def encode_mask(mask):
+    return format(mask, 'x') if mask else ''
+
+
+def decode_mask(value):
+    return int(value, 16) if value else 0
+
+
+def combine_masks(masks):
+    combined = 0
+    for mask in masks:
+        combined |= mask
+    return combined
@@ -8,6 +8,7 @@ from .views import (
     TermViewSet,
     CoursesWithPrerequisitesAPIView,
 )
+from . import async_views
 
 router = DefaultRouter()
 router.register(r'courses', CourseViewSet, basename='course')
@@ -21,4 +22,5 @@ urlpatterns = router.urls
 urlpatterns += [
     path('unit-limit/', UnitLimitAPIView.as_view(), name='unit-limit'),
     path('courses-with-prerequisites/', CoursesWithPrerequisitesAPIView.as_view(), name='courses-with-prerequisites'),
+    path('async/courses/', async_views.course_catalog, name='async-course-catalog'),
 ]
\ No newline at end of file
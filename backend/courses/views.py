@@ -1,4 +1,4 @@
-from rest_framework import viewsets, status, permissions, filters
+from rest_framework import viewsets, status, permissions
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.decorators import action
@@ -7,6 +7,11 @@ from users.models import User
 from .serializers import CourseSerializer, PrerequisiteSerializer, UnitLimitSerializer, ProfessorSerializer, TermSerializer
 from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated
+from core.pagination import CodePagination, IdPagination, NamePagination, SearchResultsPagination
+from core.query_budget import query_budget
+from .prerequisite_graph import get_prerequisite_graph
+from .prerequisites import get_prerequisites_payload
+from .search import CourseSearchFilter, query_tokens
 
 
 class IsAdminUser(permissions.BasePermission):
@@ -14,27 +19,76 @@ class IsAdminUser(permissions.BasePermission):
         return request.user.is_authenticated and getattr(request.user, 'role', None) == 'admin'
 
 class CourseViewSet(viewsets.ModelViewSet):
-    queryset = Course.objects.all().order_by('code')
+    # استاد و نیم‌سال با یک join؛ ظرفیت باقی‌مانده از شمارنده‌ی seats_taken بدون COUNT
+    queryset = Course.objects.select_related('professor', 'term').order_by('code')
     serializer_class = CourseSerializer
+    pagination_class = CodePagination
     lookup_field = 'code'
     lookup_url_kwarg = 'code'
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter]
-    search_fields = ['name', 'professor__first_name', 'professor__last_name', 'code']
+    # جستجو از ایندکس متنی نرمال‌شده (courses/search.py) به ترتیب امتیاز
+    filter_backends = [DjangoFilterBackend, CourseSearchFilter]
     filterset_fields = ['professor', 'day']
 
+    @property
+    def paginator(self):
+        # نتایج جستجو بر اساس امتیاز مرتب‌اند و صفحه‌بندی keyset روی code ترتیبشان را به هم می‌زند
+        if not hasattr(self, '_paginator'):
+            searching = bool(query_tokens(self.request.query_params.get(CourseSearchFilter.search_param, '')))
+            self._paginator = SearchResultsPagination() if searching else self.pagination_class()
+        return self._paginator
+
     def get_permissions(self):
-        if self.action in ['list', 'retrieve']:
+        if self.action in ['list', 'retrieve', 'requirements', 'unlocks', 'prerequisite_levels']:
             return [permissions.IsAuthenticated()]
         return [IsAdminUser()]
 
+    @query_budget(1)
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
     def destroy(self, request, *args, **kwargs):
         instance = self.get_object()
         instance.delete()
         return Response({"detail": "درس با موفقیت حذف شد"})
 
+    @action(detail=True, methods=['get'])
+    def requirements(self, request, code=None):
+        """پیش‌نیازهای مستقیم و کل پیش‌نیازهای (بازگشتی) درس"""
+        course = self.get_object()
+        graph = get_prerequisite_graph()
+        return Response({
+            "course": course.code,
+            "direct": graph.describe(graph.direct_requirements(course.pk)),
+            "all": graph.describe(graph.all_requirements(course.pk)),
+        })
+
+    @action(detail=True, methods=['get'])
+    def unlocks(self, request, code=None):
+        """دروسی که پاس کردن این درس (مستقیم یا غیرمستقیم) پیش‌نیازشان را تأمین می‌کند"""
+        course = self.get_object()
+        graph = get_prerequisite_graph()
+        return Response({
+            "course": course.code,
+            "direct": graph.describe(graph.unlocks.get(course.pk, ())),
+            "all": graph.describe(graph.all_unlocks(course.pk)),
+        })
+
+    @action(detail=False, methods=['get'], url_path='prerequisite-levels')
+    def prerequisite_levels(self, request):
+        """سطح‌بندی توپولوژیک دروس دارای رابطه‌ی پیش‌نیازی"""
+        graph = get_prerequisite_graph()
+        grouped = {}
+        for course_id, level in graph.levels().items():
+            grouped.setdefault(level, []).append(course_id)
+        return Response({
+            "levels": [{"level": level, "courses": graph.describe(grouped[level])} for level in sorted(grouped)],
+            "cyclic": graph.describe(graph.cyclic_courses()),
+        })
+
 class PrerequisiteViewSet(viewsets.ModelViewSet):
     queryset = Prerequisite.objects.all()
     serializer_class = PrerequisiteSerializer
+    pagination_class = IdPagination
     permission_classes = [IsAdminUser]
 
 
@@ -43,22 +97,12 @@ class CoursesWithPrerequisitesAPIView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        # دروس یکتا که حداقل یک پیش‌نیاز دارند
-        course_codes_with_prereqs = (
-            Prerequisite.objects.values_list('course__code', flat=True)
-            .distinct()
-        )
-        result = []
-        for course_code in course_codes_with_prereqs:
-            prereq_codes = list(
-                Prerequisite.objects.filter(course__code=course_code)
-                .values_list('prerequisite__code', flat=True)
-            )
-            result.append({
-                "course_code": course_code,
-                "prerequisite_codes": prereq_codes,
-            })
-        return Response(result)
+        # خروجی آماده از کش؛ کلاینتی که نسخه‌ی فعلی را دارد فقط 304 می‌گیرد
+        payload = get_prerequisites_payload()
+        headers = {'ETag': payload["etag"], 'Cache-Control': 'private, no-cache'}
+        if payload["etag"] in request.headers.get('If-None-Match', ''):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        return Response(payload["data"], headers=headers)
 
 class UnitLimitAPIView(APIView):
     permission_classes = [IsAuthenticated]
@@ -91,6 +135,7 @@ class UnitLimitAPIView(APIView):
 class ProfessorListView(viewsets.ReadOnlyModelViewSet):
     queryset = User.objects.filter(role='professor').order_by('last_name')
     serializer_class = ProfessorSerializer
+    pagination_class = NamePagination
 
     permission_classes = [IsAdminUser]
 
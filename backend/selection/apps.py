@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class SelectionConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'selection'
+
+    def ready(self):
+        import selection.signals  # به‌روزرسانی کارنامه‌ی آماده
@@ -0,0 +1,67 @@
+"""
+نسخه‌ی async پرترافیک‌ترین اندپوینت‌های انتخاب واحد برای اجرا زیر سرور ASGI.
+خواندن‌ها با ORM async انجام می‌شوند؛ ثبت درس به‌خاطر نیاز به تراکنش در thread اجرا می‌شود.
+"""
+import json
+
+from asgiref.sync import sync_to_async
+from django.core.exceptions import ValidationError
+from django.http import JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET, require_POST
+
+from courses.models import Course
+from users.async_auth import async_jwt_required
+from .models import CourseSelection
+from .serializers import CourseSelectionSerializer
+from .services import SelectionService
+from .views import draft_payload, schedule_payload
+from .waiting_room import IsAdmitted, WaitingRoom
+
+JSON_PARAMS = {'ensure_ascii': False}
+
+
+def _students_only(message):
+    return JsonResponse({"error": message}, status=403, json_dumps_params=JSON_PARAMS)
+
+
+@require_GET
+@async_jwt_required
+async def draft(request):
+    if request.user.role != 'student':
+        return _students_only("فقط دانشجویان می‌توانند لیست انتخاب واحد خود را ببینند.")
+    selections = CourseSelection.objects.filter(student=request.user, is_finalized=False).select_related('course')
+    return JsonResponse(draft_payload([sel async for sel in selections]), json_dumps_params=JSON_PARAMS)
+
+
+@require_GET
+@async_jwt_required
+async def schedule(request):
+    if request.user.role != 'student':
+        return _students_only("فقط دانشجویان می‌توانند برنامه ببینند.")
+    selections = CourseSelection.objects.filter(student=request.user).select_related('course')
+    return JsonResponse(schedule_payload([sel async for sel in selections]), json_dumps_params=JSON_PARAMS)
+
+
+@csrf_exempt
+@require_POST
+@async_jwt_required
+async def select_course(request):
+    if request.user.role != 'student':
+        return _students_only("فقط دانشجویان می‌توانند درس انتخاب کنند.")
+    try:
+        course_code = json.loads(request.body or b'{}').get('course_code')
+    except (ValueError, AttributeError):
+        course_code = None
+    if not course_code:
+        return JsonResponse({"error": "کد درس (course_code) الزامی است."}, status=400, json_dumps_params=JSON_PARAMS)
+    course = await Course.objects.select_related('term').filter(code=course_code).afirst()
+    if course is None:
+        return JsonResponse({"detail": "یافت نشد."}, status=404, json_dumps_params=JSON_PARAMS)
+    if not await sync_to_async(WaitingRoom().is_admitted)(request.user):
+        return JsonResponse({"detail": IsAdmitted.message}, status=403, json_dumps_params=JSON_PARAMS)
+    try:
+        selection = await sync_to_async(SelectionService().select_course)(request.user, course)
+    except ValidationError as e:
+        return JsonResponse({"errors": e.messages}, status=400, json_dumps_params=JSON_PARAMS)
+    return JsonResponse(CourseSelectionSerializer(selection).data, status=201, json_dumps_params=JSON_PARAMS)
@@ -0,0 +1,66 @@
+from courses.policy import get_policy
+from courses.prerequisite_graph import get_prerequisite_graph
+from courses.timeslots import combine_masks
+from .repositories import SelectionRepository
+
+
+class EligibilityContext:
+    """
+    وضعیت انتخاب واحد یک دانشجو که با تعداد ثابتی کوئری بارگذاری می‌شود
+    و همه‌ی قوانین انتخاب درس روی آن در حافظه بررسی می‌شوند.
+    """
+
+    def __init__(self, student, repo=None):
+        self.repo = repo or SelectionRepository()
+        self.student = student
+        self.selections = list(self.repo.get_selections_with_courses(student))
+        self.selected_ids = {sel.course_id for sel in self.selections}
+        self.current_units = sum(sel.course.units for sel in self.selections)
+        self.schedule_mask = combine_masks(sel.course.time_mask_bits for sel in self.selections)
+        self.passed_ids = self.repo.get_passed_course_ids(student)
+        self.prerequisites = get_prerequisite_graph()
+        self.policy = get_policy()
+        self.limit = self.policy.unit_limit
+
+    def check(self, course, ignore_capacity=False):
+        """لیست خطاهای انتخاب این درس؛ لیست خالی یعنی مجاز است"""
+        errors = []
+
+        # قانون ۰: بررسی فعال بودن نیم‌سال
+        if not course.term_id:
+            errors.append("این درس به نیم‌سال مشخصی تخصیص داده نشده است.")
+        elif not self.policy.is_selection_open(course.term_id):
+            errors.append("مهلت انتخاب واحد برای این نیم‌سال تمام شده است.")
+
+        # قانون ۱: بررسی تکرار
+        if course.pk in self.selected_ids:
+            errors.append("این درس قبلاً اخذ شده است.")
+
+        # قانون ۲: بررسی ظرفیت (از روی شمارنده؛ رزرو قطعی هنگام ثبت انجام می‌شود)
+        if not ignore_capacity and not course.has_free_seat:
+            errors.append("ظرفیت درس پر شده است.")
+
+        # قانون ۳: بررسی پیش‌نیاز
+        missing = self.prerequisites.direct_requirements(course.pk) - self.passed_ids
+        for prereq in self.prerequisites.describe(missing):
+            errors.append(f"پیش‌نیاز {prereq['name']} پاس نشده است.")
+
+        # قانون ۴: بررسی تداخل زمانی
+        if self.has_time_conflict(course):
+            errors.append("تداخل زمانی با درس دیگر.")
+
+        # قانون ۵: بررسی حد واحد (حداقل هنگام نهایی کردن چک می‌شود)
+        if self.current_units + course.units > self.limit.max_units:
+            errors.append(f"حداکثر واحد مجاز ({self.limit.max_units}) رعایت نشده است.")
+
+        return errors
+
+    def has_time_conflict(self, course):
+        return bool(course.time_mask_bits & self.schedule_mask)
+
+    def add(self, selection):
+        """به‌روزرسانی وضعیت در حافظه بعد از ثبت یک انتخاب جدید"""
+        self.selections.append(selection)
+        self.selected_ids.add(selection.course_id)
+        self.current_units += selection.course.units
+        self.schedule_mask |= selection.course.time_mask_bits
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from selection.transcripts import rebuild_all
+
+
+class Command(BaseCommand):
+    help = "بازسازی کامل کارنامه‌های آماده (TermSummary) از روی انتخاب‌های نهایی و نمره‌ها"
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            students = rebuild_all()
+        self.stdout.write(self.style.SUCCESS(f"کارنامه‌ی {students} دانشجو بازسازی شد."))
@@ -0,0 +1,93 @@
+import json
+import math
+from datetime import time, timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from courses.models import Course, Term
+from courses.policy import get_policy
+from courses.timeslots import DAYS
+from users.models import User
+
+TERM_NAME = 'نیم‌سال آزمون بار'
+# بازه‌های کلاس هر روز؛ هر درس یکی از (روز، بازه) ها را می‌گیرد
+CLASS_SLOTS = [(time(8), time(10)), (time(10), time(12)), (time(13), time(15)), (time(15), time(17))]
+COURSE_UNITS = 3
+
+
+class Command(BaseCommand):
+    help = "ساخت نیم‌سال فعال، دروس و دانشجویان آزمون بار انتخاب واحد (benchmarks/registration_rush)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--students', type=int, default=2000)
+        parser.add_argument('--courses', type=int, default=60)
+        parser.add_argument('--seats-ratio', type=float, default=1.0,
+                            help='نسبت کل صندلی‌ها به تقاضا (دانشجو × درس هر دانشجو)')
+        parser.add_argument('--picks', type=int, default=4, help='تعداد درسی که هر دانشجو انتخاب می‌کند')
+        parser.add_argument('--prefix', default='lt-', help='پیشوند نام کاربری دانشجویان، استاد و کد دروس')
+        parser.add_argument('--password', default='loadtest-pass')
+        parser.add_argument('--manifest', default='loadtest_manifest.json', help='مسیر فایل مشخصات برای اسکریپت آزمون')
+        parser.add_argument('--reset', action='store_true', help='حذف داده‌ی آزمون قبلی با همین پیشوند')
+
+    def handle(self, *args, **options):
+        prefix, students, courses = options['prefix'], options['students'], options['courses']
+        if students < 1 or courses < 1:
+            raise CommandError("تعداد دانشجو و درس باید مثبت باشد.")
+
+        with transaction.atomic():
+            existing = User.objects.filter(username__startswith=prefix)
+            if existing.exists() or Term.objects.filter(name=TERM_NAME).exists():
+                if not options['reset']:
+                    raise CommandError("داده‌ی آزمون قبلی وجود دارد؛ برای ساخت دوباره --reset بدهید.")
+                Term.objects.filter(name=TERM_NAME).delete()
+                Course.objects.filter(code__startswith=prefix.upper()).delete()
+                existing.delete()
+
+            start = timezone.now() - timedelta(hours=1)
+            term = Term.objects.create(name=TERM_NAME, start_selection=start, end_selection=start + timedelta(days=7),
+                                       is_active=True)
+            professor = User.objects.create(username=f'{prefix}professor', role='professor',
+                                            first_name='استاد', last_name='آزمون')
+            capacity = max(1, math.ceil(students * options['picks'] * options['seats_ratio'] / courses))
+            # save تک‌تک برای محاسبه‌ی ماسک زمانی و ایندکس جستجو؛ تعداد دروس کم است
+            days = DAYS[:-1]
+            for index in range(courses):
+                day = days[index // len(CLASS_SLOTS) % len(days)]
+                start_time, end_time = CLASS_SLOTS[index % len(CLASS_SLOTS)]
+                Course.objects.create(
+                    code=f'{prefix.upper()}{index:04}', name=f'درس آزمون {index}', professor=professor, term=term,
+                    capacity=capacity, units=COURSE_UNITS, day=day, start_time=start_time, end_time=end_time,
+                )
+
+            # یک هش برای همه: هش کردن هزاران رمز یکسان فقط زمان ساخت را بالا می‌برد
+            password = make_password(options['password'])
+            User.objects.bulk_create(
+                (User(username=f'{prefix}{i:05}', password=password, role='student') for i in range(students)),
+                batch_size=1000,
+            )
+
+        limit = get_policy().unit_limit
+        manifest = {
+            'term_id': term.id,
+            'usernames': [f'{prefix}{i:05}' for i in range(students)],
+            'password': options['password'],
+            'course_prefix': prefix.upper(),
+            'picks': options['picks'],
+            'capacity': capacity,
+            'min_units': limit.min_units,
+            'max_units': limit.max_units,
+        }
+        with open(options['manifest'], 'w', encoding='utf-8') as out:
+            json.dump(manifest, out, ensure_ascii=False)
+
+        if options['picks'] * COURSE_UNITS < limit.min_units:
+            self.stdout.write(self.style.WARNING(
+                f"{options['picks']} درس ({options['picks'] * COURSE_UNITS} واحد) کمتر از حداقل واحد ({limit.min_units}) است؛ "
+                f"نهایی کردن رد خواهد شد."
+            ))
+        self.stdout.write(self.style.SUCCESS(
+            f"{students} دانشجو و {courses} درس (ظرفیت هر درس {capacity}) ساخته شد؛ مشخصات در {options['manifest']}"
+        ))
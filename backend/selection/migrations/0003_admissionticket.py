@@ -0,0 +1,29 @@
+# Generated by Django 5.2.8 on 2026-10-18 19:31
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('selection', '0002_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AdmissionTicket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('joined_at', models.DateTimeField(auto_now_add=True, verbose_name='زمان ورود به صف')),
+                ('admitted_at', models.DateTimeField(blank=True, null=True, verbose_name='زمان پذیرش')),
+                ('expires_at', models.DateTimeField(blank=True, null=True, verbose_name='پایان اعتبار')),
+                ('student', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='admission_ticket', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['admitted_at', 'id'], name='selection_a_admitte_0e8f1c_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,99 @@
+# Generated by Django 5.2.8 on 2026-10-18 19:50
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+# نسخه‌ی ثابت selection/transcripts.py در زمان این migration
+UNKNOWN = "نامشخص"
+PASSING_SCORE = 10
+
+
+def summarize_term(rows):
+    summary = {'courses': [], 'attempted_units': 0, 'graded_units': 0, 'passed_units': 0, 'weighted_score': 0.0}
+    for _code, name, units, score, status in rows:
+        summary['courses'].append({
+            "course": name,
+            "units": units,
+            "score": score if score is not None else UNKNOWN,
+            "status": status if score is not None else UNKNOWN,
+        })
+        summary['attempted_units'] += units
+        if score is not None:
+            summary['graded_units'] += units
+            summary['weighted_score'] += score * units
+            if score >= PASSING_SCORE:
+                summary['passed_units'] += units
+    summary['gpa'] = summary['weighted_score'] / summary['graded_units'] if summary['graded_units'] else 0
+    return summary
+
+
+def accumulate(summaries):
+    units = passed = 0
+    weighted = 0.0
+    for summary in summaries:
+        units += summary.graded_units
+        passed += summary.passed_units
+        weighted += summary.weighted_score
+        summary.cumulative_units = units
+        summary.cumulative_passed_units = passed
+        summary.cumulative_weighted_score = weighted
+        summary.cumulative_gpa = weighted / units if units else 0
+
+
+def fill_term_summaries(apps, schema_editor):
+    CourseSelection = apps.get_model('selection', 'CourseSelection')
+    TermSummary = apps.get_model('selection', 'TermSummary')
+    rows = {}
+    selections = (
+        CourseSelection.objects.filter(is_finalized=True, course__term__isnull=False)
+        .order_by('course__code')
+        .values_list('student_id', 'course__term_id', 'course__term__start_selection', 'course__code',
+                     'course__name', 'course__units', 'grade__score', 'grade__status')
+    )
+    for student_id, term_id, start, *row in selections:
+        rows.setdefault((student_id, start, term_id), []).append(row)
+    summaries = [
+        TermSummary(student_id=student_id, term_id=term_id, **summarize_term(term_rows))
+        for (student_id, _, term_id), term_rows in sorted(rows.items(), key=lambda item: item[0])
+    ]
+    by_student = {}
+    for summary in summaries:
+        by_student.setdefault(summary.student_id, []).append(summary)
+    for student_summaries in by_student.values():
+        accumulate(student_summaries)
+    TermSummary.objects.bulk_create(summaries, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0005_course_time_mask'),
+        ('selection', '0004_waitlistentry'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TermSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('courses', models.JSONField(default=list, verbose_name='دروس کارنامه')),
+                ('attempted_units', models.PositiveIntegerField(default=0, verbose_name='واحد اخذشده')),
+                ('graded_units', models.PositiveIntegerField(default=0, verbose_name='واحد نمره\u200cدار')),
+                ('passed_units', models.PositiveIntegerField(default=0, verbose_name='واحد گذرانده')),
+                ('weighted_score', models.FloatField(default=0, verbose_name='مجموع نمره × واحد')),
+                ('gpa', models.FloatField(default=0, verbose_name='معدل نیم\u200cسال')),
+                ('cumulative_units', models.PositiveIntegerField(default=0, verbose_name='واحد نمره\u200cدار کل')),
+                ('cumulative_passed_units', models.PositiveIntegerField(default=0, verbose_name='واحد گذرانده کل')),
+                ('cumulative_weighted_score', models.FloatField(default=0, verbose_name='مجموع نمره × واحد کل')),
+                ('cumulative_gpa', models.FloatField(default=0, verbose_name='معدل کل')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='term_summaries', to=settings.AUTH_USER_MODEL)),
+                ('term', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='summaries', to='courses.term')),
+            ],
+            options={
+                'unique_together': {('student', 'term')},
+            },
+        ),
+        migrations.RunPython(fill_term_summaries, migrations.RunPython.noop),
+    ]
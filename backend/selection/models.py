@@ -21,12 +21,70 @@ class Grade(models.Model):
     score = models.FloatField("نمره", validators=[MinValueValidator(0), MaxValueValidator(20)])
     status = models.CharField("وضعیت", max_length=20, default="در حال بررسی")
 
+    @staticmethod
+    def status_for(score):
+        """وضعیت متناظر نمره؛ ثبت گروهی (bulk) هم از همین استفاده می‌کند"""
+        return "قبول" if score >= 10 else "مردود"
+
     def save(self, *args, **kwargs):
-        if self.score >= 10:
-            self.status = "قبول"
-        else:
-            self.status = "مردود"
+        self.status = self.status_for(self.score)
         super().save(*args, **kwargs)
 
     def __str__(self):
-        return f"نمره {self.selection.course} برای {self.selection.student}"
\ No newline at end of file
+        return f"نمره {self.selection.course} برای {self.selection.student}"
+
+class AdmissionTicket(models.Model):
+    """نوبت دانشجو در صف انتظار انتخاب واحد؛ ترتیب صف همان ترتیب id است"""
+    student = models.OneToOneField(User, on_delete=models.CASCADE, related_name='admission_ticket')
+    joined_at = models.DateTimeField("زمان ورود به صف", auto_now_add=True)
+    admitted_at = models.DateTimeField("زمان پذیرش", null=True, blank=True)
+    expires_at = models.DateTimeField("پایان اعتبار", null=True, blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['admitted_at', 'id'])]
+
+    @property
+    def is_admitted(self):
+        return self.admitted_at is not None
+
+    def __str__(self):
+        return f"{self.student} - {'پذیرفته' if self.is_admitted else 'در صف'}"
+
+
+class WaitlistEntry(models.Model):
+    """لیست انتظار درس پرشده؛ با آزاد شدن صندلی نفر واجد شرایط بعدی خودکار ثبت می‌شود"""
+    student = models.ForeignKey(User, on_delete=models.CASCADE, related_name='waitlist_entries', limit_choices_to={'role': 'student'})
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='waitlist_entries')
+    created_at = models.DateTimeField("زمان ورود به لیست انتظار", auto_now_add=True)
+
+    class Meta:
+        unique_together = ('student', 'course')
+        indexes = [models.Index(fields=['course', 'id'])]
+
+    def __str__(self):
+        return f"{self.student} در انتظار {self.course}"
+
+
+class TermSummary(models.Model):
+    """
+    کارنامه‌ی آماده‌ی هر دانشجو در هر نیم‌سال؛ با ثبت یا تغییر نمره فقط ردیف همان
+    دانشجو و نیم‌سال دوباره ساخته می‌شود و کارنامه بدون پیمایش نمره‌ها خوانده می‌شود.
+    """
+    student = models.ForeignKey(User, on_delete=models.CASCADE, related_name='term_summaries')
+    term = models.ForeignKey('courses.Term', on_delete=models.CASCADE, related_name='summaries')
+    courses = models.JSONField("دروس کارنامه", default=list)
+    attempted_units = models.PositiveIntegerField("واحد اخذشده", default=0)
+    graded_units = models.PositiveIntegerField("واحد نمره‌دار", default=0)
+    passed_units = models.PositiveIntegerField("واحد گذرانده", default=0)
+    weighted_score = models.FloatField("مجموع نمره × واحد", default=0)
+    gpa = models.FloatField("معدل نیم‌سال", default=0)
+    cumulative_units = models.PositiveIntegerField("واحد نمره‌دار کل", default=0)
+    cumulative_passed_units = models.PositiveIntegerField("واحد گذرانده کل", default=0)
+    cumulative_weighted_score = models.FloatField("مجموع نمره × واحد کل", default=0)
+    cumulative_gpa = models.FloatField("معدل کل", default=0)
+
+    class Meta:
+        unique_together = ('student', 'term')
+
+    def __str__(self):
+        return f"کارنامه‌ی {self.student} در {self.term}"
@@ -0,0 +1,101 @@
+"""
+برنامه‌ریز انتخاب واحد.
+
+از روی لیست دروس دلخواه دانشجو، ترکیب‌های بدون تداخل زمانی را پیدا می‌کند که با انتخاب‌های
+فعلی دانشجو در محدوده‌ی حد واحد قرار می‌گیرند. هر درس ابتدا جداگانه با همان قوانین انتخاب
+(EligibilityContext) بررسی می‌شود و سپس جستجوی عقبگرد با ماسک‌های بیتی زمان انجام می‌شود.
+جستجو بودجه‌ی زمانی دارد؛ اگر تمام شود بهترین ترکیب‌های پیدا‌شده تا آن لحظه برگردانده می‌شوند.
+"""
+import heapq
+import time
+
+from courses.models import Course
+from .eligibility import EligibilityContext
+
+# بودجه‌ی زمانی جستجو (ثانیه)
+TIME_BUDGET = 0.05
+# هر چند گره یک بار زمان بررسی شود
+BUDGET_CHECK_INTERVAL = 256
+MAX_WISHLIST = 30
+DEFAULT_TOP = 10
+MAX_TOP = 100
+
+
+class SchedulePlanner:
+    def __init__(self, student, time_budget=TIME_BUDGET):
+        self.student = student
+        self.time_budget = time_budget
+
+    def plan(self, codes, top=DEFAULT_TOP):
+        codes = list(dict.fromkeys(code.strip() for code in codes if code.strip()))
+        courses = {course.code: course for course in Course.objects.filter(code__in=codes).select_related('term')}
+        context = EligibilityContext(self.student)
+
+        excluded, candidates = [], []
+        for code in codes:
+            course = courses.get(code)
+            errors = ["درس یافت نشد."] if course is None else context.check(course)
+            if errors:
+                excluded.append({"course_code": code, "errors": errors})
+            else:
+                candidates.append(course)
+
+        plans, complete = self._search(candidates, context, top)
+        return {
+            "plans": [
+                {"course_codes": [candidates[i].code for i in chosen], "total_units": units}
+                for units, chosen in plans
+            ],
+            "excluded": excluded,
+            "current_units": context.current_units,
+            "complete": complete,
+        }
+
+    def _search(self, candidates, context, top):
+        """بهترین top ترکیب (بیشترین واحد)؛ خروجی ([(واحد کل، اندیس‌ها)], کامل بودن جستجو)"""
+        # درس‌های پرواحدتر اول، تا ترکیب‌های خوب زود پیدا شوند و هرس قوی‌تر شود
+        candidates.sort(key=lambda course: (-course.units, course.code))
+        masks = [course.time_mask_bits for course in candidates]
+        units = [course.units for course in candidates]
+        # suffix[i]: مجموع واحد دروس i به بعد، برای هرس «حتی با همه‌ی باقی‌مانده‌ها هم کافی نیست»
+        suffix = [0] * (len(candidates) + 1)
+        for i in range(len(candidates) - 1, -1, -1):
+            suffix[i] = suffix[i + 1] + units[i]
+
+        min_units, max_units = context.limit.min_units, context.limit.max_units
+        deadline = time.perf_counter() + self.time_budget
+        best = []  # min-heap از (واحد کل، ترتیب معکوس، اندیس‌ها)
+        state = {'nodes': 0, 'timed_out': False, 'found': 0}
+        chosen = []
+
+        def visit(index, mask, total):
+            state['nodes'] += 1
+            if state['nodes'] % BUDGET_CHECK_INTERVAL == 0 and time.perf_counter() > deadline:
+                state['timed_out'] = True
+            if state['timed_out']:
+                return
+            if chosen and total >= min_units:
+                state['found'] += 1
+                entry = (total, -state['found'], tuple(chosen))
+                if len(best) < top:
+                    heapq.heappush(best, entry)
+                elif entry[:1] > best[0][:1]:
+                    heapq.heapreplace(best, entry)
+            for i in range(index, len(candidates)):
+                if total + suffix[i] < min_units:
+                    break
+                # وقتی top ترکیب داریم، شاخه‌ای که نمی‌تواند از بدترین آن‌ها بهتر شود لازم نیست
+                if len(best) == top and total + suffix[i] <= best[0][0]:
+                    break
+                if masks[i] & mask or total + units[i] > max_units:
+                    continue
+                chosen.append(i)
+                visit(i + 1, mask | masks[i], total + units[i])
+                chosen.pop()
+                if state['timed_out']:
+                    return
+
+        if top > 0:
+            visit(0, context.schedule_mask, context.current_units)
+        plans = sorted(best, key=lambda entry: (-entry[0], -entry[1]))
+        return [(total, list(indexes)) for total, _, indexes in plans], not state['timed_out']
@@ -1,6 +1,7 @@
-from .models import CourseSelection
+from .models import CourseSelection, Grade, WaitlistEntry
 from courses.models import Prerequisite, Course
-from django.db.models import Sum
+from courses.timeslots import combine_masks, decode_mask
+from django.db.models import Count, F, OuterRef, Subquery, Sum
 
 class SelectionRepository:
     def get_student_selections(self, student):
@@ -12,23 +13,74 @@ class SelectionRepository:
     def get_prerequisites_for_course(self, course):
         return Prerequisite.objects.filter(course=course)
 
-    def has_passed_prereq(self, student, prereq):
-        return CourseSelection.objects.filter(student=student, course=prereq, passed=True).exists()  # فرض گذشت از درس
+    def get_selections_with_courses(self, student):
+        return self.get_student_selections(student).select_related('course')
+
+    def get_passed_course_ids(self, student):
+        """شناسه‌ی دروسی که دانشجو با نمره‌ی قبولی گذرانده است"""
+        return set(
+            Grade.objects.filter(selection__student=student, selection__is_finalized=True, score__gte=10)
+            .values_list('selection__course_id', flat=True)
+        )
+
+    def reserve_seat(self, course):
+        """گرفتن اتمیک یک صندلی؛ اگر ظرفیت پر باشد False برمی‌گرداند"""
+        reserved = Course.objects.filter(pk=course.pk, seats_taken__lt=F('capacity')).update(
+            seats_taken=F('seats_taken') + 1
+        )
+        return reserved == 1
+
+    def release_seat(self, course_id):
+        Course.objects.filter(pk=course_id, seats_taken__gt=0).update(seats_taken=F('seats_taken') - 1)
+
+    def get_grading_roster(self, course, student_numbers):
+        """(شماره دانشجویی -> (شناسه‌ی انتخاب، شناسه‌ی دانشجو، شناسه‌ی نمره)) انتخاب‌های نهایی درس با یک کوئری"""
+        rows = (
+            CourseSelection.objects.filter(course=course, is_finalized=True, student__username__in=student_numbers)
+            .values_list('student__username', 'id', 'student_id', 'grade__id')
+        )
+        return {username: (selection_id, student_id, grade_id) for username, selection_id, student_id, grade_id in rows}
+
+    def remove_selection(self, selection):
+        """حذف انتخاب و آزاد کردن صندلی آن در همان تراکنش"""
+        selection.delete()
+        self.release_seat(selection.course_id)
+
+    def get_waitlist(self, course):
+        return WaitlistEntry.objects.filter(course=course).select_related('student').order_by('id')
+
+    def get_student_waitlist(self, student):
+        """لیست انتظار دانشجو به همراه جایگاه او در صف هر درس"""
+        ahead = (
+            WaitlistEntry.objects.filter(course=OuterRef('course'), id__lte=OuterRef('id'))
+            .values('course').annotate(total=Count('id')).values('total')
+        )
+        return (
+            WaitlistEntry.objects.filter(student=student).select_related('course')
+            .annotate(position=Subquery(ahead)).order_by('id')
+        )
 
     def get_student_current_units(self, student):
         selections = self.get_student_selections(student)
         return selections.aggregate(total_units=Sum('course__units'))['total_units'] or 0
 
+    def get_schedule_mask(self, student):
+        """OR ماسک زمانی همه‌ی دروس دانشجو"""
+        masks = self.get_student_selections(student).values_list('course__time_mask', flat=True)
+        return combine_masks(decode_mask(mask) for mask in masks)
+
     def has_time_conflict(self, student, new_course):
-        if not new_course.start_time or not new_course.end_time:
-            return False
-        selections = self.get_student_selections(student)
-        for sel in selections:
-            if sel.course.day != new_course.day:
-                continue
-            st, et = sel.course.start_time, sel.course.end_time
-            if st is None or et is None:
-                continue
-            if st < new_course.end_time and et > new_course.start_time:
-                return True
-        return False
\ No newline at end of file
+        return bool(new_course.time_mask_bits & self.get_schedule_mask(student))
+
+    def get_conflicting_course_codes(self, student, term=None):
+        """کد همه‌ی دروس کاتالوگ که با برنامه‌ی فعلی دانشجو تداخل دارند"""
+        schedule_mask = self.get_schedule_mask(student)
+        if not schedule_mask:
+            return []
+        catalog = Course.objects.exclude(time_mask='').exclude(selections__student=student)
+        if term is not None:
+            catalog = catalog.filter(term=term)
+        return [
+            code for code, mask in catalog.order_by('code').values_list('code', 'time_mask')
+            if decode_mask(mask) & schedule_mask
+        ]
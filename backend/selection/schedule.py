@@ -0,0 +1,172 @@
+"""
+خروجی برنامه‌ی هفتگی: iCalendar، JSON فشرده و فایل zip همه‌ی دانشجویان یک نیم‌سال.
+
+همه‌ی داده‌ها با یک کوئری (join انتخاب، درس، استاد و نیم‌سال) و به صورت values خوانده می‌شوند.
+هر درس یک رویداد تکرارشونده‌ی هفتگی (RRULE) در بازه‌ی برگزاری کلاس‌های نیم‌سال است. زمان‌ها
+محلی و بدون منطقه‌ی زمانی (floating) نوشته می‌شوند تا در تقویم هر کاربر همان ساعت کلاس نمایش داده شود.
+"""
+import zipfile
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from itertools import groupby
+
+from courses.timeslots import day_index
+from .models import CourseSelection
+
+# اگر تاریخ شروع/پایان کلاس‌ها برای نیم‌سال ثبت نشده باشد
+DEFAULT_TERM_WEEKS = 16
+PRODID = '-//course-registration-system//schedule//FA'
+# روزهای timeslots.DAYS (شنبه تا جمعه) در iCalendar و weekday پایتون
+ICAL_DAYS = ['SA', 'SU', 'MO', 'TU', 'WE', 'TH', 'FR']
+PY_WEEKDAYS = [5, 6, 0, 1, 2, 3, 4]
+
+ROW_FIELDS = (
+    'id', 'student_id', 'student__username', 'course__code', 'course__name', 'course__day',
+    'course__start_time', 'course__end_time', 'course__location',
+    'course__professor__first_name', 'course__professor__last_name',
+    'course__term__name', 'course__term__start_date', 'course__term__end_date', 'course__term__end_selection',
+)
+COMPACT_FIELDS = ['code', 'name', 'day', 'start', 'end', 'location', 'professor']
+
+
+def schedule_rows(queryset):
+    """ردیف‌های برنامه (namedtuple) با یک join"""
+    return queryset.order_by('student_id', 'course__term_id', 'course__code').values_list(*ROW_FIELDS, named=True)
+
+
+def student_schedule(student, term_id=None):
+    queryset = CourseSelection.objects.filter(student=student)
+    if term_id:
+        queryset = queryset.filter(course__term_id=term_id)
+    return list(schedule_rows(queryset))
+
+
+def term_schedules(term_id, chunk_size=2000):
+    """(نام کاربری، ردیف‌ها) برای همه‌ی دانشجویان نیم‌سال، بدون بارگذاری همه در حافظه"""
+    rows = schedule_rows(CourseSelection.objects.filter(course__term_id=term_id)).iterator(chunk_size=chunk_size)
+    for _, student_rows in groupby(rows, key=lambda row: row.student_id):
+        student_rows = list(student_rows)
+        yield student_rows[0].student__username, student_rows
+
+
+def _format_time(value):
+    return value.strftime('%H:%M') if value else None
+
+
+def _professor(row):
+    return f"{row.course__professor__first_name or ''} {row.course__professor__last_name or ''}".strip()
+
+
+def compact_payload(rows):
+    """JSON فشرده: نام ستون‌ها یک بار و هر درس یک آرایه (day شماره‌ی روز از ۰=شنبه)"""
+    return {
+        "fields": COMPACT_FIELDS,
+        "courses": [
+            [
+                row.course__code, row.course__name, day_index(row.course__day),
+                _format_time(row.course__start_time), _format_time(row.course__end_time),
+                row.course__location, _professor(row),
+            ]
+            for row in rows
+        ],
+    }
+
+
+def _term_range(row):
+    start = row.course__term__start_date
+    if start is None:
+        start = row.course__term__end_selection.date() if row.course__term__end_selection else date.today()
+    end = row.course__term__end_date or start + timedelta(weeks=DEFAULT_TERM_WEEKS)
+    return start, end
+
+
+def _escape(text):
+    return (text or '').replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,').replace('\n', '\\n')
+
+
+def _fold(line):
+    """شکستن خطوط بلندتر از ۷۵ بایت (RFC 5545) بدون بریدن کاراکترهای چندبایتی"""
+    encoded = line.encode('utf-8')
+    if len(encoded) <= 75:
+        return line + '\r\n'
+    parts, current, size, limit = [], [], 0, 75
+    for char in line:
+        width = len(char.encode('utf-8'))
+        if size + width > limit:
+            parts.append(''.join(current))
+            current, size, limit = [], 0, 74
+        current.append(char)
+        size += width
+    parts.append(''.join(current))
+    return '\r\n '.join(parts) + '\r\n'
+
+
+def _event_lines(row, stamp):
+    index = day_index(row.course__day)
+    if index is None or not row.course__start_time or not row.course__end_time:
+        return []
+    term_start, term_end = _term_range(row)
+    first_day = term_start + timedelta(days=(PY_WEEKDAYS[index] - term_start.weekday()) % 7)
+    if first_day > term_end:
+        return []
+    start = datetime.combine(first_day, row.course__start_time)
+    end = datetime.combine(first_day, row.course__end_time)
+    lines = [
+        'BEGIN:VEVENT',
+        f'UID:selection-{row.id}@course-registration',
+        f'DTSTAMP:{stamp}',
+        f'DTSTART:{start:%Y%m%dT%H%M%S}',
+        f'DTEND:{end:%Y%m%dT%H%M%S}',
+        f'RRULE:FREQ=WEEKLY;BYDAY={ICAL_DAYS[index]};UNTIL={term_end:%Y%m%d}T235959',
+        f'SUMMARY:{_escape(f"{row.course__name} ({row.course__code})")}',
+    ]
+    if row.course__location:
+        lines.append(f'LOCATION:{_escape(row.course__location)}')
+    if _professor(row):
+        lines.append(f'DESCRIPTION:{_escape("استاد: " + _professor(row))}')
+    lines.append('END:VEVENT')
+    return lines
+
+
+def ical_lines(rows, name='برنامه‌ی هفتگی'):
+    """خطوط تقویم (هر کدام با CRLF)؛ به صورت generator برای پاسخ جریانی"""
+    stamp = datetime.now(dt_timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+    yield from map(_fold, ['BEGIN:VCALENDAR', 'VERSION:2.0', f'PRODID:{PRODID}', 'CALSCALE:GREGORIAN',
+                           f'X-WR-CALNAME:{_escape(name)}'])
+    for row in rows:
+        yield from map(_fold, _event_lines(row, stamp))
+    yield _fold('END:VCALENDAR')
+
+
+class _ChunkWriter:
+    """مقصد غیرقابل seek برای ZipFile که بایت‌های نوشته‌شده را تا برداشتن بعدی نگه می‌دارد"""
+
+    def __init__(self):
+        self._chunks = []
+        self._offset = 0
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._offset += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._offset
+
+    def flush(self):
+        pass
+
+    def take(self):
+        data, self._chunks = b''.join(self._chunks), []
+        return data
+
+
+def stream_term_zip(term_id):
+    """فایل zip تقویم همه‌ی دانشجویان نیم‌سال (یک .ics برای هر دانشجو) به صورت تکه‌تکه"""
+    writer = _ChunkWriter()
+    with zipfile.ZipFile(writer, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for username, rows in term_schedules(term_id):
+            with archive.open(f'{username}.ics', 'w') as entry:
+                for line in ical_lines(rows, name=f"{rows[0].course__term__name} - {username}"):
+                    entry.write(line.encode('utf-8'))
+            yield writer.take()
+    yield writer.take()
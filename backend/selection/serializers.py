@@ -1,9 +1,19 @@
 from rest_framework import serializers
-from .models import CourseSelection
+from .models import CourseSelection, WaitlistEntry
 
 class CourseSelectionSerializer(serializers.ModelSerializer):
     course_name = serializers.CharField(source='course.name', read_only=True)
 
     class Meta:
         model = CourseSelection
-        fields = '__all__'
\ No newline at end of file
+        fields = '__all__'
+
+
+class WaitlistEntrySerializer(serializers.ModelSerializer):
+    course_code = serializers.CharField(source='course.code', read_only=True)
+    course_name = serializers.CharField(source='course.name', read_only=True)
+    position = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = WaitlistEntry
+        fields = ['id', 'course_code', 'course_name', 'position', 'created_at']
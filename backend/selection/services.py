@@ -1,8 +1,16 @@
 from django.core.exceptions import ValidationError
-from django.db import transaction
-from .models import CourseSelection, Grade
+from django.db import IntegrityError, transaction
+from .models import CourseSelection, Grade, WaitlistEntry
 from .repositories import SelectionRepository
-from courses.models import UnitLimit
+from .eligibility import EligibilityContext
+from courses.models import Course
+from courses.policy import get_policy
+from .transcripts import refresh_term_summaries
+
+# حداکثر تعداد نفرات لیست انتظار که هنگام آزاد شدن یک صندلی بررسی می‌شوند
+WAITLIST_PROMOTION_SCAN = 50
+# اندازه‌ی هر دسته در ثبت گروهی نمره
+GRADE_BATCH_SIZE = 500
 
 class SelectionService:
     def __init__(self):
@@ -10,52 +18,102 @@ class SelectionService:
 
     @transaction.atomic
     def select_course(self, student, course):
-        errors = []
-
-        # قانون ۰: بررسی فعال بودن نیم‌سال
-        if not course.term:
-            errors.append("این درس به نیم‌سال مشخصی تخصیص داده نشده است.")
-        elif not course.term.is_active:
-            errors.append("مهلت انتخاب واحد برای این نیم‌سال تمام شده است.")
-
-        # قانون ۱: بررسی تکرار
-        if self.repo.selection_exists(student, course):
-            errors.append("این درس قبلاً اخذ شده است.")
-
-        # قانون ۲: بررسی ظرفیت
-        if course.enrolled_count >= course.capacity:
-            errors.append("ظرفیت درس پر شده است.")
-
-        # قانون ۳: بررسی پیش‌نیاز
-        prereqs = self.repo.get_prerequisites_for_course(course)
-        for prereq in prereqs:
-            if not self.repo.has_passed_prereq(student, prereq.prerequisite):
-                errors.append(f"پیش‌نیاز {prereq.prerequisite.name} پاس نشده است.")
-
-        # قانون ۴: بررسی تداخل زمانی
-        if self.repo.has_time_conflict(student, course):
-            errors.append("تداخل زمانی با درس دیگر.")
-
-        # قانون ۵: بررسی حد واحد
-        current_units = self.repo.get_student_current_units(student)
-        limit = UnitLimit.objects.first() or UnitLimit(min_units=12, max_units=20)
-        new_total = current_units + course.units
-
-        if new_total > limit.max_units:
-            errors.append(f"حداکثر واحد مجاز ({limit.max_units}) رعایت نشده است.")
-
-        # حداقل رو اینجا چک نمی‌کنیم → اجازه می‌دیم کمتر انتخاب کنه
-
-        # قانون ۶: بررسی حذف مجاز (برای حذف)
-        # قانون ۷: بررسی حذف دانشجو از درس مجاز (برای استاد)
-
+        # همه‌ی قوانین (نیم‌سال، تکرار، ظرفیت، پیش‌نیاز، تداخل، حد واحد) در EligibilityContext
+        context = EligibilityContext(student, repo=self.repo)
+        errors = context.check(course)
         if errors:
             raise ValidationError(errors)
+        return self._register(student, course)
 
-        # ثبت
-        selection = CourseSelection.objects.create(student=student, course=course)
+    @transaction.atomic
+    def select_courses(self, student, courses, atomic=True):
+        """
+        انتخاب چند درس در یک تراکنش. دروس جدید با هم و با دروس قبلی سنجیده می‌شوند
+        (تداخل زمانی و مجموع واحد). در حالت atomic با رد شدن یک درس هیچ درسی ثبت نمی‌شود؛
+        در غیر این صورت نتیجه‌ی هر درس جداگانه برگردانده می‌شود.
+        """
+        context = EligibilityContext(student, repo=self.repo)
+        results = []
+        for course in courses:
+            item = {"course": course, "selection": None, "errors": context.check(course)}
+            results.append(item)
+            if item["errors"]:
+                continue
+            if atomic:
+                # همه‌ی دروس قبل از ثبت سنجیده می‌شوند؛ شکست ثبت هر درس کل تراکنش را برمی‌گرداند
+                context.add(CourseSelection(student=student, course=course))
+                continue
+            try:
+                with transaction.atomic():
+                    item["selection"] = self._register(student, course)
+            except ValidationError as e:
+                item["errors"] = e.messages
+                continue
+            # فقط درس ثبت‌شده در بررسی دروس بعدی لیست حساب می‌شود
+            context.add(item["selection"])
+
+        if not atomic:
+            return results
+        if any(item["errors"] for item in results):
+            raise ValidationError({item["course"].code: item["errors"] for item in results if item["errors"]})
+        for item in results:
+            try:
+                with transaction.atomic():
+                    item["selection"] = self._register(student, item["course"])
+            except ValidationError as e:
+                raise ValidationError({item["course"].code: e.messages})
+        return results
+
+    def _register(self, student, course):
+        # ثبت: صندلی با UPDATE شرطی رزرو می‌شود تا دو درخواست هم‌زمان آخرین صندلی را نگیرند
+        if not self.repo.reserve_seat(course):
+            raise ValidationError(["ظرفیت درس پر شده است."])
+        try:
+            with transaction.atomic():
+                selection = CourseSelection.objects.create(student=student, course=course)
+        except IntegrityError:
+            raise ValidationError(["این درس قبلاً اخذ شده است."])
+        course.seats_taken += 1
+        WaitlistEntry.objects.filter(student=student, course=course).delete()
         return selection
 
+    @transaction.atomic
+    def join_waitlist(self, student, course):
+        context = EligibilityContext(student, repo=self.repo)
+        errors = context.check(course, ignore_capacity=True)
+        if course.has_free_seat:
+            errors.append("ظرفیت درس پر نیست؛ درس را مستقیم انتخاب کنید.")
+        if errors:
+            raise ValidationError(errors)
+        entry, created = WaitlistEntry.objects.get_or_create(student=student, course=course)
+        if not created:
+            raise ValidationError("شما قبلاً در لیست انتظار این درس هستید.")
+        return entry
+
+    def leave_waitlist(self, student, course):
+        deleted, _ = WaitlistEntry.objects.filter(student=student, course=course).delete()
+        if not deleted:
+            raise ValidationError("شما در لیست انتظار این درس نیستید.")
+
+    def promote_waitlist(self, course):
+        """
+        ثبت اولین دانشجوی واجد شرایط لیست انتظار در صندلی آزادشده (در همان تراکنش).
+        پیش‌نیاز، تداخل و حد واحد دوباره بررسی می‌شوند و افراد فاقد شرایط در صف باقی می‌مانند.
+        """
+        course = Course.objects.select_related('term').get(pk=course.pk)
+        for entry in self.repo.get_waitlist(course)[:WAITLIST_PROMOTION_SCAN]:
+            if not course.has_free_seat:
+                return None
+            context = EligibilityContext(entry.student, repo=self.repo)
+            if context.check(course):
+                continue
+            try:
+                with transaction.atomic():
+                    return self._register(entry.student, course)
+            except ValidationError:
+                continue
+        return None
+
     def has_passed_prereq(self, student, prereq):
         previous_selection = CourseSelection.objects.filter(student=student, course=prereq, is_finalized=True).first()
         if previous_selection:
@@ -69,9 +127,10 @@ class SelectionService:
         selection = CourseSelection.objects.filter(student=student, course=course).first()
         if not selection:
             raise ValidationError("این درس اخذ نشده است.")
-        if course.term and not course.term.is_active:
+        if course.term_id and not get_policy().is_selection_open(course.term_id):
             raise ValidationError("مهلت انتخاب واحد برای این نیم‌سال تمام شده است.")
-        selection.delete()
+        self.repo.remove_selection(selection)
+        self.promote_waitlist(course)
 
     @transaction.atomic
     def professor_delete_student(self, professor, course, student):
@@ -80,5 +139,54 @@ class SelectionService:
         selection = CourseSelection.objects.filter(student=student, course=course).first()
         if not selection:
             raise ValidationError("این دانشجو در این درس ثبت‌نام نکرده.")
-        selection.delete()
+        self.repo.remove_selection(selection)
+        self.promote_waitlist(course)
+
+    @transaction.atomic
+    def submit_grades(self, professor, course, rows):
+        """
+        ثبت یا اصلاح نمره‌ی گروهی از دانشجویان درس. rows لیستی از {student_number, score} است.
+        اگر حتی یک ردیف خطا داشته باشد هیچ نمره‌ای ثبت نمی‌شود.
+        خروجی: (تعداد نمره‌های جدید، تعداد نمره‌های اصلاح‌شده)
+        """
+        if course.professor_id != professor.pk:
+            raise ValidationError("شما استاد این درس نیستید.")
+        if not rows:
+            raise ValidationError("هیچ نمره‌ای ارسال نشده است.")
+
+        errors, scores = [], {}
+        for index, row in enumerate(rows, start=1):
+            student_number = str(row.get('student_number') or '').strip()
+            if not student_number:
+                errors.append(f"ردیف {index}: شماره دانشجویی الزامی است.")
+                continue
+            try:
+                score = float(row.get('score'))
+            except (TypeError, ValueError):
+                errors.append(f"ردیف {index}: نمره‌ی {student_number} نامعتبر است.")
+                continue
+            if not 0 <= score <= 20:
+                errors.append(f"ردیف {index}: نمره‌ی {student_number} باید بین ۰ و ۲۰ باشد.")
+            elif student_number in scores:
+                errors.append(f"ردیف {index}: برای {student_number} بیش از یک نمره ارسال شده است.")
+            else:
+                scores[student_number] = score
+
+        roster = self.repo.get_grading_roster(course, list(scores))
+        for student_number in scores:
+            if student_number not in roster:
+                errors.append(f"دانشجو {student_number} در لیست نهایی این درس نیست.")
+        if errors:
+            raise ValidationError(errors)
 
+        created, updated = [], []
+        for student_number, score in scores.items():
+            selection_id, _, grade_id = roster[student_number]
+            grade = Grade(pk=grade_id, selection_id=selection_id, score=score, status=Grade.status_for(score))
+            (updated if grade_id else created).append(grade)
+        Grade.objects.bulk_create(created, batch_size=GRADE_BATCH_SIZE)
+        Grade.objects.bulk_update(updated, ['score', 'status'], batch_size=GRADE_BATCH_SIZE)
+
+        # bulk سیگنال ندارد؛ کارنامه‌ی دانشجویان این درس یک‌جا به‌روز می‌شود
+        refresh_term_summaries((student_id, course.term_id) for _, student_id, _ in roster.values())
+        return len(created), len(updated)
@@ -0,0 +1,29 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from courses.models import Course
+from .models import CourseSelection, Grade
+from .transcripts import refresh_for_selections, refresh_term_summaries
+
+
+@receiver([post_save, post_delete], sender=Grade)
+def refresh_transcript_on_grade_change(sender, instance, **kwargs):
+    refresh_for_selections([instance.selection_id])
+
+
+@receiver(post_delete, sender=CourseSelection)
+def refresh_transcript_on_selection_delete(sender, instance, **kwargs):
+    if not instance.is_finalized:
+        return
+    term_id = Course.objects.filter(pk=instance.course_id).values_list('term_id', flat=True).first()
+    refresh_term_summaries([(instance.student_id, term_id)])
+
+
+@receiver(post_save, sender=Course)
+def refresh_transcripts_on_course_change(sender, instance, created, **kwargs):
+    # کارنامه کد، نام، واحد و نیم‌سال درس را نگه می‌دارد؛ با تغییر نیم‌سال، نیم‌سال قبلی هم بازسازی می‌شود
+    if created or not any(instance.has_changed(field) for field in ('code', 'name', 'units', 'term_id')):
+        return
+    term_ids = {instance.term_id, instance.loaded_value('term_id')}
+    student_ids = CourseSelection.objects.filter(course=instance, is_finalized=True).values_list('student_id', flat=True)
+    refresh_term_summaries([(student_id, term_id) for student_id in student_ids for term_id in term_ids])
@@ -1,3 +1,588 @@
-from django.test import TestCase
+from datetime import time, timedelta
+import time as time_module
+import json
+import tempfile
+import zipfile
+from datetime import date
+from io import BytesIO, StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from courses.models import Course, Prerequisite, Term, UnitLimit
+from courses.policy import get_policy
+from core.query_budget import QueryBudgetTestMixin
+from courses.prerequisite_graph import get_prerequisite_graph
+from users.models import User
+from .models import AdmissionTicket, CourseSelection, Grade, TermSummary, WaitlistEntry
+from .services import SelectionService
+from .waiting_room import ADVANCE_THROTTLE_KEY, WaitingRoom
+
+
+class SelectionTestMixin:
+    """داده‌ی پایه برای تست‌های انتخاب واحد"""
+
+    def setUp(self):
+        start = timezone.now() - timedelta(days=1)
+        self.term = Term.objects.create(
+            name='نیمسال تست', start_selection=start, end_selection=start + timedelta(days=30), is_active=True
+        )
+        self.professor = User.objects.create(username='p1', role='professor', first_name='استاد', last_name='تست')
+        self.student = self.make_student('s1')
+        UnitLimit.objects.create(min_units=1, max_units=20)
+
+    def make_student(self, username):
+        return User.objects.create(username=username, role='student')
+
+    def make_course(self, code, **kwargs):
+        kwargs.setdefault('name', f'درس {code}')
+        kwargs.setdefault('professor', self.professor)
+        kwargs.setdefault('term', self.term)
+        return Course.objects.create(code=code, **kwargs)
+
+
+class SeatAccountingTest(SelectionTestMixin, TestCase):
+    def test_select_increments_counter(self):
+        course = self.make_course('C1', capacity=2)
+        SelectionService().select_course(self.student, course)
+        course.refresh_from_db()
+        self.assertEqual(course.seats_taken, 1)
+
+    def test_stale_instance_cannot_take_last_seat(self):
+        course = self.make_course('C1', capacity=1)
+        stale = Course.objects.get(pk=course.pk)
+        SelectionService().select_course(self.make_student('s2'), course)
+
+        # نمونه‌ی قدیمی هنوز صندلی خالی می‌بیند، ولی رزرو شرطی باید رد شود
+        self.assertTrue(stale.has_free_seat)
+        with self.assertRaises(ValidationError):
+            SelectionService().select_course(self.student, stale)
+        self.assertEqual(CourseSelection.objects.filter(course=course).count(), 1)
+        course.refresh_from_db()
+        self.assertEqual(course.seats_taken, 1)
+
+    def test_delete_and_professor_remove_release_seat(self):
+        course = self.make_course('C1', capacity=5)
+        other = self.make_student('s2')
+        SelectionService().select_course(self.student, course)
+        SelectionService().select_course(other, course)
+
+        SelectionService().delete_selection(self.student, course)
+        SelectionService().professor_delete_student(self.professor, course, other)
+        course.refresh_from_db()
+        self.assertEqual(course.seats_taken, 0)
+
+    def test_reconcile_repairs_drift(self):
+        course = self.make_course('C1', capacity=5)
+        CourseSelection.objects.create(student=self.student, course=course)
+        Course.objects.filter(pk=course.pk).update(seats_taken=4)
+
+        call_command('reconcile_seats', '--dry-run', stdout=StringIO())
+        course.refresh_from_db()
+        self.assertEqual(course.seats_taken, 4)
+
+        call_command('reconcile_seats', stdout=StringIO())
+        course.refresh_from_db()
+        self.assertEqual(course.seats_taken, 1)
+
+
+class EligibilityTest(SelectionTestMixin, TestCase):
+    def _count_select_queries(self, student, held):
+        for i in range(held):
+            course = self.make_course(f'H{student.username}{i}', units=1, day='یکشنبه')
+            CourseSelection.objects.create(student=student, course=course)
+        prereq = self.make_course(f'P{student.username}')
+        passed = CourseSelection.objects.create(student=student, course=prereq, is_finalized=True)
+        Grade.objects.create(selection=passed, score=18)
+        target = self.make_course(f'T{student.username}', units=1)
+        Prerequisite.objects.create(course=target, prerequisite=prereq)
+        target = Course.objects.select_related('term').get(pk=target.pk)
+        get_policy()
+        get_prerequisite_graph()
+        with CaptureQueriesContext(connection) as ctx:
+            SelectionService().select_course(student, target)
+        return len(ctx.captured_queries)
+
+    def test_query_count_independent_of_held_courses(self):
+        few = self._count_select_queries(self.make_student('few'), 1)
+        many = self._count_select_queries(self.make_student('many'), 12)
+        self.assertEqual(few, many)
+
+    def test_prerequisite_must_be_passed(self):
+        prereq = self.make_course('P1')
+        course = self.make_course('C1')
+        Prerequisite.objects.create(course=course, prerequisite=prereq)
+        with self.assertRaises(ValidationError) as cm:
+            SelectionService().select_course(self.student, course)
+        self.assertIn(f"پیش‌نیاز {prereq.name} پاس نشده است.", cm.exception.messages)
+
+        sel = CourseSelection.objects.create(student=self.student, course=prereq, is_finalized=True)
+        Grade.objects.create(selection=sel, score=15)
+        SelectionService().select_course(self.student, course)
+        self.assertTrue(CourseSelection.objects.filter(student=self.student, course=course).exists())
+
+
+class BatchSelectionTest(SelectionTestMixin, TestCase):
+    url = '/api/selection/selections/select-courses/'
+
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.client.force_authenticate(self.student)
+        self.make_course('A1', day='شنبه', start_time=time(8), end_time=time(10))
+        self.make_course('A2', day='شنبه', start_time=time(9), end_time=time(11))
+        self.make_course('A3', day='دوشنبه', start_time=time(8), end_time=time(10))
+
+    def test_atomic_rejects_conflict_among_new_courses(self):
+        r = self.client.post(self.url, {'course_codes': ['A1', 'A2', 'A3']}, format='json')
+        self.assertEqual(r.status_code, 400)
+        self.assertEqual(list(r.data['errors']), ['A2'])
+        self.assertFalse(CourseSelection.objects.filter(student=self.student).exists())
+
+    def test_partial_returns_itemized_result(self):
+        r = self.client.post(self.url, {'course_codes': ['A1', 'A2', 'A3', 'NOPE'], 'mode': 'partial'}, format='json')
+        self.assertEqual(r.status_code, 201)
+        created = {item['course_code']: item['created'] for item in r.data['results']}
+        self.assertEqual(created, {'A1': True, 'A2': False, 'A3': True, 'NOPE': False})
+        self.assertEqual(Course.objects.get(code='A1').seats_taken, 1)
+
+    def test_combined_units_checked_against_limit(self):
+        limit = UnitLimit.objects.get()
+        limit.max_units = 4
+        limit.save()
+        r = self.client.post(self.url, {'course_codes': ['A1', 'A3']}, format='json')
+        self.assertEqual(r.status_code, 400)
+        self.assertIn('A3', r.data['errors'])
+
+    def test_partial_seat_lost_mid_batch_does_not_block_later_courses(self):
+        courses = list(Course.objects.filter(code__in=['A1', 'A2']).order_by('code'))
+        # صندلی A1 بعد از بررسی و پیش از ثبت توسط درخواست دیگری گرفته می‌شود
+        Course.objects.filter(code='A1').update(capacity=1, seats_taken=1)
+        results = SelectionService().select_courses(self.student, courses, atomic=False)
+        self.assertEqual([item['errors'] for item in results], [["ظرفیت درس پر شده است."], []])
+        self.assertTrue(CourseSelection.objects.filter(student=self.student, course__code='A2').exists())
+
+
+class ConflictingCoursesTest(SelectionTestMixin, TestCase):
+    def test_lists_catalog_courses_overlapping_schedule(self):
+        held = self.make_course('H1', day='شنبه', start_time=time(8), end_time=time(10))
+        CourseSelection.objects.create(student=self.student, course=held)
+        self.make_course('X1', day='شنبه', start_time=time(9), end_time=time(11))
+        self.make_course('X2', day='شنبه', start_time=time(10), end_time=time(12))
+        self.make_course('X3', day='یکشنبه', start_time=time(8), end_time=time(10))
+
+        client = APIClient()
+        client.force_authenticate(self.student)
+        r = client.get('/api/selection/selections/conflicting-courses/')
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual(r.data['course_codes'], ['X1'])
+
+
+@override_settings(WAITING_ROOM={'ENABLED': True, 'MAX_ACTIVE': 1, 'TICKET_TTL': 600})
+class WaitingRoomTest(SelectionTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+
+    def client_for(self, user):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client
+
+    def test_fifo_admission_and_gate(self):
+        self.make_course('C1')
+        first, second = self.client_for(self.student), self.client_for(self.make_student('s2'))
+
+        self.assertEqual(first.post('/api/selection/waiting-room/join/').data['state'], 'admitted')
+        r = second.post('/api/selection/waiting-room/join/')
+        self.assertEqual((r.data['state'], r.data['position']), ('waiting', 1))
+
+        r = second.post('/api/selection/selections/select-course/', {'course_code': 'C1'}, format='json')
+        self.assertEqual(r.status_code, 403)
+        r = first.post('/api/selection/selections/select-course/', {'course_code': 'C1'}, format='json')
+        self.assertEqual(r.status_code, 201)
+
+        first.delete('/api/selection/waiting-room/leave/')
+        self.assertEqual(second.get('/api/selection/waiting-room/status/').data['state'], 'admitted')
+
+    def test_repeated_join_keeps_ticket(self):
+        client = self.client_for(self.student)
+        client.post('/api/selection/waiting-room/join/')
+        waiting = self.client_for(self.make_student('s2'))
+        for _ in range(2):
+            r = waiting.post('/api/selection/waiting-room/join/')
+            self.assertEqual((r.status_code, r.data['position']), (200, 1))
+        self.assertEqual(AdmissionTicket.objects.count(), 2)
+
+    def test_status_advance_is_throttled_across_workers(self):
+        room = WaitingRoom()
+        with mock.patch.object(WaitingRoom, 'advance') as advance:
+            room.status(self.student)
+            room.status(self.student)
+            self.assertEqual(advance.call_count, 1)
+            # worker دیگر همان کلید کش مشترک را می‌بیند؛ بعد از انقضای کلید دوباره جلو برده می‌شود
+            cache.delete(ADVANCE_THROTTLE_KEY)
+            room.status(self.student)
+            self.assertEqual(advance.call_count, 2)
+
+
+class WaitlistTest(SelectionTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.course = self.make_course('C1', capacity=1, day='شنبه', start_time=time(8), end_time=time(10))
+        self.holder = self.make_student('holder')
+        SelectionService().select_course(self.holder, self.course)
+
+    def test_join_only_when_full(self):
+        client = APIClient()
+        client.force_authenticate(self.student)
+        r = client.post('/api/selection/selections/join-waitlist/', {'course_code': 'C1'}, format='json')
+        self.assertEqual(r.status_code, 201)
+        self.assertEqual(r.data['position'], 1)
+
+        Course.objects.filter(pk=self.course.pk).update(capacity=5)
+        other = APIClient()
+        other.force_authenticate(self.make_student('s2'))
+        r = other.post('/api/selection/selections/join-waitlist/', {'course_code': 'C1'}, format='json')
+        self.assertEqual(r.status_code, 400)
+
+    def test_selection_cannot_be_moved_with_update(self):
+        selection = CourseSelection.objects.get(student=self.holder)
+        other = self.make_course('C3')
+        client = APIClient()
+        client.force_authenticate(self.holder)
+        for method in (client.put, client.patch):
+            r = method(f'/api/selection/selections/{selection.pk}/', {'course': other.pk}, format='json')
+            self.assertEqual(r.status_code, 405)
+        self.course.refresh_from_db()
+        self.assertEqual((self.course.seats_taken, CourseSelection.objects.get(pk=selection.pk).course_id),
+                         (1, self.course.pk))
+
+    def test_drop_promotes_next_eligible_student(self):
+        blocked = self.make_student('blocked')
+        clash = self.make_course('C2', day='شنبه', start_time=time(9), end_time=time(11))
+        WaitlistEntry.objects.create(student=blocked, course=self.course)
+        WaitlistEntry.objects.create(student=self.student, course=self.course)
+        CourseSelection.objects.create(student=blocked, course=clash)
+
+        SelectionService().delete_selection(self.holder, self.course)
+
+        self.assertTrue(CourseSelection.objects.filter(student=self.student, course=self.course).exists())
+        self.assertFalse(WaitlistEntry.objects.filter(student=self.student).exists())
+        self.assertTrue(WaitlistEntry.objects.filter(student=blocked).exists())
+        self.course.refresh_from_db()
+        self.assertEqual(self.course.seats_taken, 1)
+
+
+class AsyncEndpointsTest(SelectionTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.auth = {'HTTP_AUTHORIZATION': f'Bearer {AccessToken.for_user(self.student)}'}
+        self.make_course('C1', units=3, day='شنبه', start_time=time(8), end_time=time(10))
+
+    def test_select_then_read_draft_and_schedule(self):
+        r = self.client.post('/api/selection/async/select-course/', {'course_code': 'C1'},
+                             content_type='application/json', **self.auth)
+        self.assertEqual(r.status_code, 201)
+
+        r = self.client.get('/api/selection/async/draft/', **self.auth)
+        self.assertEqual(r.json(), {'courses': [{'course_code': 'C1', 'course_name': 'درس C1', 'units': 3}], 'total_units': 3})
+        r = self.client.get('/api/selection/async/schedule/', **self.auth)
+        self.assertEqual(list(r.json()), ['شنبه'])
+
+    def test_catalog_and_auth(self):
+        self.assertEqual(self.client.get('/api/async/courses/').status_code, 401)
+        r = self.client.get('/api/async/courses/', **self.auth)
+        self.assertEqual([c['code'] for c in r.json()['results']], ['C1'])
+
+    def test_catalog_is_paginated_like_sync_list(self):
+        for code in ('C2', 'C3'):
+            self.make_course(code)
+        url, codes = '/api/async/courses/?page_size=2', []
+        while url:
+            page = self.client.get(url, **self.auth).json()
+            codes += [c['code'] for c in page['results']]
+            url = page['next']
+        self.assertEqual(codes, ['C1', 'C2', 'C3'])
+        for query in ('cursor=bogus', 'term=abc'):
+            self.assertEqual(self.client.get(f'/api/async/courses/?{query}', **self.auth).status_code, 400)
+
+
+class TranscriptTest(SelectionTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.client.force_authenticate(self.student)
+        self.old_term = Term.objects.create(
+            name='نیمسال قبل', start_selection=self.term.start_selection - timedelta(days=180),
+            end_selection=self.term.start_selection - timedelta(days=150),
+        )
+
+    def _grade(self, code, score, units=3, term=None, finalized=True):
+        course = self.make_course(code, units=units, term=term or self.term)
+        selection = CourseSelection.objects.create(student=self.student, course=course, is_finalized=finalized)
+        return Grade.objects.create(selection=selection, score=score)
+
+    def test_summary_follows_grade_changes(self):
+        self._grade('OLD', 20, units=2, term=self.old_term)
+        grade = self._grade('A1', 8)
+        self._grade('A2', 16, units=1)
+
+        summary = TermSummary.objects.get(student=self.student, term=self.term)
+        self.assertEqual((summary.attempted_units, summary.passed_units), (4, 1))
+        self.assertAlmostEqual(summary.gpa, 10)
+        self.assertAlmostEqual(summary.cumulative_gpa, 80 / 6)
+
+        grade.score = 12
+        grade.save()
+        summary.refresh_from_db()
+        self.assertEqual(summary.passed_units, 4)
+        self.assertAlmostEqual(summary.cumulative_gpa, 92 / 6)
+
+        grade.delete()
+        summary.refresh_from_db()
+        self.assertEqual(summary.courses[0], {"course": "درس A1", "units": 3, "score": "نامشخص", "status": "نامشخص"})
+        self.assertAlmostEqual(summary.gpa, 16)
+
+    def test_report_card_reads_summary_in_one_query(self):
+        self._grade('A1', 15)
+        self._grade('A2', 9, units=1)
+        with self.assertNumQueries(1):
+            response = self.client.get(f'/api/selection/selections/report-card/?term_id={self.term.id}')
+        self.assertEqual(response.data['gpa'], 13.5)
+        self.assertEqual([row['status'] for row in response.data['courses']], ['قبول', 'مردود'])
+
+    def test_finalize_builds_summary(self):
+        course = self.make_course('F1', units=2)
+        CourseSelection.objects.create(student=self.student, course=course)
+        self.client.post('/api/selection/selections/finalize/')
+        summary = TermSummary.objects.get(student=self.student, term=self.term)
+        self.assertEqual((summary.attempted_units, summary.graded_units), (2, 0))
+
+    def test_course_edits_refresh_summaries(self):
+        self._grade('A1', 15)
+        self._grade('A2', 9, units=1)
+        course = Course.objects.get(code='A1')
+        course.units, course.name = 4, 'نام جدید'
+        course.save()
+        summary = TermSummary.objects.get(student=self.student, term=self.term)
+        self.assertEqual(summary.attempted_units, 5)
+        self.assertEqual(summary.courses[0]['course'], 'نام جدید')
+
+        course.term = self.old_term
+        course.save()
+        summary.refresh_from_db()
+        self.assertEqual((summary.attempted_units, summary.gpa), (1, 9))
+        old = TermSummary.objects.get(student=self.student, term=self.old_term)
+        self.assertEqual((old.attempted_units, old.gpa), (4, 15))
+        self.assertAlmostEqual(summary.cumulative_gpa, 69 / 5)
+
+
+class BulkGradeTest(SelectionTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.client.force_authenticate(self.professor)
+        self.course = self.make_course('G1', units=3)
+        self.url = f'/api/selection/professor/{self.course.code}/grades/'
+
+    def _roster(self, count):
+        students = User.objects.bulk_create([User(username=f'g{i:03}', role='student') for i in range(count)])
+        CourseSelection.objects.bulk_create(
+            [CourseSelection(student=student, course=self.course, is_finalized=True) for student in students]
+        )
+        return [student.username for student in students]
+
+    def _submit(self, scores):
+        grades = [{"student_number": number, "score": score} for number, score in scores.items()]
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post(self.url, {"grades": grades}, format='json')
+        return response, len(ctx.captured_queries)
+
+    def test_statement_count_independent_of_class_size(self):
+        numbers = self._roster(60)
+        response, small = self._submit({number: 15 for number in numbers[:5]})
+        self.assertEqual(response.data['created'], 5)
+        response, large = self._submit({number: 15 for number in numbers[5:]})
+        self.assertEqual(response.data['created'], 55)
+        self.assertEqual(small, large)
+
+        response, _ = self._submit({number: 9 for number in numbers})
+        self.assertEqual((response.data['created'], response.data['updated']), (0, 60))
+
+        statuses = set(Grade.objects.filter(selection__course=self.course).values_list('status', flat=True))
+        self.assertEqual(statuses, {"مردود"})
+        summary = TermSummary.objects.get(student__username=numbers[0], term=self.term)
+        self.assertEqual((summary.graded_units, summary.passed_units), (3, 0))
+
+    def test_csv_upload_and_all_or_nothing(self):
+        numbers = self._roster(2)
+        upload = BytesIO(f"student_number,score\n{numbers[0]},17\n{numbers[1]},12.5\n".encode())
+        upload.name = 'grades.csv'
+        response = self.client.post(self.url, {'file': upload}, format='multipart')
+        self.assertEqual(response.data['created'], 2)
+
+        response, _ = self._submit({numbers[0]: 19, 'unknown': 10, numbers[1]: 25})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(len(response.data['errors']), 2)
+        self.assertEqual(Grade.objects.get(selection__student__username=numbers[0]).score, 17)
+
+
+class ScheduleExportTest(SelectionTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.term.start_date, self.term.end_date = date(2025, 9, 20), date(2026, 1, 10)
+        self.term.save()
+        self.client = APIClient()
+        for code, day, location in (('C1', 'شنبه', 'کلاس ۱۰۱'), ('C2', 'سه‌شنبه', '')):
+            course = self.make_course(code, day=day, start_time=time(8), end_time=time(10), location=location)
+            CourseSelection.objects.create(student=self.student, course=course)
+
+    def test_ical_has_weekly_recurring_events(self):
+        self.client.force_authenticate(self.student)
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/selection/selections/schedule-ical/')
+        body = response.content.decode()
+        self.assertTrue(body.startswith('BEGIN:VCALENDAR\r\n'))
+        self.assertIn('DTSTART:20250920T080000', body)
+        self.assertIn('RRULE:FREQ=WEEKLY;BYDAY=TU;UNTIL=20260110T235959', body)
+        self.assertIn('DTSTART:20250923T080000', body)
+        self.assertIn('LOCATION:کلاس ۱۰۱', body)
+
+        compact = self.client.get('/api/selection/selections/schedule-compact/').data
+        self.assertEqual(compact['courses'][1][:5], ['C2', 'درس C2', 3, '08:00', '10:00'])
+
+    def test_admin_zip_export_per_student(self):
+        other = self.make_student('s2')
+        CourseSelection.objects.create(student=other, course=Course.objects.get(code='C1'))
+        self.client.force_authenticate(User.objects.create(username='admin', role='admin'))
+        response = self.client.get(f'/api/selection/selections/export-schedules/?term_id={self.term.id}')
+        archive = zipfile.ZipFile(BytesIO(b''.join(response.streaming_content)))
+        self.assertEqual(sorted(archive.namelist()), ['s1.ics', 's2.ics'])
+        self.assertEqual(archive.read('s2.ics').decode().count('BEGIN:VEVENT'), 1)
+
+    def test_invalid_term_id_is_bad_request(self):
+        self.client.force_authenticate(self.student)
+        for path in ('schedule-ical', 'schedule-compact', 'conflicting-courses', 'report-card'):
+            response = self.client.get(f'/api/selection/selections/{path}/?term_id=abc')
+            self.assertEqual(response.status_code, 400, path)
+        self.client.force_authenticate(User.objects.create(username='admin', role='admin'))
+        for query in ('', '?term_id=abc', '?term_id=-1'):
+            response = self.client.get(f'/api/selection/selections/export-schedules/{query}')
+            self.assertEqual(response.status_code, 400, query)
+
+
+class PlannerTest(SelectionTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self._set_limit(4, 8)
+        self.client = APIClient()
+        self.client.force_authenticate(self.student)
+
+    def _set_limit(self, min_units, max_units):
+        limit = UnitLimit.objects.first()
+        limit.min_units, limit.max_units = min_units, max_units
+        limit.save()
+
+    def _plan(self, codes, top=10):
+        return self.client.get(f'/api/selection/selections/plan/?codes={",".join(codes)}&top={top}').data
+
+    def test_combinations_respect_conflicts_limits_and_rules(self):
+        self.make_course('A', units=3, day='شنبه', start_time=time(8), end_time=time(10))
+        self.make_course('B', units=3, day='شنبه', start_time=time(9), end_time=time(11))
+        self.make_course('C', units=2, day='یکشنبه', start_time=time(8), end_time=time(10))
+        self.make_course('D', units=3, day='دوشنبه', start_time=time(8), end_time=time(10))
+        self.make_course('FULL', units=1, capacity=0)
+        prereq = self.make_course('P', units=1)
+        Prerequisite.objects.create(course=self.make_course('NEEDS', units=1), prerequisite=prereq)
+
+        data = self._plan(['A', 'B', 'C', 'D', 'FULL', 'NEEDS', 'NOPE'])
+        self.assertTrue(data['complete'])
+        self.assertEqual(sorted(e['course_code'] for e in data['excluded']), ['FULL', 'NEEDS', 'NOPE'])
+        plans = [(sorted(p['course_codes']), p['total_units']) for p in data['plans']]
+        self.assertEqual(plans[0][1], 8)
+        self.assertIn((['A', 'C', 'D'], 8), plans)
+        self.assertNotIn(['A', 'B'], [codes for codes, _ in plans])
+        self.assertTrue(all(4 <= units <= 8 for _, units in plans))
+        self.assertEqual(len(self._plan(['A', 'B', 'C', 'D'], top=2)['plans']), 2)
+
+    def test_fifteen_course_wishlist_is_fast(self):
+        self._set_limit(12, 20)
+        days = ['شنبه', 'یکشنبه', 'دوشنبه', 'سه‌شنبه', 'چهارشنبه']
+        codes = []
+        for i in range(15):
+            start = 8 + (i % 3) * 2
+            self.make_course(f'W{i}', units=2 + i % 2, day=days[i % 5], start_time=time(start), end_time=time(start + 2))
+            codes.append(f'W{i}')
+        started = time_module.perf_counter()
+        data = self._plan(codes, top=20)
+        self.assertLess(time_module.perf_counter() - started, 0.5)
+        self.assertEqual(len(data['plans']), 20)
+        self.assertEqual(data['plans'][0]['total_units'], 20)
+
+
+class SeedLoadtestTest(TestCase):
+    def test_seed_shares_one_hash_and_requires_reset(self):
+        UnitLimit.objects.create(min_units=6, max_units=20)
+        with tempfile.TemporaryDirectory() as workdir:
+            manifest_path = f'{workdir}/manifest.json'
+            args = ['seed_loadtest', '--students', '5', '--courses', '6', '--picks', '2', '--manifest', manifest_path]
+            call_command(*args, stdout=StringIO())
+            with open(manifest_path, encoding='utf-8') as source:
+                manifest = json.load(source)
+
+            students = User.objects.filter(role='student', username__startswith='lt-')
+            self.assertEqual(students.count(), 5)
+            self.assertEqual(len(set(students.values_list('password', flat=True))), 1)
+            self.assertTrue(students.first().check_password(manifest['password']))
+            self.assertEqual(manifest['capacity'], 2)
+            self.assertEqual(Course.objects.filter(code__startswith='LT-', term_id=manifest['term_id']).count(), 6)
+            self.assertTrue(get_policy().is_selection_open(manifest['term_id']))
+
+            with self.assertRaises(CommandError):
+                call_command(*args, stdout=StringIO())
+            call_command(*args, '--reset', stdout=StringIO())
+            self.assertEqual(Term.objects.filter(name__contains='آزمون بار').count(), 1)
+            self.assertEqual(User.objects.filter(username__startswith='lt-', role='student').count(), 5)
+
+
+class QueryBudgetTest(QueryBudgetTestMixin, SelectionTestMixin, TestCase):
+    """تعداد کوئری اندپوینت‌های پرترافیک نباید با تعداد ردیف‌ها رشد کند"""
+
+    def select_courses(self, start, stop, finalized=False):
+        for i in range(start, stop):
+            CourseSelection.objects.create(student=self.student, course=self.make_course(f'Q{i}'), is_finalized=finalized)
+
+    def test_draft(self):
+        self.assertQueryBudget('/api/selection/selections/draft/', self.select_courses, self.student)
+
+    def test_schedule(self):
+        self.assertQueryBudget('/api/selection/selections/schedule/', self.select_courses, self.student)
+
+    def test_selection_list(self):
+        self.assertQueryBudget('/api/selection/selections/?page_size=100', self.select_courses, self.student)
+
+    def test_report_card(self):
+        def graded(start, stop):
+            self.select_courses(start, stop, finalized=True)
+            for selection in CourseSelection.objects.filter(grade__isnull=True):
+                Grade.objects.create(selection=selection, score=15)
+
+        self.assertQueryBudget(f'/api/selection/selections/report-card/?term_id={self.term.id}', graded, self.student)
+
+    def test_professor_students(self):
+        course = self.make_course('P1', capacity=100)
+
+        def enroll(start, stop):
+            for i in range(start, stop):
+                CourseSelection.objects.create(student=self.make_student(f'q{i}'), course=course)
+
+        self.assertQueryBudget('/api/selection/professor/P1/students/', enroll, self.professor)
@@ -0,0 +1,133 @@
+"""
+نگه‌داری کارنامه‌ی آماده (TermSummary).
+
+با هر تغییر نمره یا انتخاب نهایی فقط کارنامه‌ی نیم‌سال‌های تغییرکرده‌ی همان دانشجویان از روی
+انتخاب‌های نهایی آن نیم‌سال دوباره ساخته می‌شود و سپس مقادیر تجمعی دانشجو به‌روز می‌شوند.
+همه‌چیز دسته‌ای است تا ثبت نمره‌ی یک کلاس کامل هم با چند کوئری انجام شود.
+"""
+from collections import defaultdict
+
+from .models import CourseSelection, TermSummary
+
+UNKNOWN = "نامشخص"
+PASSING_SCORE = 10
+SUMMARY_FIELDS = ['courses', 'attempted_units', 'graded_units', 'passed_units', 'weighted_score', 'gpa']
+CUMULATIVE_FIELDS = ['cumulative_units', 'cumulative_passed_units', 'cumulative_weighted_score', 'cumulative_gpa']
+
+
+def summarize_term(rows):
+    """مقادیر کارنامه‌ی یک نیم‌سال از ردیف‌های (کد، نام، واحد، نمره، وضعیت) مرتب‌شده"""
+    summary = {'courses': [], 'attempted_units': 0, 'graded_units': 0, 'passed_units': 0, 'weighted_score': 0.0}
+    for _code, name, units, score, status in rows:
+        summary['courses'].append({
+            "course": name,
+            "units": units,
+            "score": score if score is not None else UNKNOWN,
+            "status": status if score is not None else UNKNOWN,
+        })
+        summary['attempted_units'] += units
+        if score is not None:
+            summary['graded_units'] += units
+            summary['weighted_score'] += score * units
+            if score >= PASSING_SCORE:
+                summary['passed_units'] += units
+    summary['gpa'] = summary['weighted_score'] / summary['graded_units'] if summary['graded_units'] else 0
+    return summary
+
+
+def accumulate(summaries):
+    """مقادیر تجمعی کارنامه‌های یک دانشجو که به ترتیب نیم‌سال مرتب شده‌اند"""
+    units = passed = 0
+    weighted = 0.0
+    for summary in summaries:
+        units += summary.graded_units
+        passed += summary.passed_units
+        weighted += summary.weighted_score
+        summary.cumulative_units = units
+        summary.cumulative_passed_units = passed
+        summary.cumulative_weighted_score = weighted
+        summary.cumulative_gpa = weighted / units if units else 0
+
+
+def refresh_term_summaries(pairs):
+    """بازسازی کارنامه‌ی (student_id, term_id)های داده‌شده و مقادیر تجمعی آن دانشجویان"""
+    pairs = {(student_id, term_id) for student_id, term_id in pairs if term_id is not None}
+    if not pairs:
+        return
+    student_ids = {student_id for student_id, _ in pairs}
+    term_ids = {term_id for _, term_id in pairs}
+
+    rows = defaultdict(list)
+    selections = (
+        CourseSelection.objects.filter(student_id__in=student_ids, course__term_id__in=term_ids, is_finalized=True)
+        .order_by('course__code')
+        .values_list('student_id', 'course__term_id', 'course__code', 'course__name', 'course__units',
+                     'grade__score', 'grade__status')
+    )
+    for student_id, term_id, *row in selections:
+        if (student_id, term_id) in pairs:
+            rows[student_id, term_id].append(row)
+
+    existing = {
+        (summary.student_id, summary.term_id): summary
+        for summary in TermSummary.objects.filter(student_id__in=student_ids, term_id__in=term_ids)
+    }
+    created, updated, emptied = [], [], []
+    for pair in pairs:
+        summary = existing.get(pair)
+        if not rows[pair]:
+            if summary is not None:
+                emptied.append(summary.pk)
+            continue
+        values = summarize_term(rows[pair])
+        if summary is None:
+            created.append(TermSummary(student_id=pair[0], term_id=pair[1], **values))
+        else:
+            for field, value in values.items():
+                setattr(summary, field, value)
+            updated.append(summary)
+
+    if emptied:
+        TermSummary.objects.filter(pk__in=emptied).delete()
+    if created:
+        TermSummary.objects.bulk_create(created, batch_size=500)
+    if updated:
+        TermSummary.objects.bulk_update(updated, SUMMARY_FIELDS, batch_size=500)
+    refresh_cumulative(student_ids)
+
+
+def refresh_cumulative(student_ids):
+    by_student = defaultdict(list)
+    summaries = TermSummary.objects.filter(student_id__in=student_ids).order_by(
+        'student_id', 'term__start_selection', 'term_id'
+    )
+    for summary in summaries:
+        by_student[summary.student_id].append(summary)
+    changed = []
+    for student_summaries in by_student.values():
+        accumulate(student_summaries)
+        changed.extend(student_summaries)
+    if changed:
+        TermSummary.objects.bulk_update(changed, CUMULATIVE_FIELDS, batch_size=500)
+
+
+def refresh_for_selections(selection_ids):
+    """بازسازی کارنامه‌ی نیم‌سال‌هایی که این انتخاب‌ها در آن‌ها هستند"""
+    refresh_term_summaries(
+        CourseSelection.objects.filter(pk__in=selection_ids).values_list('student_id', 'course__term_id').distinct()
+    )
+
+
+def rebuild_all(batch_size=500):
+    """بازسازی کامل همه‌ی کارنامه‌ها به تفکیک دسته‌های دانشجو؛ برای پر کردن اولیه یا اصلاح"""
+    TermSummary.objects.all().delete()
+    student_ids = list(
+        CourseSelection.objects.filter(is_finalized=True).values_list('student_id', flat=True).distinct().order_by('student_id')
+    )
+    for start in range(0, len(student_ids), batch_size):
+        pairs = (
+            CourseSelection.objects.filter(is_finalized=True, student_id__in=student_ids[start:start + batch_size])
+            .values_list('student_id', 'course__term_id').distinct()
+        )
+        refresh_term_summaries(pairs)
+    return len(student_ids)
@@ -1,9 +1,17 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import SelectionViewSet, ProfessorViewSet
+from .views import SelectionViewSet, ProfessorViewSet, WaitingRoomViewSet
+from . import async_views
 
 router = DefaultRouter()
 router.register(r'selections', SelectionViewSet, basename='selection')
 router.register(r'professor', ProfessorViewSet, basename='professor')
+router.register(r'waiting-room', WaitingRoomViewSet, basename='waiting-room')
 
-urlpatterns = router.urls
\ No newline at end of file
+urlpatterns = router.urls
+
+urlpatterns += [
+    path('async/draft/', async_views.draft, name='async-draft'),
+    path('async/schedule/', async_views.schedule, name='async-schedule'),
+    path('async/select-course/', async_views.select_course, name='async-select-course'),
+]
\ No newline at end of file
@@ -1,28 +1,120 @@
+import csv
+import io
+
 from django.core.exceptions import ValidationError
+from django.db import transaction
 from django.db.models import Sum
 from rest_framework import viewsets, status
+from rest_framework.exceptions import ValidationError as DRFValidationError
 from rest_framework.response import Response
 from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
+from django.http import HttpResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
-from .models import CourseSelection, Grade
-from .serializers import CourseSelectionSerializer
+from .models import CourseSelection, TermSummary
+from .transcripts import refresh_term_summaries
+from .serializers import CourseSelectionSerializer, WaitlistEntrySerializer
 from .services import SelectionService
+from .repositories import SelectionRepository
+from .planner import DEFAULT_TOP, MAX_TOP, MAX_WISHLIST, SchedulePlanner
+from .schedule import compact_payload, ical_lines, stream_term_zip, student_schedule
+from .waiting_room import IsAdmitted, WaitingRoom
 from courses.models import Course, Term
-from courses.models import UnitLimit
+from courses.policy import get_policy
 from users.models import User
+from core.pagination import IdPagination
+from core.query_budget import query_budget
+
+# حداکثر تعداد درس در یک درخواست انتخاب گروهی
+MAX_BATCH_SELECTION = 20
+
+# عملیات نوشتنی که پشت صف انتظار قرار می‌گیرند
+WAITING_ROOM_ACTIONS = {
+    'create', 'destroy', 'select_course', 'select_courses', 'delete_selection', 'finalize',
+    'join_waitlist', 'leave_waitlist',
+}
+
+
+def draft_payload(selections):
+    """خروجی لیست موقت انتخاب واحد (مشترک بین ویوهای sync و async)"""
+    data = [
+        {
+            "course_code": sel.course.code,
+            "course_name": sel.course.name,
+            "units": sel.course.units,
+        }
+        for sel in selections
+    ]
+    total_units = sum(s["units"] for s in data)
+    return {"courses": data, "total_units": total_units}
+
+
+def schedule_payload(selections):
+    """برنامه‌ی هفتگی گروه‌بندی‌شده بر اساس روز"""
+    schedule = {}
+    for sel in selections:
+        day = sel.course.day
+        if day not in schedule:
+            schedule[day] = []
+        schedule[day].append({
+            'course': sel.course.name,
+            'time': f"{sel.course.start_time} - {sel.course.end_time}",
+            'location': sel.course.location
+        })
+    return schedule
+
+
+def term_id_param(request):
+    """term_id اختیاری query string به صورت عدد صحیح؛ برای مقدار نامعتبر ValidationError"""
+    value = request.query_params.get('term_id')
+    if not value:
+        return None
+    try:
+        term_id = int(value)
+    except ValueError:
+        term_id = 0
+    if term_id < 1:
+        raise ValidationError("term_id باید شناسه‌ی عددی نیم‌سال باشد.")
+    return term_id
+
 
 class SelectionViewSet(viewsets.ModelViewSet):
     serializer_class = CourseSelectionSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = IdPagination
+    # جابه‌جایی انتخاب با PUT/PATCH از شمارنده‌ی ظرفیت عبور نمی‌کرد؛ تغییر درس = حذف و انتخاب دوباره
+    http_method_names = ['get', 'post', 'delete', 'head', 'options']
+
+    def get_permissions(self):
+        if self.action in WAITING_ROOM_ACTIONS:
+            return [IsAuthenticated(), IsAdmitted()]
+        return super().get_permissions()
 
     def get_queryset(self):
+        # نام درس در CourseSelectionSerializer از همان join خوانده می‌شود
         if self.request.user.role == 'student':
-            return CourseSelection.objects.filter(student=self.request.user)
+            return CourseSelection.objects.filter(student=self.request.user).select_related('course')
         elif self.request.user.role == 'professor':
-            return CourseSelection.objects.filter(course__professor=self.request.user)
+            return CourseSelection.objects.filter(course__professor=self.request.user).select_related('course')
         return CourseSelection.objects.none()
 
+    @query_budget(1)
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @transaction.atomic
+    def perform_create(self, serializer):
+        # ثبت مستقیم هم باید از شمارنده‌ی ظرفیت عبور کند
+        if not SelectionRepository().reserve_seat(serializer.validated_data['course']):
+            raise DRFValidationError({"errors": ["ظرفیت درس پر شده است."]})
+        serializer.save()
+
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        # حذف مستقیم هم باید صندلی درس را آزاد کند و نفر بعدی لیست انتظار را ثبت کند
+        SelectionRepository().remove_selection(instance)
+        SelectionService().promote_waitlist(instance.course)
+
     @action(detail=False, methods=['post'], url_path='select-course')
     def select_course(self, request):
         if request.user.role != 'student':
@@ -30,7 +122,7 @@ class SelectionViewSet(viewsets.ModelViewSet):
         course_code = request.data.get('course_code')
         if not course_code:
             return Response({"error": "کد درس (course_code) الزامی است."}, status=status.HTTP_400_BAD_REQUEST)
-        course = get_object_or_404(Course, code=course_code)
+        course = get_object_or_404(Course.objects.select_related('term'), code=course_code)
         try:
             selection = SelectionService().select_course(request.user, course)
             serializer = self.serializer_class(selection)
@@ -38,6 +130,49 @@ class SelectionViewSet(viewsets.ModelViewSet):
         except ValidationError as e:
             return Response({"errors": e.messages}, status=status.HTTP_400_BAD_REQUEST)
 
+    @action(detail=False, methods=['post'], url_path='select-courses')
+    def select_courses(self, request):
+        """انتخاب چند درس با یک درخواست؛ mode=atomic (پیش‌فرض) یا partial"""
+        if request.user.role != 'student':
+            return Response({"error": "فقط دانشجویان می‌توانند درس انتخاب کنند."}, status=status.HTTP_403_FORBIDDEN)
+        course_codes = request.data.get('course_codes')
+        if not isinstance(course_codes, list) or not course_codes:
+            return Response({"error": "لیست کد دروس (course_codes) الزامی است."}, status=status.HTTP_400_BAD_REQUEST)
+        if len(course_codes) > MAX_BATCH_SELECTION:
+            return Response({"error": f"حداکثر {MAX_BATCH_SELECTION} درس در هر درخواست مجاز است."},
+                            status=status.HTTP_400_BAD_REQUEST)
+        mode = request.data.get('mode', 'atomic')
+        if mode not in ('atomic', 'partial'):
+            return Response({"error": "mode باید atomic یا partial باشد."}, status=status.HTTP_400_BAD_REQUEST)
+
+        codes = list(dict.fromkeys(str(code) for code in course_codes))
+        courses = {c.code: c for c in Course.objects.select_related('term').filter(code__in=codes)}
+        missing = {code: ["درسی با این کد پیدا نشد."] for code in codes if code not in courses}
+        if missing and mode == 'atomic':
+            return Response({"errors": missing}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            results = SelectionService().select_courses(
+                request.user, [courses[code] for code in codes if code in courses], atomic=(mode == 'atomic')
+            )
+        except ValidationError as e:
+            return Response({"errors": e.message_dict}, status=status.HTTP_400_BAD_REQUEST)
+
+        items = {
+            item["course"].code: {
+                "course_code": item["course"].code,
+                "created": item["selection"] is not None,
+                "errors": item["errors"],
+                "selection": self.serializer_class(item["selection"]).data if item["selection"] else None,
+            }
+            for item in results
+        }
+        for code, errors in missing.items():
+            items[code] = {"course_code": code, "created": False, "errors": errors, "selection": None}
+        data = [items[code] for code in codes]
+        created = any(item["created"] for item in data)
+        return Response({"results": data}, status=status.HTTP_201_CREATED if created else status.HTTP_400_BAD_REQUEST)
+
     @action(detail=False, methods=['delete'], url_path='delete-selection')
     def delete_selection(self, request):
         if request.user.role != 'student':
@@ -52,39 +187,129 @@ class SelectionViewSet(viewsets.ModelViewSet):
         except ValidationError as e:
             return Response({"errors": e.messages}, status=status.HTTP_400_BAD_REQUEST)
 
+    @action(detail=False, methods=['post'], url_path='join-waitlist')
+    def join_waitlist(self, request):
+        """ورود به لیست انتظار درسی که ظرفیتش پر شده است"""
+        if request.user.role != 'student':
+            return Response({"error": "فقط دانشجویان می‌توانند در لیست انتظار قرار بگیرند."}, status=status.HTTP_403_FORBIDDEN)
+        course_code = request.data.get('course_code')
+        if not course_code:
+            return Response({"error": "کد درس (course_code) الزامی است."}, status=status.HTTP_400_BAD_REQUEST)
+        course = get_object_or_404(Course.objects.select_related('term'), code=course_code)
+        try:
+            SelectionService().join_waitlist(request.user, course)
+        except ValidationError as e:
+            return Response({"errors": e.messages}, status=status.HTTP_400_BAD_REQUEST)
+        entry = SelectionRepository().get_student_waitlist(request.user).get(course=course)
+        return Response(WaitlistEntrySerializer(entry).data, status=status.HTTP_201_CREATED)
+
+    @action(detail=False, methods=['delete'], url_path='leave-waitlist')
+    def leave_waitlist(self, request):
+        if request.user.role != 'student':
+            return Response({"error": "فقط دانشجویان می‌توانند از لیست انتظار خارج شوند."}, status=status.HTTP_403_FORBIDDEN)
+        course_code = request.query_params.get('course_code')
+        if not course_code:
+            return Response({"error": "کد درس (course_code) الزامی است."}, status=status.HTTP_400_BAD_REQUEST)
+        course = get_object_or_404(Course, code=course_code)
+        try:
+            SelectionService().leave_waitlist(request.user, course)
+            return Response({"success": "از لیست انتظار درس خارج شدید."})
+        except ValidationError as e:
+            return Response({"errors": e.messages}, status=status.HTTP_400_BAD_REQUEST)
+
+    @action(detail=False, methods=['get'], url_path='waitlist')
+    def waitlist(self, request):
+        """لیست‌های انتظار دانشجو و جایگاه او در هر کدام"""
+        if request.user.role != 'student':
+            return Response({"error": "فقط دانشجویان لیست انتظار دارند."}, status=status.HTTP_403_FORBIDDEN)
+        entries = SelectionRepository().get_student_waitlist(request.user)
+        return Response(WaitlistEntrySerializer(entries, many=True).data)
+
     @action(detail=False, methods=['get'], url_path='draft')
+    @query_budget(1)
     def draft_selections(self, request):
         """لیست دروس انتخاب‌شده قبل از نهایی کردن انتخاب واحد (فقط دانشجو)"""
         if request.user.role != 'student':
             return Response({"error": "فقط دانشجویان می‌توانند لیست انتخاب واحد خود را ببینند."}, status=status.HTTP_403_FORBIDDEN)
-        selections = CourseSelection.objects.filter(student=request.user, is_finalized=False)
-        data = [
-            {
-                "course_code": sel.course.code,
-                "course_name": sel.course.name,
-                "units": sel.course.units,
-            }
-            for sel in selections
-        ]
-        total_units = sum(s["units"] for s in data)
-        return Response({"courses": data, "total_units": total_units})
+        selections = CourseSelection.objects.filter(student=request.user, is_finalized=False).select_related('course')
+        return Response(draft_payload(selections))
 
     @action(detail=False, methods=['get'], url_path='schedule')
+    @query_budget(1)
     def get_schedule(self, request):
         if request.user.role != 'student':
             return Response({"error": "فقط دانشجویان می‌توانند برنامه ببینند."}, status=status.HTTP_403_FORBIDDEN)
-        selections = self.get_queryset()
-        schedule = {}
-        for sel in selections:
-            day = sel.course.day
-            if day not in schedule:
-                schedule[day] = []
-            schedule[day].append({
-                'course': sel.course.name,
-                'time': f"{sel.course.start_time} - {sel.course.end_time}",
-                'location': sel.course.location
-            })
-        return Response(schedule)
+        selections = self.get_queryset().select_related('course')
+        return Response(schedule_payload(selections))
+
+    @action(detail=False, methods=['get'], url_path='plan')
+    def plan(self, request):
+        """ترکیب‌های بدون تداخل از دروس دلخواه (?codes=A,B,C&top=10)؛ چیزی ثبت نمی‌شود"""
+        if request.user.role != 'student':
+            return Response({"error": "فقط دانشجویان می‌توانند برنامه‌ریزی کنند."}, status=status.HTTP_403_FORBIDDEN)
+        codes = [code for code in request.query_params.get('codes', '').split(',') if code.strip()]
+        if not codes:
+            return Response({"errors": ["لیست codes خالی است."]}, status=status.HTTP_400_BAD_REQUEST)
+        if len(codes) > MAX_WISHLIST:
+            return Response({"errors": [f"حداکثر {MAX_WISHLIST} درس را می‌توان بررسی کرد."]}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            top = min(max(int(request.query_params.get('top', DEFAULT_TOP)), 1), MAX_TOP)
+        except ValueError:
+            top = DEFAULT_TOP
+        return Response(SchedulePlanner(request.user).plan(codes, top=top))
+
+    @action(detail=False, methods=['get'], url_path='schedule-ical')
+    def schedule_ical(self, request):
+        """برنامه‌ی هفتگی به صورت iCalendar با رویدادهای تکرارشونده در طول نیم‌سال (term_id اختیاری)"""
+        if request.user.role != 'student':
+            return Response({"error": "فقط دانشجویان می‌توانند برنامه ببینند."}, status=status.HTTP_403_FORBIDDEN)
+        try:
+            term_id = term_id_param(request)
+        except ValidationError as e:
+            return Response({"errors": e.messages}, status=status.HTTP_400_BAD_REQUEST)
+        rows = student_schedule(request.user, term_id)
+        response = HttpResponse(''.join(ical_lines(rows)), content_type='text/calendar; charset=utf-8')
+        response['Content-Disposition'] = f'attachment; filename="{request.user.username}.ics"'
+        return response
+
+    @action(detail=False, methods=['get'], url_path='schedule-compact')
+    def schedule_compact(self, request):
+        """برنامه‌ی هفتگی به شکل JSON فشرده (term_id اختیاری)"""
+        if request.user.role != 'student':
+            return Response({"error": "فقط دانشجویان می‌توانند برنامه ببینند."}, status=status.HTTP_403_FORBIDDEN)
+        try:
+            term_id = term_id_param(request)
+        except ValidationError as e:
+            return Response({"errors": e.messages}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(compact_payload(student_schedule(request.user, term_id)))
+
+    @action(detail=False, methods=['get'], url_path='export-schedules')
+    def export_schedules(self, request):
+        """فایل zip تقویم همه‌ی دانشجویان یک نیم‌سال به صورت جریانی (فقط مدیر)"""
+        if request.user.role != 'admin':
+            return Response({"error": "فقط مدیر می‌تواند برنامه‌ها را خروجی بگیرد."}, status=status.HTTP_403_FORBIDDEN)
+        try:
+            term_id = term_id_param(request)
+        except ValidationError as e:
+            return Response({"errors": e.messages}, status=status.HTTP_400_BAD_REQUEST)
+        if term_id is None:
+            return Response({"errors": ["نیم‌سال (term_id) را مشخص کنید."]}, status=status.HTTP_400_BAD_REQUEST)
+        term = get_object_or_404(Term, id=term_id)
+        response = StreamingHttpResponse(stream_term_zip(term.id), content_type='application/zip')
+        response['Content-Disposition'] = f'attachment; filename="schedules-term-{term.id}.zip"'
+        return response
+
+    @action(detail=False, methods=['get'], url_path='conflicting-courses')
+    def conflicting_courses(self, request):
+        """دروسی از کاتالوگ که با برنامه‌ی فعلی دانشجو تداخل زمانی دارند"""
+        if request.user.role != 'student':
+            return Response({"error": "فقط دانشجویان می‌توانند برنامه ببینند."}, status=status.HTTP_403_FORBIDDEN)
+        try:
+            term_id = term_id_param(request)
+        except ValidationError as e:
+            return Response({"errors": e.messages}, status=status.HTTP_400_BAD_REQUEST)
+        codes = SelectionRepository().get_conflicting_course_codes(request.user, term=term_id)
+        return Response({"course_codes": codes})
 
     @action(detail=False, methods=['post'], url_path='finalize')
     def finalize(self, request):
@@ -99,7 +324,7 @@ class SelectionViewSet(viewsets.ModelViewSet):
 
         total_units = selections.aggregate(total=Sum('course__units'))['total'] or 0
 
-        limit = UnitLimit.objects.first() or UnitLimit(min_units=12, max_units=20)
+        limit = get_policy().unit_limit
 
         if total_units < limit.min_units:
             return Response({
@@ -111,8 +336,11 @@ class SelectionViewSet(viewsets.ModelViewSet):
                 "detail": f"تعداد واحد انتخاب‌شده ({total_units}) بیشتر از حداکثر مجاز ({limit.max_units}) است"
             }, status=400)
 
-    # نهایی کردن
+    # نهایی کردن، ساخت کارنامه‌ی نیم‌سال و آزاد کردن نوبت صف انتظار برای نفر بعدی
+        term_ids = set(selections.values_list('course__term_id', flat=True))
         selections.update(is_finalized=True)
+        refresh_term_summaries((request.user.pk, term_id) for term_id in term_ids)
+        WaitingRoom().leave(request.user)
 
         return Response({
             "detail": "انتخاب واحد با موفقیت نهایی شد",
@@ -120,48 +348,61 @@ class SelectionViewSet(viewsets.ModelViewSet):
         })
 
     @action(detail=False, methods=['get'], url_path='report-card')
+    @query_budget(2)
     def get_report_card(self, request):
-        term_id = request.query_params.get('term_id')
-        if not term_id:
+        try:
+            term_id = term_id_param(request)
+        except ValidationError as e:
+            return Response({"errors": e.messages}, status=400)
+        if term_id is None:
             return Response({"error": "نیم‌سال را مشخص کنید"}, status=400)
 
-        term = get_object_or_404(Term, id=term_id)
-        selections = CourseSelection.objects.filter(student=request.user, course__term=term, is_finalized=True)
-        data = []
-        total_units = 0
-        total_score = 0
-
-        for sel in selections:
-            grade = Grade.objects.filter(selection=sel).first()
-            score = grade.score if grade else "نامشخص"
-            status = grade.status if grade else "نامشخص"
-            data.append({
-                "course": sel.course.name,
-                "units": sel.course.units,
-                "score": score,
-                "status": status
-            })
-            if score != "نامشخص":
-                total_units += sel.course.units
-                total_score += score * sel.course.units
-
-        gpa = total_score / total_units if total_units > 0 else 0
+        # کارنامه‌ی آماده با یک کوئری؛ نمره‌ها هنگام ثبت در TermSummary خلاصه شده‌اند
+        summary = TermSummary.objects.select_related('term').filter(student=request.user, term_id=term_id).first()
+        if summary is None:
+            term = get_object_or_404(Term, id=term_id)
+            return Response({"term": term.name, "courses": [], "gpa": 0})
 
         return Response({
-            "term": term.name,
-            "courses": data,
-            "gpa": round(gpa, 2)
+            "term": summary.term.name,
+            "courses": summary.courses,
+            "gpa": round(summary.gpa, 2),
+            "attempted_units": summary.attempted_units,
+            "passed_units": summary.passed_units,
+            "cumulative_gpa": round(summary.cumulative_gpa, 2),
+            "cumulative_passed_units": summary.cumulative_passed_units,
         })
 
+class WaitingRoomViewSet(viewsets.ViewSet):
+    """نوبت‌گیری و پیگیری وضعیت صف انتظار انتخاب واحد"""
+    permission_classes = [IsAuthenticated]
+
+    @action(detail=False, methods=['post'], url_path='join')
+    def join(self, request):
+        if request.user.role != 'student':
+            return Response({"error": "فقط دانشجویان می‌توانند در صف انتخاب واحد قرار بگیرند."}, status=status.HTTP_403_FORBIDDEN)
+        return Response(WaitingRoom().join(request.user))
+
+    @action(detail=False, methods=['get'], url_path='status')
+    def get_status(self, request):
+        return Response(WaitingRoom().status(request.user))
+
+    @action(detail=False, methods=['delete'], url_path='leave')
+    def leave(self, request):
+        WaitingRoom().leave(request.user)
+        return Response({"success": "از صف انتظار خارج شدید."})
+
+
 class ProfessorViewSet(viewsets.ViewSet):
     permission_classes = [IsAuthenticated]
 
     @action(detail=True, methods=['get'], url_path='students')
+    @query_budget(2)
     def get_students(self, request, pk=None):
         if request.user.role != 'professor':
             return Response({"error": "فقط اساتید می‌توانند لیست دانشجویان ببینند."}, status=status.HTTP_403_FORBIDDEN)
         course = get_object_or_404(Course, code=pk, professor=request.user)
-        students = CourseSelection.objects.filter(course=course).order_by('student__last_name')
+        students = CourseSelection.objects.filter(course=course).select_related('course').order_by('student__last_name')
         serializer = CourseSelectionSerializer(students, many=True)
         return Response(serializer.data)
 
@@ -178,4 +419,26 @@ class ProfessorViewSet(viewsets.ViewSet):
             SelectionService().professor_delete_student(request.user, course, student)
             return Response({"success": "دانشجو با موفقیت حذف شد."})
         except ValidationError as e:
-            return Response({"errors": e.messages}, status=status.HTTP_400_BAD_REQUEST)
\ No newline at end of file
+            return Response({"errors": e.messages}, status=status.HTTP_400_BAD_REQUEST)
+
+    @action(detail=True, methods=['post'], url_path='grades')
+    def submit_grades(self, request, pk=None):
+        """ثبت نمره‌ی گروهی: JSON به شکل {"grades": [{"student_number", "score"}]} یا فایل CSV با همین ستون‌ها"""
+        if request.user.role != 'professor':
+            return Response({"error": "فقط اساتید می‌توانند نمره ثبت کنند."}, status=status.HTTP_403_FORBIDDEN)
+        course = get_object_or_404(Course, code=pk, professor=request.user)
+        upload = request.FILES.get('file')
+        if upload is not None:
+            try:
+                rows = list(csv.DictReader(io.TextIOWrapper(upload, encoding='utf-8-sig')))
+            except (UnicodeDecodeError, csv.Error):
+                return Response({"errors": ["فایل CSV قابل خواندن نیست."]}, status=status.HTTP_400_BAD_REQUEST)
+        else:
+            rows = request.data.get('grades')
+            if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+                return Response({"errors": ["لیست grades ارسال نشده یا نامعتبر است."]}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            created, updated = SelectionService().submit_grades(request.user, course, rows)
+        except ValidationError as e:
+            return Response({"errors": e.messages}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({"success": "نمره‌ها با موفقیت ثبت شد.", "created": created, "updated": updated})
@@ -0,0 +1,108 @@
+"""
+صف انتظار انتخاب واحد.
+
+با فعال شدن نیم‌سال همه‌ی دانشجویان هم‌زمان درخواست می‌فرستند. دانشجو ابتدا در صف نوبت
+می‌گیرد (FIFO) و فقط وقتی تعداد دانشجویان فعال کمتر از سقف تعیین‌شده باشد پذیرفته می‌شود.
+نوبت پذیرفته‌شده مدت محدودی اعتبار دارد و با نهایی کردن یا خروج آزاد می‌شود.
+وضعیت صف در همان پایگاه داده نگه‌داری می‌شود و به سرویس خارجی نیازی ندارد.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.utils import timezone
+from rest_framework import permissions
+
+from .models import AdmissionTicket
+
+# فاصله‌ی حداقل بین دو بار جلو بردن صف هنگام پرس‌وجوی وضعیت (ثانیه، مشترک بین workerها)
+ADVANCE_INTERVAL = 1
+ADVANCE_THROTTLE_KEY = 'waiting-room:advanced'
+# شناسه‌ی قفل advisory پستگرس برای اجرای پشت سر هم advance
+ADVANCE_LOCK_ID = 7301
+
+
+class WaitingRoom:
+    def __init__(self):
+        config = settings.WAITING_ROOM
+        self.enabled = config['ENABLED']
+        self.max_active = config['MAX_ACTIVE']
+        self.ticket_ttl = timedelta(seconds=config['TICKET_TTL'])
+
+    @transaction.atomic
+    def join(self, student):
+        if not self.enabled:
+            return self.status(student)
+        # get_or_create درخواست هم‌زمان همان دانشجو (دوبار کلیک) را به جای IntegrityError به همان نوبت می‌رساند
+        ticket, _ = AdmissionTicket.objects.get_or_create(student=student)
+        if ticket.is_admitted and ticket.expires_at <= timezone.now():
+            # نوبت منقضی‌شده: دانشجو به انتهای صف برمی‌گردد
+            ticket.delete()
+            AdmissionTicket.objects.get_or_create(student=student)
+        self.advance()
+        return self.status(student)
+
+    @transaction.atomic
+    def leave(self, student):
+        if not self.enabled:
+            return
+        AdmissionTicket.objects.filter(student=student).delete()
+        self.advance()
+
+    def advance(self):
+        """حذف نوبت‌های منقضی و پذیرش قدیمی‌ترین منتظران تا سقف ظرفیت (داخل تراکنش فراخواننده)"""
+        self._lock()
+        now = timezone.now()
+        AdmissionTicket.objects.filter(admitted_at__isnull=False, expires_at__lte=now).delete()
+        free = self.max_active - AdmissionTicket.objects.filter(admitted_at__isnull=False).count()
+        if free <= 0:
+            return
+        waiting_ids = list(
+            AdmissionTicket.objects.filter(admitted_at__isnull=True)
+            .order_by('id').values_list('id', flat=True)[:free]
+        )
+        if waiting_ids:
+            AdmissionTicket.objects.filter(id__in=waiting_ids, admitted_at__isnull=True).update(
+                admitted_at=now, expires_at=now + self.ticket_ttl
+            )
+
+    def _lock(self):
+        # شمارش پذیرفته‌شده‌ها و پذیرش باید پشت سر هم باشند وگرنه دو worker هر دو ظرفیت خالی را پر می‌کنند.
+        # SQLite: تراکنش IMMEDIATE قفل نوشتن را از ابتدای تراکنش نگه می‌دارد
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT pg_advisory_xact_lock(%s)', [ADVANCE_LOCK_ID])
+
+    def status(self, student):
+        if not self.enabled:
+            return {"enabled": False, "state": "admitted", "position": 0, "expires_at": None}
+        # فقط یک worker در هر بازه صف را جلو می‌برد
+        if cache.add(ADVANCE_THROTTLE_KEY, True, ADVANCE_INTERVAL):
+            with transaction.atomic():
+                self.advance()
+        ticket = AdmissionTicket.objects.filter(student=student).first()
+        if ticket is None:
+            return {"enabled": True, "state": "none", "position": None, "expires_at": None}
+        if ticket.is_admitted:
+            state = "admitted" if ticket.expires_at > timezone.now() else "expired"
+            return {"enabled": True, "state": state, "position": 0, "expires_at": ticket.expires_at}
+        ahead = AdmissionTicket.objects.filter(admitted_at__isnull=True, id__lt=ticket.id).count()
+        return {"enabled": True, "state": "waiting", "position": ahead + 1, "expires_at": None}
+
+    def is_admitted(self, student):
+        if not self.enabled:
+            return True
+        return AdmissionTicket.objects.filter(
+            student=student, admitted_at__isnull=False, expires_at__gt=timezone.now()
+        ).exists()
+
+
+class IsAdmitted(permissions.BasePermission):
+    """فقط دانشجویانی که از صف انتظار پذیرفته شده‌اند"""
+    message = "ابتدا باید در صف انتظار انتخاب واحد نوبت بگیرید و منتظر پذیرش بمانید."
+
+    def has_permission(self, request, view):
+        if getattr(request.user, 'role', None) != 'student':
+            return True
+        return WaitingRoom().is_admitted(request.user)
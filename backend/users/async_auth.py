@@ -0,0 +1,49 @@
+"""احراز هویت JWT برای ویوهای async (DRF فقط ویوهای sync را پشتیبانی می‌کند)"""
+from functools import wraps
+
+from django.http import JsonResponse
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken, TokenError
+from rest_framework_simplejwt.settings import api_settings
+
+from .authentication import acurrent_version, check_claims, claims_user, has_claims, token_user_id
+from .models import User
+
+
+async def aauthenticate(request):
+    """کاربر صاحب توکن Authorization یا None"""
+    auth = JWTAuthentication()
+    header = auth.get_header(request)
+    raw_token = auth.get_raw_token(header) if header else None
+    if raw_token is None:
+        return None
+    try:
+        token = auth.get_validated_token(raw_token)
+    except (InvalidToken, TokenError):
+        return None
+    try:
+        user_id = token_user_id(token)
+        if has_claims(token):
+            token_version, is_active = await acurrent_version(user_id, token)
+            check_claims(token, token_version, is_active)
+            return claims_user(token, user_id, token_version)
+        # توکن قدیمی بدون ادعاها
+        user = await User.objects.filter(**{api_settings.USER_ID_FIELD: user_id}).afirst()
+        if user is None:
+            return None
+        check_claims(token, user.token_version, user.is_active)
+    except (InvalidToken, AuthenticationFailed):
+        return None
+    return user
+
+
+def async_jwt_required(view):
+    """معادل IsAuthenticated برای ویوهای async؛ کاربر در request.user قرار می‌گیرد"""
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        user = await aauthenticate(request)
+        if user is None:
+            return JsonResponse({"detail": "اطلاعات برای اعتبارسنجی ارسال نشده است."}, status=401)
+        request.user = user
+        return await view(request, *args, **kwargs)
+    return wrapper
@@ -1,17 +1,23 @@
 """Custom JWT views for logging login history (JWT doesn't trigger Django's user_logged_in signal)."""
 from rest_framework_simplejwt.views import TokenObtainPairView
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
-from .models import LoginHistory
+from .authentication import add_claims
+from .login_buffer import record_login
 
 
 class LoginHistoryTokenObtainPairSerializer(TokenObtainPairSerializer):
+    @classmethod
+    def get_token(cls, user):
+        # نقش و نسخه‌ی توکن در خود توکن تا احراز هویت نیازی به خواندن User نداشته باشد
+        return add_claims(super().get_token(user), user)
+
     def validate(self, attrs):
         data = super().validate(attrs)
         # ثبت ورود موفق در LoginHistory (JWT سیگنال user_logged_in را فراخوانی نمی‌کند)
         request = self.context.get('request')
         ip = request.META.get('REMOTE_ADDR') if request else None
         ua = request.META.get('HTTP_USER_AGENT') if request else None
-        LoginHistory.objects.create(
+        record_login(
             user=self.user,
             ip_address=ip,
             user_agent=ua,
@@ -0,0 +1,107 @@
+"""
+احراز هویت JWT بدون کوئری در مسیرهای پرترافیک.
+
+توکن هنگام صدور شامل username، role و نسخه‌ی توکن (ver) کاربر است. کاربر درخواست از همین
+ادعاهای امضاشده ساخته می‌شود و بقیه‌ی فیلدهایش deferred هستند؛ ویوهایی که فقط نقش و شناسه را
+می‌خوانند (بیشتر اندپوینت‌ها) ردیف User را نمی‌خوانند و اولین دسترسی به فیلد دیگری (نام، ایمیل و ...)
+همه‌ی آن‌ها را با یک کوئری بارگذاری می‌کند.
+
+باطل شدن توکن با (token_version, is_active) کاربر در کش مشترک (users/token_versions.py) بررسی می‌شود:
+با تغییر نقش یا غیرفعال شدن، token_version بالا می‌رود، کلید کش بعد از commit پاک می‌شود و توکن‌های
+قبلی در همه‌ی workerها رد می‌شوند. توکن‌های قدیمی بدون این ادعاها مثل قبل کاربر را از پایگاه داده می‌خوانند.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from .models import User
+from .token_versions import version_key
+
+VERSION_CLAIM = 'ver'
+# ادعاهایی که کاربر درخواست از آن‌ها ساخته می‌شود
+USER_CLAIMS = ('username', 'role')
+
+
+def add_claims(token, user):
+    """ادعاهای امضاشده‌ای که ClaimsJWTAuthentication به آن‌ها اعتماد می‌کند"""
+    token['username'] = user.username
+    token['role'] = user.role
+    token[VERSION_CLAIM] = user.token_version
+    return token
+
+
+def token_user_id(token):
+    try:
+        # simplejwt شناسه را به صورت رشته در توکن می‌گذارد
+        return int(token[api_settings.USER_ID_CLAIM])
+    except (KeyError, TypeError, ValueError):
+        raise InvalidToken(_("Token contained no recognizable user identification"))
+
+
+def has_claims(token):
+    return all(claim in token for claim in (*USER_CLAIMS, VERSION_CLAIM))
+
+
+def _stale(state, token):
+    # توکن جدیدتر از مقدار کش: کلید قبل از commit تغییر پر شده است
+    return state is None or token[VERSION_CLAIM] > state[0]
+
+
+def _remember(user_id, row):
+    if row is None:
+        raise AuthenticationFailed(_("User not found"), code="user_not_found")
+    state = tuple(row)
+    cache.set(version_key(user_id), state, settings.JWT_CLAIMS_AUTH['VERSION_CACHE_TTL'])
+    return state
+
+
+def current_version(user_id, token):
+    """(token_version, is_active) کاربر از کش مشترک؛ در نبود کلید یا کهنه بودنش از پایگاه داده"""
+    state = cache.get(version_key(user_id))
+    if _stale(state, token):
+        state = _remember(user_id, User.objects.filter(pk=user_id).values_list('token_version', 'is_active').first())
+    return state
+
+
+async def acurrent_version(user_id, token):
+    """نسخه‌ی async همان current_version"""
+    state = await cache.aget(version_key(user_id))
+    if _stale(state, token):
+        row = await User.objects.filter(pk=user_id).values_list('token_version', 'is_active').afirst()
+        state = _remember(user_id, row)
+    return state
+
+
+def check_claims(token, token_version, is_active):
+    """رد توکنِ کاربر غیرفعال یا توکنی که قبل از تغییر نقش/غیرفعال‌سازی صادر شده است"""
+    if not is_active:
+        raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+    version = token.get(VERSION_CLAIM)
+    if version is not None and version < token_version:
+        raise AuthenticationFailed("توکن باطل شده است؛ دوباره وارد شوید.", code="token_revoked")
+
+
+def claims_user(token, user_id, token_version):
+    """کاربر ساخته‌شده از ادعاهای توکن؛ فیلدهای دیگر در اولین دسترسی خوانده می‌شوند"""
+    values = {'id': user_id, 'username': token['username'], 'role': token['role'],
+              'is_active': True, 'token_version': token_version}
+    fields = [field.attname for field in User._meta.concrete_fields if field.attname in values]
+    user = User.from_db(DEFAULT_DB_ALIAS, fields, [values[name] for name in fields])
+    user._from_claims = True
+    return user
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    def get_user(self, validated_token):
+        user_id = token_user_id(validated_token)
+        if not has_claims(validated_token):
+            user = super().get_user(validated_token)
+            check_claims(validated_token, user.token_version, user.is_active)
+            return user
+        token_version, is_active = current_version(user_id, validated_token)
+        check_claims(validated_token, token_version, is_active)
+        return claims_user(validated_token, user_id, token_version)
@@ -0,0 +1,187 @@
+"""
+ورود گروهی دانشجو یا استاد از فایل CSV.
+
+فایل به صورت جریانی و دسته‌دسته خوانده می‌شود؛ در هر دسته تکراری‌ها با یک کوئری بررسی،
+رمزها (کد ملی) در چند پروسه هش و کاربران با bulk_create ثبت می‌شوند. هش PBKDF2 گلوگاه
+اصلی است، پس سرعت با تعداد هسته‌ها بالا می‌رود.
+
+فایل آپلودشده از API روی دیسک ذخیره و یک UserImportJob ساخته می‌شود؛ ورود در پروسه‌ی جداگانه‌ی
+`manage.py import_users --job <id>` اجرا می‌شود تا هش‌ها نه در worker وب (و مشمول timeout آن) انجام شوند
+و نه پروسه‌های هش از worker دارای thread فورک شوند. وضعیت و گزارش از روی job خوانده می‌شود.
+
+ستون‌ها: student_number یا personnel_number، national_code، first_name، last_name
+"""
+import csv
+import os
+import subprocess
+import sys
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .models import User, UserImportJob
+
+# ستون نام کاربری برای هر نقش (همان فیلدهای فرم ثبت تکی)
+USERNAME_COLUMNS = {'student': 'student_number', 'professor': 'personnel_number'}
+
+
+def _init_worker():
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+    import django
+    django.setup()
+
+
+class BulkUserImporter:
+    def __init__(self, role, workers=None, batch_size=None):
+        if role not in USERNAME_COLUMNS:
+            raise ValueError(f"نقش {role} برای ورود گروهی پشتیبانی نمی‌شود.")
+        config = settings.USER_IMPORT
+        self.role = role
+        self.username_column = USERNAME_COLUMNS[role]
+        self.workers = workers if workers is not None else (config['WORKERS'] or os.cpu_count() or 1)
+        self.batch_size = batch_size or config['BATCH_SIZE']
+        self.seen = set()
+        self.report = {"created": 0, "errors": []}
+
+    def run(self, lines):
+        """lines: هر iterable از خطوط متن (مثلاً فایل باز)؛ خروجی گزارش {created, errors}"""
+        reader = csv.DictReader(lines)
+        missing = {self.username_column, 'national_code'} - set(reader.fieldnames or ())
+        if missing:
+            raise ValidationError(f"ستون‌های {', '.join(sorted(missing))} در فایل وجود ندارد.")
+
+        # ردیف ۱ سرستون است
+        rows = enumerate(reader, start=2)
+        pool = ProcessPoolExecutor(self.workers, initializer=_init_worker) if self.workers > 1 else None
+        try:
+            while batch := list(islice(rows, self.batch_size)):
+                self._import_batch(batch, pool)
+        finally:
+            if pool is not None:
+                pool.shutdown()
+        self.report["errors"].sort(key=lambda error: error["row"])
+        return self.report
+
+    def _error(self, line, username, messages):
+        self.report["errors"].append({"row": line, "username": username, "errors": messages})
+
+    def _validate(self, batch):
+        valid = []
+        for line, row in batch:
+            username = User.normalize_username((row.get(self.username_column) or '').strip())
+            national_code = (row.get('national_code') or '').strip()
+            errors = []
+            if not username:
+                errors.append(f"{self.username_column} الزامی است.")
+            else:
+                try:
+                    User.username_validator(username)
+                except ValidationError as e:
+                    errors.extend(e.messages)
+                if len(username) > 150:
+                    errors.append("نام کاربری حداکثر ۱۵۰ کاراکتر است.")
+                if username in self.seen:
+                    errors.append("این نام کاربری در فایل تکراری است.")
+            if not national_code:
+                errors.append("national_code الزامی است.")
+            if errors:
+                self._error(line, username, errors)
+                continue
+            self.seen.add(username)
+            valid.append((line, username, national_code, row))
+
+        existing = set(
+            User.objects.filter(username__in=[username for _, username, _, _ in valid])
+            .values_list('username', flat=True)
+        )
+        for line, username, _, _ in valid:
+            if username in existing:
+                self._error(line, username, ["کاربری با این نام کاربری از قبل وجود دارد."])
+        return [item for item in valid if item[1] not in existing]
+
+    def _hash(self, passwords, pool):
+        if pool is None:
+            return [make_password(password) for password in passwords]
+        chunksize = max(1, len(passwords) // (self.workers * 4))
+        return list(pool.map(make_password, passwords, chunksize=chunksize))
+
+    def _import_batch(self, batch, pool):
+        valid = self._validate(batch)
+        if not valid:
+            return
+        hashes = self._hash([national_code for _, _, national_code, _ in valid], pool)
+        users = [
+            User(
+                username=username, password=password_hash, role=self.role,
+                first_name=(row.get('first_name') or '').strip()[:150],
+                last_name=(row.get('last_name') or '').strip()[:150],
+            )
+            for (_, username, _, row), password_hash in zip(valid, hashes)
+        ]
+        try:
+            with transaction.atomic():
+                User.objects.bulk_create(users)
+        except IntegrityError:
+            # کاربری هم‌زمان با همین نام ساخته شده؛ آن‌ها را کنار می‌گذاریم و بقیه را ثبت می‌کنیم
+            taken = set(User.objects.filter(username__in=[u.username for u in users]).values_list('username', flat=True))
+            for line, username, _, _ in valid:
+                if username in taken:
+                    self._error(line, username, ["کاربری با این نام کاربری از قبل وجود دارد."])
+            users = [user for user in users if user.username not in taken]
+            User.objects.bulk_create(users)
+        self.report["created"] += len(users)
+
+
+def save_upload(upload):
+    """ذخیره‌ی فایل آپلودشده در پوشه‌ی ورود گروهی؛ خروجی مسیر فایل"""
+    directory = Path(settings.USER_IMPORT['DIR'])
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f"{uuid.uuid4().hex}.csv"
+    with open(path, 'wb') as out:
+        for chunk in upload.chunks():
+            out.write(chunk)
+    return path
+
+
+def start_import_job(job):
+    """اجرای job بعد از commit در پروسه‌ی جداگانه؛ با BACKGROUND=False همین‌جا و همزمان"""
+    if not settings.USER_IMPORT['BACKGROUND']:
+        run_import_job(job.pk)
+        return
+    command = [sys.executable, str(settings.BASE_DIR / 'manage.py'), 'import_users', '--job', str(job.pk)]
+    # fork و بلافاصله exec: پروسه‌ی جدید threadهای worker را به ارث نمی‌برد و با پایان درخواست متوقف نمی‌شود
+    transaction.on_commit(lambda: subprocess.Popen(
+        command, start_new_session=True,
+        stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    ))
+
+
+def run_import_job(job_id, workers=None, batch_size=None):
+    """اجرای job در همین پروسه؛ jobی که قبلاً شروع شده دوباره اجرا نمی‌شود"""
+    if not UserImportJob.objects.filter(pk=job_id, status='pending').update(status='running'):
+        return UserImportJob.objects.get(pk=job_id)
+    job = UserImportJob.objects.get(pk=job_id)
+    try:
+        with open(job.file_path, encoding='utf-8-sig', newline='') as lines:
+            report = BulkUserImporter(job.role, workers=workers, batch_size=batch_size).run(lines)
+    except ValidationError as e:
+        job.status, job.message = 'failed', ' '.join(e.messages)
+    except UnicodeDecodeError:
+        job.status, job.message = 'failed', "فایل باید با کدگذاری UTF-8 باشد."
+    except Exception as e:
+        job.status, job.message = 'failed', str(e)[:500]
+        raise
+    else:
+        job.status, job.created, job.errors = 'done', report["created"], report["errors"]
+    finally:
+        job.finished_at = timezone.now()
+        job.save()
+        Path(job.file_path).unlink(missing_ok=True)
+    return job
@@ -0,0 +1,144 @@
+"""
+بایگانی تاریخچه‌ی ورود.
+
+رکوردهای قدیمی‌تر از مدت نگه‌داری از جدول LoginHistory به فایل‌های ماهانه‌ی NDJSON فشرده
+(login_history-YYYY-MM.ndjson.gz) منتقل می‌شوند تا جدول اصلی کوچک بماند و در کش پایگاه داده جا شود.
+انتقال دسته‌دسته است: هر دسته ابتدا به انتهای فایل ماه خودش اضافه و بعد از جدول حذف می‌شود.
+اگر بین این دو قطع شود، اجرای بعدی همان ردیف‌ها را دوباره می‌نویسد و خواندن با id تکراری‌ها را حذف می‌کند.
+
+خواندن صفحه‌به‌صفحه با cursor (login_at و id آخرین رکورد صفحه‌ی قبل) است: ماه‌های جدیدتر از cursor
+اصلاً باز نمی‌شوند و از ماه cursor فقط رکوردهای قدیمی‌تر از آن برگردانده می‌شوند.
+"""
+import base64
+import gzip
+import json
+import os
+from datetime import datetime, timezone as dt_timezone
+from pathlib import Path
+
+from django.conf import settings
+from django.utils.dateparse import parse_datetime
+
+from .models import LoginHistory
+
+FIELDS = ('id', 'user', 'login_at', 'ip_address', 'user_agent', 'is_success', 'failure_reason')
+FILE_PREFIX = 'login_history-'
+FILE_SUFFIX = '.ndjson.gz'
+
+
+def archive_dir():
+    return Path(settings.LOGIN_HISTORY_ARCHIVE['DIR'])
+
+
+def month_path(year, month):
+    return archive_dir() / f"{FILE_PREFIX}{year:04}-{month:02}{FILE_SUFFIX}"
+
+
+def archived_months():
+    """(سال، ماه) فایل‌های موجود، از جدید به قدیم"""
+    months = []
+    for path in archive_dir().glob(f"{FILE_PREFIX}*{FILE_SUFFIX}"):
+        stamp = path.name[len(FILE_PREFIX):-len(FILE_SUFFIX)]
+        try:
+            year, month = map(int, stamp.split('-'))
+        except ValueError:
+            continue
+        months.append((year, month))
+    return sorted(months, reverse=True)
+
+
+def _to_record(row):
+    record = dict(zip(FIELDS, row))
+    record['login_at'] = record['login_at'].astimezone(dt_timezone.utc).isoformat()
+    return record
+
+
+def archive_before(cutoff, chunk_size=None):
+    """انتقال رکوردهای قبل از cutoff به بایگانی؛ خروجی تعداد رکوردهای منتقل‌شده"""
+    chunk_size = chunk_size or settings.LOGIN_HISTORY_ARCHIVE['CHUNK_SIZE']
+    archive_dir().mkdir(parents=True, exist_ok=True)
+    queryset = (
+        LoginHistory.objects.filter(login_at__lt=cutoff)
+        .order_by('login_at', 'id')
+        .values_list('id', 'user_id', 'login_at', 'ip_address', 'user_agent', 'is_success', 'failure_reason')
+    )
+    moved = 0
+    # دسته‌ی قبلی حذف شده، پس هر بار اولین دسته‌ی باقی‌مانده خوانده می‌شود
+    while rows := list(queryset[:chunk_size]):
+        by_month = {}
+        for row in rows:
+            login_at = row[2].astimezone(dt_timezone.utc)
+            by_month.setdefault((login_at.year, login_at.month), []).append(_to_record(row))
+        for (year, month), records in by_month.items():
+            # هر append یک عضو gzip جدید است و gzip.open همه‌ی اعضا را پشت سر هم می‌خواند
+            with open(month_path(year, month), 'ab') as raw:
+                with gzip.open(raw, 'wt', encoding='utf-8') as out:
+                    out.writelines(json.dumps(record, ensure_ascii=False, separators=(',', ':')) + '\n' for record in records)
+                raw.flush()
+                os.fsync(raw.fileno())
+        LoginHistory.objects.filter(id__in=[row[0] for row in rows]).delete()
+        moved += len(rows)
+    return moved
+
+
+def encode_cursor(record):
+    data = json.dumps([record['login_at'], record['id']], separators=(',', ':'))
+    return base64.urlsafe_b64encode(data.encode()).decode()
+
+
+def decode_cursor(encoded):
+    """(login_at, id) آخرین رکورد صفحه‌ی قبل؛ برای cursor نامعتبر ValueError"""
+    try:
+        login_at, record_id = json.loads(base64.urlsafe_b64decode(encoded.encode()).decode())
+    except (TypeError, UnicodeDecodeError):
+        raise ValueError(encoded)
+    login_at = parse_datetime(login_at) if isinstance(login_at, str) else None
+    if login_at is None or login_at.tzinfo is None or not isinstance(record_id, int):
+        raise ValueError(encoded)
+    return login_at, record_id
+
+
+def _month_range(start, end):
+    months = archived_months()
+    if start:
+        months = [m for m in months if m >= (start.year, start.month)]
+    if end:
+        months = [m for m in months if m <= (end.year, end.month)]
+    return months
+
+
+def read_archive(start=None, end=None, user_id=None, after=None):
+    """
+    رکوردهای بایگانی‌شده (dict با همان فیلدهای LoginHistorySerializer) از جدید به قدیم.
+    start و end از نوع date یا datetime هستند و end شامل کل آن روز می‌شود؛
+    after خروجی decode_cursor است و فقط رکوردهای قدیمی‌تر از آن برگردانده می‌شوند.
+    """
+    start_at = _as_datetime(start) if start else None
+    end_at = _as_datetime(end, end_of_day=True) if end else None
+    months = _month_range(start, end)
+    if after is not None:
+        after_month = after[0].astimezone(dt_timezone.utc)
+        months = [m for m in months if m <= (after_month.year, after_month.month)]
+    for year, month in months:
+        records = {}
+        with gzip.open(month_path(year, month), 'rt', encoding='utf-8') as lines:
+            for line in lines:
+                record = json.loads(line)
+                if user_id is not None and record['user'] != user_id:
+                    continue
+                login_at = parse_datetime(record['login_at'])
+                if (start_at and login_at < start_at) or (end_at and login_at > end_at):
+                    continue
+                if after is not None and (login_at, record['id']) >= after:
+                    continue
+                records[record['id']] = (login_at, record)
+        for _, record in sorted(records.values(), key=lambda item: (item[0], item[1]['id']), reverse=True):
+            yield record
+
+
+def _as_datetime(value, end_of_day=False):
+    if isinstance(value, datetime):
+        return value if value.tzinfo else value.replace(tzinfo=dt_timezone.utc)
+    day_time = datetime.max.time() if end_of_day else datetime.min.time()
+    return datetime.combine(value, day_time, tzinfo=dt_timezone.utc)
+
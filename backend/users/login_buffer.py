@@ -0,0 +1,112 @@
+"""
+نوشتن با تأخیر (write-behind) تاریخچه‌ی ورود.
+
+در شروع انتخاب واحد ده‌ها هزار ورود در چند دقیقه ثبت می‌شود و INSERT تکی هر ورود روی نخ
+درخواست با نوشتن‌های انتخاب واحد رقابت می‌کند. رویدادها در حافظه جمع می‌شوند و یک نخ پس‌زمینه
+هر وقت تعداد به MAX_SIZE برسد یا FLUSH_INTERVAL ثانیه بگذرد آن‌ها را با یک bulk_create می‌نویسد.
+هنگام خروج پروسه باقی‌مانده نوشته می‌شود. با ENABLED=False همان INSERT هم‌زمان قبلی انجام می‌شود.
+"""
+import atexit
+import logging
+import os
+import threading
+
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections, transaction
+from django.utils import timezone
+
+from .models import LoginHistory
+
+logger = logging.getLogger(__name__)
+
+# اگر نوشتن مدتی شکست بخورد، بیش از این تعداد برابرِ MAX_SIZE در حافظه نگه داشته نمی‌شود
+MAX_PENDING_FACTOR = 20
+
+
+class LoginHistoryBuffer:
+    def __init__(self, max_size=None, flush_interval=None):
+        config = settings.LOGIN_HISTORY_BUFFER
+        self.max_size = max_size or config['MAX_SIZE']
+        self.flush_interval = flush_interval or config['FLUSH_INTERVAL']
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._pending = []
+        self._pid = None
+        self._thread = None
+
+    def add(self, entry):
+        with self._lock:
+            self._ensure_worker()
+            self._pending.append(entry)
+            full = len(self._pending) >= self.max_size
+        if full:
+            self._wake.set()
+
+    def _ensure_worker(self):
+        # نخ‌ها بعد از fork (مثلاً preload در gunicorn) به پروسه‌ی فرزند منتقل نمی‌شوند
+        if self._pid == os.getpid() and self._thread.is_alive():
+            return
+        if self._pid != os.getpid():
+            self._pending = []
+            atexit.register(self.flush)
+        self._pid = os.getpid()
+        self._thread = threading.Thread(target=self._run, name='login-history-writer', daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+            close_old_connections()
+
+    def flush(self):
+        """نوشتن همه‌ی رویدادهای در انتظار؛ خروجی تعداد ردیف‌های نوشته‌شده"""
+        with self._lock:
+            batch, self._pending = self._pending, []
+        if not batch:
+            return 0
+        try:
+            LoginHistory.objects.bulk_create(batch, batch_size=self.max_size)
+        except IntegrityError:
+            # یک ردیف نامعتبر (مثلاً ورود کاربری که پیش از نوشتن حذف شده) نباید کل دسته را در صف نگه دارد
+            return self._save_each(batch)
+        except Exception:
+            logger.exception("ثبت %d رکورد تاریخچه‌ی ورود ناموفق بود", len(batch))
+            self._requeue(batch)
+            return 0
+        return len(batch)
+
+    def _save_each(self, batch):
+        """نوشتن تک‌تک رکوردها؛ رکوردی که قابل ثبت نیست ثبت در لاگ و کنار گذاشته می‌شود"""
+        saved = 0
+        for index, entry in enumerate(batch):
+            # bulk_create ناموفق ممکن است شناسه را روی شیء گذاشته باشد
+            entry.pk, entry._state.adding = None, True
+            try:
+                with transaction.atomic():
+                    entry.save(force_insert=True)
+            except IntegrityError:
+                logger.warning("رکورد تاریخچه‌ی ورود کاربر %s قابل ثبت نبود و کنار گذاشته شد", entry.user_id)
+            except Exception:
+                logger.exception("ثبت %d رکورد تاریخچه‌ی ورود ناموفق بود", len(batch) - index)
+                self._requeue(batch[index:])
+                break
+            else:
+                saved += 1
+        return saved
+
+    def _requeue(self, batch):
+        with self._lock:
+            self._pending = (batch + self._pending)[-self.max_size * MAX_PENDING_FACTOR:]
+
+login_history_buffer = LoginHistoryBuffer()
+
+
+def record_login(**fields):
+    """ثبت یک رویداد ورود؛ زمان ورود همین لحظه است حتی اگر نوشتن با تأخیر انجام شود"""
+    entry = LoginHistory(login_at=timezone.now(), **fields)
+    if settings.LOGIN_HISTORY_BUFFER['ENABLED']:
+        login_history_buffer.add(entry)
+    else:
+        entry.save()
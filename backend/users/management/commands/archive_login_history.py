@@ -0,0 +1,45 @@
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from users.login_archive import archive_before, archive_dir
+from users.models import LoginHistory
+
+
+class Command(BaseCommand):
+    help = "انتقال تاریخچه‌ی ورودِ قدیمی‌تر از مدت نگه‌داری به فایل‌های ماهانه‌ی فشرده"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--before', help='تاریخ YYYY-MM-DD؛ رکوردهای قبل از این روز بایگانی می‌شوند')
+        parser.add_argument('--days', type=int, help='مدت نگه‌داری به روز (پیش‌فرض از تنظیمات)')
+        parser.add_argument('--chunk-size', type=int, help='تعداد رکورد هر دسته')
+        parser.add_argument('--dry-run', action='store_true', help='فقط گزارش بده، چیزی را منتقل نکن')
+
+    def handle(self, *args, **options):
+        if options['before']:
+            day = parse_date(options['before'])
+            if day is None:
+                raise CommandError("تاریخ --before باید به شکل YYYY-MM-DD باشد.")
+            cutoff = datetime.combine(day, time.min, tzinfo=dt_timezone.utc)
+        else:
+            days = options['days'] or settings.LOGIN_HISTORY_ARCHIVE['RETENTION_DAYS']
+            cutoff = timezone.now() - timedelta(days=days)
+
+        if options['dry_run']:
+            months = (
+                LoginHistory.objects.filter(login_at__lt=cutoff)
+                .annotate(month=TruncMonth('login_at', tzinfo=dt_timezone.utc))
+                .values_list('month').annotate(total=Count('id')).order_by('month')
+            )
+            for month, total in months:
+                self.stdout.write(f"{month:%Y-%m}: {total}")
+            self.stdout.write(f"رکوردهای قبل از {cutoff:%Y-%m-%d %H:%M} بایگانی می‌شوند (dry-run).")
+            return
+
+        moved = archive_before(cutoff, options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(f"{moved} رکورد به {archive_dir()} منتقل شد."))
@@ -0,0 +1,51 @@
+import json
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+
+from users.bulk_import import USERNAME_COLUMNS, BulkUserImporter, run_import_job
+from users.models import UserImportJob
+
+
+class Command(BaseCommand):
+    help = "ورود گروهی دانشجو یا استاد از فایل CSV با هش موازی رمزها"
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', nargs='?', help='مسیر فایل CSV')
+        parser.add_argument('--job', type=int, help='اجرای job ورود گروهی ثبت‌شده از API (به جای path)')
+        parser.add_argument('--role', choices=sorted(USERNAME_COLUMNS), default='student')
+        parser.add_argument('--workers', type=int, help='تعداد پروسه‌های هش (پیش‌فرض: تعداد هسته‌ها)')
+        parser.add_argument('--batch-size', type=int, help='تعداد ردیف هر دسته')
+        parser.add_argument('--errors-file', help='ذخیره‌ی خطاهای ردیف‌ها به صورت JSON')
+
+    def handle(self, *args, **options):
+        if options['job'] is not None:
+            return self.run_job(options)
+        if not options['path']:
+            raise CommandError("مسیر فایل CSV یا --job را مشخص کنید.")
+        importer = BulkUserImporter(options['role'], workers=options['workers'], batch_size=options['batch_size'])
+        try:
+            with open(options['path'], encoding='utf-8-sig', newline='') as lines:
+                report = importer.run(lines)
+        except (OSError, ValidationError) as e:
+            raise CommandError(e)
+
+        for error in report["errors"][:20]:
+            self.stdout.write(f"ردیف {error['row']} ({error['username']}): {' '.join(error['errors'])}")
+        if options['errors_file']:
+            with open(options['errors_file'], 'w', encoding='utf-8') as out:
+                json.dump(report["errors"], out, ensure_ascii=False, indent=2)
+        self.stdout.write(self.style.SUCCESS(
+            f"{report['created']} کاربر ثبت شد، {len(report['errors'])} ردیف خطا داشت."
+        ))
+
+    def run_job(self, options):
+        try:
+            job = run_import_job(options['job'], workers=options['workers'], batch_size=options['batch_size'])
+        except UserImportJob.DoesNotExist:
+            raise CommandError(f"job {options['job']} وجود ندارد.")
+        if job.status == 'failed':
+            raise CommandError(job.message)
+        self.stdout.write(self.style.SUCCESS(
+            f"job {job.pk} ({job.get_status_display()}): {job.created} کاربر ثبت شد، {len(job.errors)} ردیف خطا داشت."
+        ))
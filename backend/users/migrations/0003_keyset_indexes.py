@@ -0,0 +1,22 @@
+# Generated by Django 5.2.8 on 2026-10-18 19:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('users', '0002_login_history_user_nullable'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='loginhistory',
+            index=models.Index(fields=['-login_at', '-id'], name='loginhistory_login_at_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['role', 'last_name', 'first_name', 'id'], name='user_role_name_idx'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.8 on 2026-10-18 19:56
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0003_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='loginhistory',
+            name='login_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False, verbose_name='زمان ورود'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.8 on 2026-10-18 20:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0004_loginhistory_login_at_default'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='loginhistory',
+            index=models.Index(fields=['user', '-login_at', '-id'], name='loginhistory_user_login_idx'),
+        ),
+    ]
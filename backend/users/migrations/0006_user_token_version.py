@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-18 20:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0005_loginhistory_user_login_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='token_version',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='نسخه\u200cی توکن'),
+        ),
+    ]
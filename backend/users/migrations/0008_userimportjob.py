@@ -0,0 +1,30 @@
+# Generated by Django 5.2.8 on 2026-10-18 20:55
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0007_alter_user_managers'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserImportJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('role', models.CharField(max_length=20, verbose_name='نقش')),
+                ('file_path', models.CharField(max_length=500, verbose_name='مسیر فایل')),
+                ('status', models.CharField(choices=[('pending', 'در صف'), ('running', 'در حال اجرا'), ('done', 'انجام شد'), ('failed', 'ناموفق')], default='pending', max_length=20, verbose_name='وضعیت')),
+                ('created', models.PositiveIntegerField(default=0, verbose_name='تعداد ثبت\u200cشده')),
+                ('errors', models.JSONField(default=list, verbose_name='خطای ردیف\u200cها')),
+                ('message', models.CharField(blank=True, max_length=500, verbose_name='پیام خطا')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='زمان ایجاد')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='زمان پایان')),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+    ]
@@ -1,7 +1,28 @@
-from django.contrib.auth.models import AbstractUser
+from django.contrib.auth.models import AbstractUser, UserManager as BaseUserManager
 from django.db import models
+from django.db.models import F
+from django.utils import timezone
 from django.contrib.auth import get_user_model
 
+from .token_versions import forget_versions
+
+
+# فیلدهایی که تغییرشان توکن‌های صادرشده را باطل می‌کند
+ACCESS_FIELDS = ('role', 'is_active')
+
+
+class UserQuerySet(models.QuerySet):
+    def update(self, **kwargs):
+        # update() از save() نمی‌گذرد؛ تغییر نقش یا فعال بودن باید این‌جا هم نسخه‌ی توکن را بالا ببرد
+        if any(field in kwargs for field in ACCESS_FIELDS) and 'token_version' not in kwargs:
+            kwargs['token_version'] = F('token_version') + 1
+            forget_versions(list(self.values_list('pk', flat=True)))
+        return super().update(**kwargs)
+
+
+class UserManager(BaseUserManager.from_queryset(UserQuerySet)):
+    pass
+
 
 class User(AbstractUser):
     ROLE_CHOICES = (
@@ -10,11 +31,34 @@ class User(AbstractUser):
         ('student', 'دانشجو'),
     )
     role = models.CharField(max_length=20, choices=ROLE_CHOICES, default='student')
+    # با تغییر نقش یا غیرفعال شدن بالا می‌رود و توکن‌های صادرشده‌ی قبلی را باطل می‌کند (users/authentication.py)
+    token_version = models.PositiveIntegerField("نسخه‌ی توکن", default=0, editable=False)
+
+    objects = UserManager()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_access = (instance.__dict__.get('role'), instance.__dict__.get('is_active'))
+        return instance
 
     def save(self, *args, **kwargs):
         if self.is_superuser:
             self.role = 'admin'
+        loaded = getattr(self, '_loaded_access', None)
+        if loaded is not None and None not in loaded and loaded != (self.role, self.is_active):
+            self.token_version += 1
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'token_version'}
         super().save(*args, **kwargs)
+        self._loaded_access = (self.role, self.is_active)
+
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        # کاربر ساخته‌شده از ادعاهای توکن: اولین فیلد deferred بقیه را هم با همان یک کوئری می‌خواند
+        if fields is not None and getattr(self, '_from_claims', False):
+            fields = {*fields, *self.get_deferred_fields()}
+        super().refresh_from_db(using=using, fields=fields, from_queryset=from_queryset)
         
 
     groups = models.ManyToManyField(
@@ -32,6 +76,9 @@ class User(AbstractUser):
         verbose_name='user permissions',
     )
 
+    class Meta(AbstractUser.Meta):
+        indexes = [models.Index(fields=['role', 'last_name', 'first_name', 'id'], name='user_role_name_idx')]
+
     def __str__(self):
         return f"{self.username} ({self.get_role_display()})"
 
@@ -40,7 +87,8 @@ User = get_user_model()
 
 class LoginHistory(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='login_history', null=True, blank=True)
-    login_at = models.DateTimeField("زمان ورود", auto_now_add=True)
+    # زمان رویداد هنگام ساخت رکورد تعیین می‌شود، نه هنگام نوشتن با تأخیر (login_buffer)
+    login_at = models.DateTimeField("زمان ورود", default=timezone.now, editable=False)
     ip_address = models.GenericIPAddressField("آدرس IP", null=True, blank=True)
     user_agent = models.TextField("مرورگر/دستگاه", blank=True, null=True)
     is_success = models.BooleanField("ورود موفق", default=True)
@@ -50,7 +98,33 @@ class LoginHistory(models.Model):
         verbose_name = "تاریخچه ورود"
         verbose_name_plural = "تاریخچه ورود کاربران"
         ordering = ['-login_at']
+        indexes = [
+            models.Index(fields=['-login_at', '-id'], name='loginhistory_login_at_idx'),
+            models.Index(fields=['user', '-login_at', '-id'], name='loginhistory_user_login_idx'),
+        ]
 
     def __str__(self):
         status = "موفق" if self.is_success else f"ناموفق - {self.failure_reason or 'نامشخص'}"
         return f"{self.user} – {self.login_at} ({status})"
+
+
+class UserImportJob(models.Model):
+    """ورود گروهی کاربران از CSV که بیرون از پروسه‌ی درخواست اجرا می‌شود (users/bulk_import.py)"""
+    STATUS_CHOICES = (
+        ('pending', 'در صف'),
+        ('running', 'در حال اجرا'),
+        ('done', 'انجام شد'),
+        ('failed', 'ناموفق'),
+    )
+    role = models.CharField("نقش", max_length=20)
+    file_path = models.CharField("مسیر فایل", max_length=500)
+    status = models.CharField("وضعیت", max_length=20, choices=STATUS_CHOICES, default='pending')
+    created = models.PositiveIntegerField("تعداد ثبت‌شده", default=0)
+    errors = models.JSONField("خطای ردیف‌ها", default=list)
+    message = models.CharField("پیام خطا", max_length=500, blank=True)
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    created_at = models.DateTimeField("زمان ایجاد", auto_now_add=True)
+    finished_at = models.DateTimeField("زمان پایان", null=True, blank=True)
+
+    def __str__(self):
+        return f"ورود گروهی {self.pk} ({self.get_status_display()})"
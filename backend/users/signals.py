@@ -1,17 +1,25 @@
 from django.contrib.auth.signals import user_logged_in, user_login_failed
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 from django.contrib.auth import get_user_model
-from .models import LoginHistory
+from .token_versions import forget_versions
+from .login_buffer import record_login
 
 User = get_user_model()
 
+
+@receiver([post_save, post_delete], sender=User)
+def drop_token_version(sender, instance, **kwargs):
+    """نسخه‌ی توکن کاربر در کش مشترک بعد از commit دوباره از پایگاه داده خوانده می‌شود"""
+    forget_versions([instance.pk])
+
 @receiver(user_logged_in)
 def log_successful_login(sender, request, user, **kwargs):
     """ثبت ورود موفق"""
     ip = request.META.get('REMOTE_ADDR', None)
     ua = request.META.get('HTTP_USER_AGENT', None)
 
-    LoginHistory.objects.create(
+    record_login(
         user=user,
         ip_address=ip,
         user_agent=ua,
@@ -24,7 +32,7 @@ def log_failed_login(sender, credentials, request, **kwargs):
     ip = request.META.get('REMOTE_ADDR', None) if request else None
     ua = request.META.get('HTTP_USER_AGENT', None) if request else None
 
-    LoginHistory.objects.create(
+    record_login(
         user=None,  # چون کاربر معتبر نیست
         ip_address=ip,
         user_agent=ua,
@@ -1,3 +1,296 @@
-from django.test import TestCase
+import base64
+import json
+import os
+import tempfile
+from datetime import datetime, timezone as dt_timezone
+from io import BytesIO, StringIO
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import AsyncClient, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from .auth import LoginHistoryTokenObtainPairSerializer
+from .login_buffer import LoginHistoryBuffer, login_history_buffer, record_login
+from .models import LoginHistory, User
+from .token_versions import version_key
+
+
+class KeysetPaginationTest(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create(username='admin', role='admin')
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+        # نام خانوادگی تکراری تا مرتب‌سازی چندفیلدی و فیلد یکتای id آزموده شود
+        for i in range(7):
+            User.objects.create(username=f'stu{i}', role='student', last_name='احمدی' if i % 2 else 'رضایی',
+                                first_name='علی')
+
+    def _walk(self, url):
+        numbers, pages = [], 0
+        while url:
+            r = self.client.get(url)
+            self.assertEqual(r.status_code, 200)
+            numbers += [row['number'] for row in r.data['results']]
+            url, pages = r.data['next'], pages + 1
+        return numbers, pages
+
+    def test_forward_walk_is_complete_and_ordered(self):
+        numbers, pages = self._walk('/api/users/students/?page_size=2')
+        expected = list(
+            User.objects.filter(role='student').order_by('last_name', 'first_name', 'id').values_list('username', flat=True)
+        )
+        self.assertEqual(numbers, expected)
+        self.assertEqual(pages, 4)
+
+    def test_previous_link_returns_prior_page(self):
+        first = self.client.get('/api/users/students/?page_size=3').data
+        second = self.client.get(first['next']).data
+        back = self.client.get(second['previous']).data
+        self.assertEqual(back['results'], first['results'])
+
+    def test_login_history_newest_first(self):
+        for _ in range(3):
+            LoginHistory.objects.create(user=self.admin)
+        r = self.client.get('/api/users/login-history/?page_size=2')
+        ids = [row['id'] for row in r.data['results']]
+        ids += [row['id'] for row in self.client.get(r.data['next']).data['results']]
+        self.assertEqual(ids, sorted(ids, reverse=True))
+        self.assertEqual(len(ids), 3)
+
+    def test_invalid_cursor(self):
+        self.assertEqual(self.client.get('/api/users/students/?cursor=bogus').status_code, 400)
+        # cursor خوش‌ساخت با مقادیر نوع نادرست هم 400 است، نه خطای ORM
+        for values in (['2024-01-01', 'x'], [['a'], 1], [None, 1]):
+            cursor = base64.urlsafe_b64encode(json.dumps({'v': values, 'r': 0}).encode()).decode()
+            response = self.client.get(f'/api/users/login-history/?cursor={cursor}')
+            self.assertEqual(response.status_code, 400, values)
+
+
+class BulkImportTest(TestCase):
+    CSV = (
+        "student_number,national_code,first_name,last_name\n"
+        "4001,111,علی,رضایی\n"
+        "4002,222,سارا,احمدی\n"
+        "4001,333,تکراری,در فایل\n"
+        "old,444,قدیمی,موجود\n"
+        "4003,,بدون,کدملی\n"
+    )
+
+    def setUp(self):
+        uploads = tempfile.TemporaryDirectory()
+        self.addCleanup(uploads.cleanup)
+        settings = override_settings(USER_IMPORT={
+            'WORKERS': 1, 'BATCH_SIZE': 2, 'DIR': uploads.name, 'MAX_UPLOAD_SIZE': 1024, 'BACKGROUND': False,
+        })
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.uploads = uploads.name
+        User.objects.create(username='old', role='student')
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create(username='admin', role='admin'))
+
+    def _upload(self, text, role='student'):
+        upload = BytesIO(text.encode())
+        upload.name = 'students.csv'
+        return self.client.post('/api/users/register/bulk-import/', {'file': upload, 'role': role})
+
+    def test_endpoint_creates_job_and_reports_row_errors(self):
+        response = self._upload(self.CSV)
+        self.assertEqual(response.status_code, 202)
+        status = self.client.get(f"/api/users/register/bulk-import/{response.data['job_id']}/").data
+        self.assertEqual((status['status'], status['created']), ('done', 2))
+        self.assertEqual([error['row'] for error in status['errors']], [4, 5, 6])
+        self.assertEqual(os.listdir(self.uploads), [])
+
+        user = User.objects.get(username='4002')
+        self.assertEqual((user.role, user.last_name), ('student', 'احمدی'))
+        self.assertTrue(user.check_password('222'))
+
+    def test_bad_header_fails_job_and_large_upload_rejected(self):
+        response = self._upload("username,code\nx,1\n")
+        self.assertEqual(response.data['status'], 'failed')
+        self.assertIn('student_number', response.data['message'])
+        self.assertEqual(self._upload("student_number,national_code\n" + "1,1\n" * 400).status_code, 400)
+
+    def test_command_hashes_in_process_pool(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False, encoding='utf-8') as f:
+            f.write("personnel_number,national_code\np10,123\np11,456\np12,789\n")
+        self.addCleanup(os.unlink, f.name)
+        call_command('import_users', f.name, role='professor', workers=2, stdout=StringIO())
+        professors = User.objects.filter(role='professor').order_by('username')
+        self.assertEqual([p.username for p in professors], ['p10', 'p11', 'p12'])
+        self.assertTrue(professors[2].check_password('789'))
+
+
+class LoginHistoryBufferTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username='stu', role='student')
+
+    def test_buffered_entries_keep_event_time(self):
+        buffer = LoginHistoryBuffer(max_size=100, flush_interval=3600)
+        first = LoginHistory(user=self.user, ip_address='10.0.0.1')
+        buffer.add(first)
+        buffer.add(LoginHistory(user=None, is_success=False))
+        self.assertEqual(LoginHistory.objects.count(), 0)
+
+        self.assertEqual(buffer.flush(), 2)
+        self.assertEqual(buffer.flush(), 0)
+        self.assertEqual(LoginHistory.objects.get(user=self.user).login_at, first.login_at)
+
+    def test_synchronous_fallback(self):
+        record_login(user=self.user, is_success=True)
+        self.assertEqual(LoginHistory.objects.filter(user=self.user).count(), 1)
+        self.assertEqual(login_history_buffer.flush(), 0)
+
+
+class LoginHistoryBufferIntegrityTest(TransactionTestCase):
+    def test_row_for_deleted_user_does_not_block_batch(self):
+        user, gone = User.objects.create(username='stu'), User.objects.create(username='gone')
+        buffer = LoginHistoryBuffer(max_size=100, flush_interval=3600)
+        buffer.add(LoginHistory(user=user))
+        buffer.add(LoginHistory(user=gone))
+        buffer.add(LoginHistory(user=None, is_success=False))
+        # کاربر بعد از ورود و پیش از نوشتن بافر حذف می‌شود
+        User.objects.filter(pk=gone.pk).delete()
+
+        with self.assertLogs('users.login_buffer', 'WARNING'):
+            self.assertEqual(buffer.flush(), 2)
+        self.assertEqual(buffer.flush(), 0)
+        self.assertEqual(LoginHistory.objects.count(), 2)
+
+
+class LoginHistoryArchiveTest(TestCase):
+    def setUp(self):
+        self.archive = tempfile.TemporaryDirectory()
+        self.addCleanup(self.archive.cleanup)
+        settings = override_settings(LOGIN_HISTORY_ARCHIVE={'DIR': self.archive.name, 'RETENTION_DAYS': 90, 'CHUNK_SIZE': 2})
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+        self.student = User.objects.create(username='stu', role='student')
+        self.other = User.objects.create(username='other', role='student')
+        stamps = [(2024, 1, 5), (2024, 1, 20), (2024, 2, 3), (2024, 3, 1)]
+        for year, month, day in stamps:
+            for user in (self.student, self.other):
+                LoginHistory.objects.create(user=user, login_at=datetime(year, month, day, 8, tzinfo=dt_timezone.utc))
+        self.client = APIClient()
+        self.client.force_authenticate(self.student)
+
+    def test_archive_moves_old_rows_into_monthly_files(self):
+        call_command('archive_login_history', before='2024-03-01', stdout=StringIO())
+        self.assertEqual(LoginHistory.objects.count(), 2)
+        files = sorted(os.listdir(self.archive.name))
+        self.assertEqual(files, ['login_history-2024-01.ndjson.gz', 'login_history-2024-02.ndjson.gz'])
+
+        data = self.client.get('/api/users/login-history/archived/?from=2024-01-10&to=2024-12-31').data
+        stamps = [row['login_at'][:10] for row in data['results']]
+        self.assertEqual(stamps, ['2024-02-03', '2024-01-20'])
+        self.assertTrue(all(row['user'] == self.student.pk for row in data['results']))
+        self.assertIsNone(data['next'])
+
+    def test_archive_pages_follow_cursor(self):
+        call_command('archive_login_history', before='2024-03-01', stdout=StringIO())
+        self.client.force_authenticate(User.objects.create(username='admin', role='admin'))
+        url, seen = '/api/users/login-history/archived/?limit=4', []
+        while url:
+            data = self.client.get(url).data
+            seen += [(row['login_at'][:10], row['user']) for row in data['results']]
+            url = data['next']
+        self.assertEqual(len(seen), 6)
+        self.assertEqual(len(set(seen)), 6)
+        self.assertEqual([stamp for stamp, _ in seen], sorted((stamp for stamp, _ in seen), reverse=True))
+
+        bad = self.client.get('/api/users/login-history/archived/?cursor=bm9wZQ')
+        self.assertEqual(bad.status_code, 400)
+
+    def test_dry_run_keeps_rows(self):
+        out = StringIO()
+        call_command('archive_login_history', before='2024-03-01', dry_run=True, stdout=out)
+        self.assertIn('2024-01: 4', out.getvalue())
+        self.assertEqual(LoginHistory.objects.count(), 8)
+
+
+class ClaimsAuthenticationTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(username='stu', role='student', first_name='سارا')
+        token = LoginHistoryTokenObtainPairSerializer.get_token(self.user).access_token
+        self.auth = {'HTTP_AUTHORIZATION': f'Bearer {token}'}
+
+    def test_claims_embedded_at_issuance(self):
+        self.user.set_password('secret-123')
+        self.user.save()
+        response = APIClient().post('/api/token/', {'username': 'stu', 'password': 'secret-123'})
+        token = AccessToken(response.data['access'])
+        self.assertEqual((token['username'], token['role'], token['ver']), ('stu', 'student', 0))
+
+    def test_repeat_requests_skip_user_query(self):
+        self.client.get('/api/users/login-history/', **self.auth)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/users/login-history/', **self.auth)
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse([q['sql'] for q in queries.captured_queries if 'users_user' in q['sql']])
+        # فیلدهای خارج از ادعاها با یک کوئری بارگذاری می‌شوند
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/users/me/', **self.auth)
+        self.assertEqual((response.data['first_name'], response.data['role']), ('سارا', 'student'))
+
+    def test_async_repeat_requests_skip_user_query(self):
+        client = AsyncClient()
+        headers = {'Authorization': self.auth['HTTP_AUTHORIZATION']}
+        get = async_to_sync(client.get)
+        self.assertEqual(get('/api/selection/async/draft/', headers=headers).status_code, 200)
+        # کوئری‌های ORM async در همین thread (thread_sensitive) اجرا می‌شوند
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(get('/api/selection/async/draft/', headers=headers).status_code, 200)
+        self.assertFalse([q['sql'] for q in queries.captured_queries if 'users_user' in q['sql']])
+
+    def test_role_change_and_deactivation_revoke_tokens(self):
+        self.assertEqual(self.client.get('/api/users/me/', **self.auth).status_code, 200)
+        user = User.objects.get(pk=self.user.pk)
+        user.role = 'professor'
+        with self.captureOnCommitCallbacks(execute=True):
+            user.save(update_fields=['role'])
+        self.assertEqual(user.token_version, 1)
+        self.assertEqual(self.client.get('/api/users/me/', **self.auth).status_code, 401)
+
+        user.first_name = 'نام جدید'
+        user.save()
+        token = LoginHistoryTokenObtainPairSerializer.get_token(user).access_token
+        auth = {'HTTP_AUTHORIZATION': f'Bearer {token}'}
+        self.assertEqual(self.client.get('/api/users/me/', **auth).status_code, 200)
+        user.is_active = False
+        with self.captureOnCommitCallbacks(execute=True):
+            user.save()
+        self.assertEqual(user.token_version, 2)
+        self.assertEqual(self.client.get('/api/users/me/', **auth).status_code, 401)
+
+    def test_newer_token_refreshes_stale_version(self):
+        self.assertEqual(self.client.get('/api/users/me/', **self.auth).status_code, 200)
+        with self.captureOnCommitCallbacks(execute=True):
+            User.objects.filter(pk=self.user.pk).update(role='professor')
+        user = User.objects.get(pk=self.user.pk)
+        self.assertEqual(user.token_version, 1)
+        # کلید کش قبل از commit تغییر دوباره با نسخه‌ی قبلی پر شده است
+        cache.set(version_key(user.pk), (0, True))
+
+        token = LoginHistoryTokenObtainPairSerializer.get_token(user).access_token
+        response = self.client.get('/api/users/me/', HTTP_AUTHORIZATION=f'Bearer {token}')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['role'], 'professor')
+        self.assertEqual(self.client.get('/api/users/me/', **self.auth).status_code, 401)
+
+    def test_deleted_user_token_is_rejected(self):
+        self.assertEqual(self.client.get('/api/users/login-history/', **self.auth).status_code, 200)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.delete()
+        self.assertEqual(self.client.get('/api/users/login-history/', **self.auth).status_code, 401)
+
+    def test_queryset_update_of_other_fields_keeps_tokens(self):
+        User.objects.filter(pk=self.user.pk).update(first_name='نام جدید')
+        self.assertEqual(User.objects.get(pk=self.user.pk).token_version, 0)
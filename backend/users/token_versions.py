@@ -0,0 +1,22 @@
+"""
+نسخه‌ی توکن کاربران در کش مشترک.
+
+ClaimsJWTAuthentication برای هر درخواست فقط (token_version, is_active) کاربر را از این کش می‌خواند؛
+هر تغییری که می‌تواند توکن‌ها را باطل کند کلید کاربر را بعد از commit پاک می‌کند تا
+همه‌ی workerها در درخواست بعدی مقدار تازه را از پایگاه داده بخوانند.
+"""
+from django.core.cache import cache
+from django.db import transaction
+
+KEY_PREFIX = 'user-token-version'
+
+
+def version_key(user_id):
+    return f'{KEY_PREFIX}:{user_id}'
+
+
+def forget_versions(user_ids):
+    """پاک کردن کلید نسخه‌ی کاربران بعد از commit"""
+    keys = [version_key(user_id) for user_id in user_ids]
+    if keys:
+        transaction.on_commit(lambda: cache.delete_many(keys))
@@ -1,8 +1,15 @@
+from itertools import islice
+
+from django.conf import settings
+from django.utils.dateparse import parse_date
 from rest_framework import viewsets, status
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.decorators import action
-from .models import User, LoginHistory
+from django.shortcuts import get_object_or_404
+from .models import User, LoginHistory, UserImportJob
+from .bulk_import import USERNAME_COLUMNS, save_upload, start_import_job
+from .login_archive import decode_cursor, encode_cursor, read_archive
 from .serializers import (
     RegisterStudentSerializer,
     RegisterProfessorSerializer,
@@ -11,7 +18,13 @@ from .serializers import (
     StudentListSerializer,
     ProfessorListSerializer,
 )
+from rest_framework.utils.urls import replace_query_param
 from rest_framework.views import APIView
+from core.pagination import LoginHistoryPagination, NamePagination
+
+# اندازه‌ی پیش‌فرض و حداکثر خروجی تاریخچه‌ی بایگانی‌شده
+ARCHIVE_PAGE_SIZE = 100
+ARCHIVE_MAX_PAGE_SIZE = 1000
 
 class IsAdminUser(IsAuthenticated):
     def has_permission(self, request, view):
@@ -36,6 +49,39 @@ class UserRegistrationViewSet(viewsets.ViewSet):
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+    @action(detail=False, methods=['post'], url_path='bulk-import')
+    def bulk_import(self, request):
+        """ورود گروهی از فایل CSV در پس‌زمینه؛ role برابر student یا professor. خروجی شناسه‌ی job"""
+        upload = request.FILES.get('file')
+        role = request.data.get('role', 'student')
+        if upload is None:
+            return Response({"errors": ["فایل CSV (file) ارسال نشده است."]}, status=status.HTTP_400_BAD_REQUEST)
+        if role not in USERNAME_COLUMNS:
+            return Response({"errors": ["role باید student یا professor باشد."]}, status=status.HTTP_400_BAD_REQUEST)
+        max_size = settings.USER_IMPORT['MAX_UPLOAD_SIZE']
+        if upload.size > max_size:
+            return Response({"errors": [f"حجم فایل حداکثر {max_size // (1024 * 1024)} مگابایت است."]},
+                            status=status.HTTP_400_BAD_REQUEST)
+        job = UserImportJob.objects.create(role=role, file_path=str(save_upload(upload)), created_by=request.user)
+        start_import_job(job)
+        job.refresh_from_db()
+        return Response(import_job_payload(job), status=status.HTTP_202_ACCEPTED)
+
+    @action(detail=False, methods=['get'], url_path=r'bulk-import/(?P<job_id>\d+)')
+    def bulk_import_status(self, request, job_id):
+        """وضعیت و گزارش یک ورود گروهی"""
+        return Response(import_job_payload(get_object_or_404(UserImportJob, pk=job_id)))
+
+
+def import_job_payload(job):
+    return {
+        "job_id": job.pk,
+        "status": job.status,
+        "created": job.created,
+        "errors": job.errors,
+        "message": job.message,
+    }
+
 class CurrentUserAPIView(APIView):
     permission_classes = [IsAuthenticated]
 
@@ -47,6 +93,7 @@ class CurrentUserAPIView(APIView):
 class LoginHistoryViewSet(viewsets.ReadOnlyModelViewSet):
     serializer_class = LoginHistorySerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = LoginHistoryPagination
 
     def get_queryset(self):
         user = self.request.user
@@ -54,16 +101,47 @@ class LoginHistoryViewSet(viewsets.ReadOnlyModelViewSet):
             return LoginHistory.objects.all().order_by('-login_at')
         return LoginHistory.objects.filter(user=user).order_by('-login_at')
 
+    @action(detail=False, methods=['get'], url_path='archived')
+    def archived(self, request):
+        """رکوردهای بایگانی‌شده در بازه‌ی from تا to (YYYY-MM-DD)، از جدید به قدیم؛ صفحه‌ی بعد با next"""
+        params = request.query_params
+        try:
+            start, end = parse_date(params.get('from') or ''), parse_date(params.get('to') or '')
+        except ValueError:
+            start = end = None
+        if (params.get('from') and start is None) or (params.get('to') and end is None):
+            return Response({"errors": ["تاریخ باید به شکل YYYY-MM-DD باشد."]}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            limit = min(max(int(params.get('limit', ARCHIVE_PAGE_SIZE)), 1), ARCHIVE_MAX_PAGE_SIZE)
+        except ValueError:
+            limit = ARCHIVE_PAGE_SIZE
+        if request.user.role == 'admin':
+            user_id = int(params['user']) if params.get('user', '').isdigit() else None
+        else:
+            user_id = request.user.pk
+        try:
+            after = decode_cursor(params['cursor']) if params.get('cursor') else None
+        except ValueError:
+            return Response({"errors": ["cursor نامعتبر است."]}, status=status.HTTP_400_BAD_REQUEST)
+        records = list(islice(read_archive(start, end, user_id=user_id, after=after), limit + 1))
+        next_link = None
+        if len(records) > limit:
+            records = records[:limit]
+            next_link = replace_query_param(request.build_absolute_uri(), 'cursor', encode_cursor(records[-1]))
+        return Response({"next": next_link, "results": records})
+
 
 class StudentListView(viewsets.ReadOnlyModelViewSet):
     """لیست دانشجویان برای ادمین: شماره دانشجویی، اسم، فامیل"""
     queryset = User.objects.filter(role='student').order_by('last_name', 'first_name')
     serializer_class = StudentListSerializer
     permission_classes = [IsAdminUser]
+    pagination_class = NamePagination
 
 
 class ProfessorListForAdminView(viewsets.ReadOnlyModelViewSet):
     """لیست اساتید برای ادمین: شماره پرسنلی، اسم، فامیل"""
     queryset = User.objects.filter(role='professor').order_by('last_name', 'first_name')
     serializer_class = ProfessorListSerializer
-    permission_classes = [IsAdminUser]
\ No newline at end of file
+    permission_classes = [IsAdminUser]
+    pagination_class = NamePagination
\ No newline at end of file
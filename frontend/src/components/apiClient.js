@@ -28,6 +28,21 @@ function normalizeList(data) {
   return [];
 }
 
+// لیست‌های صفحه‌بندی‌شده (cursor) را تا آخرین صفحه دنبال می‌کند
+async function fetchAllPages(url, accessToken) {
+  let items = [];
+  let next = url;
+  while (next) {
+    const res = await fetch(next, {
+      headers: { Authorization: `Bearer ${accessToken}` },
+    });
+    const data = await handleResponse(res);
+    items = items.concat(normalizeList(data));
+    next = data && !Array.isArray(data) ? data.next : null;
+  }
+  return items;
+}
+
 // Login 
 export async function loginRequest(username, password) {
   const res = await fetch(`${BASE_URL}/api/token/`, {
@@ -69,19 +84,13 @@ export async function fetchLoginHistory(accessToken) {
     },
   });
 
-  return handleResponse(res);
+  const data = await handleResponse(res);
+  return normalizeList(data);
 }
 
 // GET /api/courses/
 export async function fetchCourses(accessToken) {
-  const res = await fetch(`${BASE_URL}/api/courses/`, {
-    headers: {
-      Authorization: `Bearer ${accessToken}`,
-    },
-  });
-
-  const data = await handleResponse(res);
-  return normalizeList(data);
+  return fetchAllPages(`${BASE_URL}/api/courses/`, accessToken);
 }
 
 
@@ -251,14 +260,7 @@ export async function deleteCourse(accessToken, courseId) {
 }
 
 export async function fetchPrerequisites(accessToken) {
-  const res = await fetch(`${BASE_URL}/api/prerequisites/`, {
-    headers: {
-      Authorization: `Bearer ${accessToken}`,
-    },
-  });
-
-  const data = await handleResponse(res);
-  return normalizeList(data);
+  return fetchAllPages(`${BASE_URL}/api/prerequisites/`, accessToken);
 }
 // POST /api/prerequisites/
 export async function createPrerequisite(accessToken, prerequisitePayload) {
@@ -430,12 +432,7 @@ export async function registerStudent(accessToken, payload) {
 
 // GET students
 export async function fetchStudents(accessToken) {
-  const res = await fetch(`${BASE_URL}/api/users/students/`, {
-    headers: { Authorization: `Bearer ${accessToken}` },
-  });
-
-  const data = await handleResponse(res);
-  return normalizeList(data);
+  return fetchAllPages(`${BASE_URL}/api/users/students/`, accessToken);
 }
 
 // DELETE student
@@ -469,13 +466,7 @@ export async function registerProfessor(accessToken, payload) {
 
 // GET professors
 export async function fetchProfessors(accessToken) {
-  // ✅ جدید: لیست اساتید
-  const res = await fetch(`${BASE_URL}/api/users/professors/`, {
-    headers: { Authorization: `Bearer ${accessToken}` },
-  });
-
-  const data = await handleResponse(res);
-  return normalizeList(data);
+  return fetchAllPages(`${BASE_URL}/api/users/professors/`, accessToken);
 }
 
 // =======================
@@ -537,11 +528,7 @@ export async function finalizeSelection(accessToken) {
 
 // GET /api/selection/selections/
 export async function fetchFinalSelections(accessToken) {
-  const res = await fetch(`${BASE_URL}/api/selection/selections/`, {
-    headers: { Authorization: `Bearer ${accessToken}` },
-  });
-
-  return handleResponse(res);
+  return fetchAllPages(`${BASE_URL}/api/selection/selections/`, accessToken);
 }
 
 // GET /api/selection/selections/schedule/